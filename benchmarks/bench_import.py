@@ -0,0 +1,91 @@
+"""
+CLI startup benchmark: wall time of fresh interpreters running popmusic commands
+
+Each case runs in a new process --repeats times; the best time is reported
+with the heavy modules (TensorFlow, scikit-learn, matplotlib, spotipy) the
+command ended up importing. `--help` must stay under --budget seconds and must
+not import any of them; the run fails otherwise. For reference, the notebook's
+eager import header is timed too.
+
+Usage:
+    python benchmarks/bench_import.py --repeats 5
+    python benchmarks/bench_import.py --label   # also time `label` on the real dataset
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+HEAVY_MODULES = ['tensorflow', 'sklearn', 'matplotlib', 'spotipy', 'scipy', 'pandas']
+
+# Runs argv as `python -m popmusic ...` would, then reports which heavy modules got imported
+RUNNER = """
+import runpy, sys
+sys.argv = ['popmusic'] + {argv!r}
+try:
+    runpy.run_module('popmusic', run_name='__main__')
+except SystemExit:
+    pass
+print('LOADED=' + ','.join(m for m in {heavy!r} if m in sys.modules), file=sys.stderr)
+"""
+NOTEBOOK_HEADER = """
+import numpy, pandas, matplotlib.pyplot
+from sklearn.model_selection import train_test_split
+from tensorflow import keras
+"""
+
+
+def run(code, repeats):
+    """(best seconds, heavy modules loaded) for `python -c code`"""
+    best, loaded = float('inf'), []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        out = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True)
+        best = min(best, time.perf_counter() - start)
+        marker = [line for line in out.stderr.splitlines() if line.startswith('LOADED=')]
+        if out.returncode != 0 and not marker:
+            raise SystemExit(f"Failed:\n{code}\n{out.stderr}")
+        loaded = marker[-1][len('LOADED='):].split(',') if marker and marker[-1] != 'LOADED=' else []
+    return best, loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark popmusic CLI startup")
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--budget', type=float, default=0.5, help="max seconds for `--help`")
+    parser.add_argument('--label', action='store_true', help="also time `label` on the dataset")
+    parser.add_argument('--no-baseline', action='store_true', help="skip timing the notebook import header")
+    args = parser.parse_args()
+
+    cases = [
+        ('--help', ['--help']),
+        ('train --help', ['train', '--help']),
+        ('score --help', ['score', '--help']),
+    ]
+    if args.label:
+        cases.append(('label', ['label']))
+
+    print(f"{'command':<24}{'seconds':>10}  heavy imports")
+    results = {}
+    for name, argv in cases:
+        seconds, loaded = run(RUNNER.format(argv=argv, heavy=HEAVY_MODULES), args.repeats)
+        results[name] = (seconds, loaded)
+        print(f"{name:<24}{seconds:>10.3f}  {', '.join(loaded) or '-'}")
+    if not args.no_baseline:
+        try:
+            seconds, _ = run(NOTEBOOK_HEADER, 1)
+            print(f"{'notebook imports':<24}{seconds:>10.3f}  (reference)")
+        except SystemExit:
+            print(f"{'notebook imports':<24}{'n/a':>10}  (TensorFlow or sklearn not installed)")
+
+    seconds, loaded = results['--help']
+    if loaded or seconds > args.budget:
+        raise SystemExit(f"❌ `--help` took {seconds:.3f} s (budget {args.budget:g} s), imported {loaded or 'nothing heavy'}")
+    print(f"✅ `--help` within {args.budget:g} s budget, no heavy imports")
+
+
+if __name__ == "__main__":
+    main()
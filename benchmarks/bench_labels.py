@@ -0,0 +1,83 @@
+"""
+Pop-label benchmark: notebook row-wise apply vs popmusic.labels
+
+Builds a synthetic genre column (artist-style comma-separated genre lists drawn
+from a fixed vocabulary, with some missing values), checks both labelers agree,
+and reports rows/sec for each.
+
+Usage:
+    python benchmarks/bench_labels.py --rows 10000000 --apply-rows 200000
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from popmusic.labels import POP_KEYWORD_PATTERNS, label_pop  # noqa: E402
+
+GENRE_VOCAB = [
+    'pop', 'dance pop', 'electropop', 'synth-pop', 'teen pop', 'pop rock', 'pop rap', 'latin pop',
+    'indie pop', 'k-pop', 'j-pop', 'c-pop', 'bedroom pop', 'art pop', 'rock', 'classic rock',
+    'alternative rock', 'hard rock', 'metal', 'hip hop', 'rap', 'trap', 'country', 'honky tonk',
+    'jazz', 'bebop', 'blues', 'soul', 'r&b', 'edm', 'house', 'techno', 'reggaeton', 'salsa',
+    'classical', 'folk', 'indie folk', 'punk', 'pop punk', 'lo-fi', 'ambient', 'popping', 'k-rap',
+]
+
+
+def synthetic_genres(rows, n_artists=50_000, seed=42):
+    """Genre column with the repetition of a real catalogue: each artist has one genre list"""
+    rng = np.random.default_rng(seed)
+    artist_genres = []
+    for _ in range(n_artists):
+        k = rng.integers(0, 5)
+        artist_genres.append(', '.join(rng.choice(GENRE_VOCAB, size=k, replace=False)) if k else None)
+    artist_of_row = rng.zipf(1.3, size=rows) % n_artists
+    return pd.Series(np.asarray(artist_genres, dtype=object)[artist_of_row], name='genre')
+
+
+def is_pop_track(row):
+    """The notebook's original per-row labeler"""
+    text = f"{row.get('genre', '')}".lower()
+    return int(any(re.search(pat, text) for pat in POP_KEYWORD_PATTERNS))
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pop labeling")
+    parser.add_argument('--rows', type=int, default=2_000_000)
+    parser.add_argument('--apply-rows', type=int, default=200_000,
+                        help="rows for the (slow) row-wise apply; its rate is measured on this subset")
+    args = parser.parse_args()
+
+    genres = synthetic_genres(args.rows)
+    subset = genres.iloc[:args.apply_rows].to_frame()
+
+    expected, apply_seconds = timed(lambda: subset.apply(is_pop_track, axis=1).to_numpy())
+    got = label_pop(subset['genre'])
+    if not np.array_equal(expected, got):
+        raise SystemExit(f"Label mismatch on {int((expected != got).sum())} rows")
+
+    labels, vector_seconds = timed(lambda: label_pop(genres))
+
+    apply_rate = len(subset) / apply_seconds
+    vector_rate = len(genres) / vector_seconds
+    print(f"Rows: {len(genres):,} (apply measured on {len(subset):,}), "
+          f"{genres.nunique():,} distinct genre strings, pop rate {labels.mean():.3f}")
+    print(f"{'row-wise apply':<18}{apply_rate:>14,.0f} rows/s")
+    print(f"{'label_pop':<18}{vector_rate:>14,.0f} rows/s   ({vector_seconds:.2f} s, {vector_rate / apply_rate:,.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
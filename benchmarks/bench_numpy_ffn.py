@@ -0,0 +1,85 @@
+"""
+Keras vs NumPy FFN inference: cold start and batch throughput
+
+Cold start is measured in a fresh interpreter per backend: import, load the
+model through popmusic.models.load_predictor and score one row. Throughput is
+measured in-process on random float32 batches, after checking both backends
+agree within --atol.
+
+Usage:
+    python -m popmusic.numpy_ffn models/pop_ffn.keras models/pop_ffn.npz
+    python benchmarks/bench_numpy_ffn.py --keras models/pop_ffn.keras --npz models/pop_ffn.npz
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from popmusic.models import load_predictor  # noqa: E402
+from popmusic.numpy_ffn import NumpyFFN  # noqa: E402
+
+COLD_START = """
+import time
+start = time.perf_counter()
+import numpy as np
+from popmusic.models import load_predictor
+predict = load_predictor({path!r})
+predict(np.zeros((1, {n_features}), dtype=np.float32))
+print(time.perf_counter() - start)
+"""
+
+
+def cold_start_seconds(path, n_features, repeats):
+    times = []
+    for _ in range(repeats):
+        out = subprocess.run([sys.executable, '-c', COLD_START.format(path=os.path.abspath(path), n_features=n_features)],
+                             cwd=ROOT, capture_output=True, text=True, check=True)
+        times.append(float(out.stdout.strip().splitlines()[-1]))
+    return min(times)
+
+
+def rows_per_second(predict, X, repeats):
+    predict(X[:1024])
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        predict(X)
+        best = min(best, time.perf_counter() - start)
+    return len(X) / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Keras vs NumPy FFN inference")
+    parser.add_argument('--keras', default='models/pop_ffn.keras')
+    parser.add_argument('--npz', default='models/pop_ffn.npz')
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--atol', type=float, default=1e-5)
+    args = parser.parse_args()
+
+    n_features = NumpyFFN.load(args.npz).n_features
+    X = np.random.default_rng(0).standard_normal((args.rows, n_features)).astype(np.float32)
+
+    keras_predict = load_predictor(args.keras)
+    numpy_predict = load_predictor(args.npz)
+    diff = np.abs(keras_predict(X[:50_000]) - numpy_predict(X[:50_000])).max()
+    if diff > args.atol:
+        raise SystemExit(f"Backends disagree: max diff {diff:.2e} > {args.atol:g}")
+
+    print(f"Rows: {args.rows:,} x {n_features} features, max |keras - numpy| {diff:.2e}")
+    print(f"{'backend':<10}{'cold start':>14}{'rows/s':>16}")
+    for name, path, predict in [('keras', args.keras, keras_predict), ('numpy', args.npz, numpy_predict)]:
+        cold = cold_start_seconds(path, n_features, args.repeats)
+        rate = rows_per_second(predict, X, args.repeats)
+        print(f"{name:<10}{cold * 1000:>11,.0f} ms{rate:>16,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+"""
+End-to-end pipeline benchmark on synthetic data: time and peak RSS per stage
+
+For each dataset size, a fresh process generates synthetic tracks
+(benchmarks/synthetic_data.py) and runs the pipeline stage by stage:
+
+    generate            synthetic tracks (schema of spotify_final_with_behavior.csv)
+    derived             data/create_derived_features.create_derived_features
+    label               popmusic.data.add_target (pop labels)
+    split               popmusic.data.split_indices
+    feature_fit         FeaturePipeline.fit on the training rows
+    feature_transform   FeaturePipeline.transform on every row
+    train_epoch         --epochs epochs of the --arch FFN on the training rows
+    score               popmusic.score.score_file over a Parquet catalogue of every row,
+                        with the trained model exported to .npz (setup not timed)
+
+Each stage records wall-clock seconds, rows/s, and peak RSS during the stage.
+Peak RSS is reset before every stage through /proc/self/clear_refs (Linux);
+elsewhere it falls back to the process-lifetime peak, and peak_rss_scope
+says which one was used. Running each size in its own process keeps one
+size's allocations out of the next size's numbers.
+
+The results are written as JSON: machine details, library versions, git
+commit and one record per (rows, stage). With --baseline, every stage is
+compared against an earlier results file. Stages slower, or with a higher
+peak RSS, by more than --tolerance are listed, and the exit status is 1.
+
+Usage:
+    python benchmarks/bench_pipeline.py --rows 40k 400k 4m
+    python benchmarks/bench_pipeline.py --rows 40m --until feature_transform
+    python benchmarks/bench_pipeline.py --rows 400k --baseline benchmarks/results/pipeline-20261001-120000.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..'))
+
+from popmusic.data import DATA_DIR  # noqa: E402
+from synthetic_data import SEED, generate, parse_rows  # noqa: E402
+
+STAGES = ['generate', 'derived', 'label', 'split', 'feature_fit', 'feature_transform', 'train_epoch', 'score']
+RESULTS_DIR = os.path.join(BENCH_DIR, 'results')
+LIBRARIES = ['numpy', 'pandas', 'scikit-learn', 'scipy', 'pyarrow', 'tensorflow']
+
+
+def _status_mb(field):
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith(f'{field}:'):
+                return int(line.split()[1]) / 1024
+    raise OSError(f"{field} not in /proc/self/status")
+
+
+def reset_peak_rss():
+    """Reset the kernel's peak-RSS counter (VmHWM); False where that isn't possible"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def current_rss_mb():
+    try:
+        return _status_mb('VmRSS')
+    except OSError:
+        return float('nan')
+
+
+def peak_rss_mb():
+    try:
+        return _status_mb('VmHWM')
+    except OSError:
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def measure(records, stage, rows, fn):
+    """Run fn() as one stage, appending its record; returns fn's result"""
+    scope = 'stage' if reset_peak_rss() else 'process'
+    before = current_rss_mb()
+    start = time.perf_counter()
+    result = fn()
+    seconds = time.perf_counter() - start
+    records.append({
+        'stage': stage,
+        'rows': rows,
+        'seconds': seconds,
+        'rows_per_second': rows / seconds if seconds else None,
+        'rss_before_mb': before,
+        'rss_after_mb': current_rss_mb(),
+        'peak_rss_mb': peak_rss_mb(),
+        'peak_rss_scope': scope,
+    })
+    print(f"  {stage:<18}{seconds:>9.2f} s{records[-1]['peak_rss_mb']:>10,.0f} MB peak", file=sys.stderr)
+    return result
+
+
+def derived_features(df):
+    if DATA_DIR not in sys.path:
+        sys.path.insert(0, DATA_DIR)
+    from create_derived_features import create_derived_features
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        return create_derived_features(df)
+
+
+def train_epochs(name, X, y, epochs):
+    from popmusic.models import TRAIN_BATCH_SIZE, build_model, class_weights
+    from popmusic.tfdata import epoch_timer
+
+    timer = epoch_timer()
+    model = build_model(name, X.shape[1])
+    model.fit(X, y, epochs=epochs, batch_size=TRAIN_BATCH_SIZE, class_weight=class_weights(y),
+              callbacks=[timer], verbose=0)
+    return model, timer.times
+
+
+def run_size(rows, until, arch, epochs, seed, tmp_dir=None):
+    """Records for every stage up to `until` on `rows` synthetic tracks (runs in the worker process)"""
+    from popmusic.data import TARGET_COLUMN, add_target, split_indices
+    from popmusic.pipeline import FeaturePipeline
+
+    stages = STAGES[:STAGES.index(until) + 1]
+    records = []
+    df = measure(records, 'generate', rows, lambda: generate(rows, seed))
+    if 'derived' in stages:
+        df = measure(records, 'derived', rows, lambda: derived_features(df))
+    if 'label' in stages:
+        df = measure(records, 'label', rows, lambda: add_target(df))
+        records[-1]['pop_rate'] = float(df[TARGET_COLUMN].mean())
+    if 'split' in stages:
+        y = df[TARGET_COLUMN].astype(int).to_numpy()
+        idx_train, _, _ = measure(records, 'split', rows, lambda: split_indices(y))
+    if 'feature_fit' in stages:
+        train_df = df.iloc[idx_train]
+        pipeline = measure(records, 'feature_fit', len(idx_train), lambda: FeaturePipeline().fit(train_df))
+        del train_df
+    if 'feature_transform' in stages:
+        X = measure(records, 'feature_transform', rows, lambda: pipeline.transform(df))
+        records[-1]['n_features'] = int(X.shape[1])
+    if 'train_epoch' in stages:
+        X_train, y_train = X[idx_train], y[idx_train]
+        model, times = measure(records, 'train_epoch', len(idx_train),
+                               lambda: train_epochs(arch, X_train, y_train, epochs))
+        records[-1].update(arch=arch, epochs=epochs, epoch_seconds=times)
+        del X_train, y_train
+    if 'score' in stages:
+        from popmusic.numpy_ffn import export_numpy
+        from popmusic.score import ID_COLUMN, score_file
+
+        del X
+        with tempfile.TemporaryDirectory(dir=tmp_dir) as tmp:
+            catalogue = os.path.join(tmp, 'catalogue.parquet')
+            df[[ID_COLUMN] + [col for col in pipeline.input_columns if col != ID_COLUMN]].to_parquet(catalogue)
+            predict = export_numpy(model, os.path.join(tmp, 'model.npz')).predict
+            del df
+            measure(records, 'score', rows,
+                    lambda: score_file(pipeline, predict, catalogue, os.path.join(tmp, 'scores.parquet'),
+                                       report_every=sys.maxsize))
+    return records
+
+
+def library_versions():
+    from importlib import metadata
+
+    versions = {}
+    for name in LIBRARIES:
+        try:
+            versions[name] = metadata.version(name)
+        except metadata.PackageNotFoundError:
+            versions[name] = None
+    return versions
+
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=BENCH_DIR, capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    try:
+        memory_gb = os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES') / 1024 ** 3
+    except (ValueError, OSError, AttributeError):
+        memory_gb = None
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'git_commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'memory_gb': memory_gb,
+        'libraries': library_versions(),
+    }
+
+
+def run_worker(rows, args):
+    """Run one size in a child process; its records, or one error record if it died (e.g. out of memory)"""
+    command = [sys.executable, os.path.abspath(__file__), '--worker', '--rows', str(rows), '--until', args.until,
+               '--arch', args.arch, '--epochs', str(args.epochs), '--seed', str(args.seed)]
+    if args.tmp_dir:
+        command += ['--tmp-dir', args.tmp_dir]
+    print(f"\n🚀 {rows:,} rows", file=sys.stderr)
+    child = subprocess.run(command, stdout=subprocess.PIPE, text=True)
+    if child.returncode:
+        print(f"⚠️  {rows:,} rows: worker exited with status {child.returncode}", file=sys.stderr)
+        return [{'stage': None, 'rows': rows, 'error': f'exit status {child.returncode}'}]
+    return json.loads(child.stdout.strip().splitlines()[-1])
+
+
+def compare(results, baseline, tolerance):
+    """(rows, stage, metric, baseline, current, ratio) for every metric worse than baseline by > tolerance"""
+    previous = {(r['rows'], r['stage']): r for r in baseline['results'] if r.get('stage')}
+    regressions = []
+    for record in results:
+        old = previous.get((record['rows'], record.get('stage')))
+        if old is None:
+            continue
+        for metric in ('seconds', 'peak_rss_mb'):
+            if old.get(metric) and record.get(metric) and record[metric] > old[metric] * (1 + tolerance):
+                regressions.append((record['rows'], record['stage'], metric, old[metric], record[metric],
+                                    record[metric] / old[metric]))
+    return regressions
+
+
+def print_results(results):
+    print(f"\n{'Rows':>12}  {'Stage':<18}{'Seconds':>10}{'Rows/s':>14}{'Peak RSS MB':>13}")
+    for r in results:
+        if r.get('error'):
+            print(f"{r['rows']:>12,}  {'-':<18}{r['error']}")
+            continue
+        rate = f"{r['rows_per_second']:,.0f}" if r['rows_per_second'] else '-'
+        print(f"{r['rows']:>12,}  {r['stage']:<18}{r['seconds']:>10.2f}{rate:>14}{r['peak_rss_mb']:>13,.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline stages on synthetic data")
+    parser.add_argument('--rows', nargs='+', default=['40k', '400k'],
+                        help="dataset sizes: 40k, 400k, 4m, 40m or integers (each runs in its own process)")
+    parser.add_argument('--until', choices=STAGES, default=STAGES[-1], help="last stage to run")
+    parser.add_argument('--arch', default='medium', help="FFN architecture for train_epoch")
+    parser.add_argument('--epochs', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=SEED)
+    parser.add_argument('--tmp-dir', help="directory for the score stage's catalogue (default: system temp)")
+    parser.add_argument('--output', help="results JSON (default: benchmarks/results/pipeline-<timestamp>.json)")
+    parser.add_argument('--baseline', help="earlier results JSON to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="allowed slowdown / RSS growth vs baseline")
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    sizes = [parse_rows(value) for value in args.rows]
+    if args.worker:
+        print(json.dumps(run_size(sizes[0], args.until, args.arch, args.epochs, args.seed, args.tmp_dir)))
+        return
+
+    results = [record for rows in sizes for record in run_worker(rows, args)]
+    report = {
+        'benchmark': 'pipeline',
+        'environment': environment(),
+        'config': {'rows': sizes, 'until': args.until, 'arch': args.arch, 'epochs': args.epochs, 'seed': args.seed},
+        'results': results,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"pipeline-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print_results(results)
+    print(f"\n💾 Results saved to {output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print(f"\n⚠️  {len(regressions)} regression(s) beyond {args.tolerance:.0%} vs {args.baseline}:")
+            for rows, stage, metric, old, new, ratio in regressions:
+                print(f"  {rows:>12,}  {stage:<18}{metric:<12}{old:>10.2f} -> {new:>10.2f}  ({ratio:.2f}x)")
+            sys.exit(1)
+        print(f"✅ No regressions beyond {args.tolerance:.0%} vs {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Per-epoch training time: NumPy arrays vs tf.data input modes
+
+Trains the same architecture for a fixed number of epochs (no early stopping)
+on a synthetic, class-imbalanced float32 matrix with each input mode:
+
+    numpy           model.fit(X, y, batch_size=256, class_weight=...)  (current path)
+    tfdata          make_dataset over in-memory arrays, sample weights, prefetch
+    tfdata-cache    same, batches cached in memory after the first epoch
+    tfdata-memmap   make_dataset over X.npy / y.npy / w.npy opened with mmap_mode='r'
+
+and reports the first-epoch and median later-epoch wall-clock seconds.
+
+Usage:
+    python benchmarks/bench_tfdata.py --rows 2000000 --features 40 --epochs 5 --arch medium
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from popmusic.models import ARCHITECTURES, TRAIN_BATCH_SIZE, build_model, class_weights  # noqa: E402
+from popmusic.tfdata import epoch_timer, make_dataset, open_memmap, sample_weights, save_memmap  # noqa: E402
+
+MODES = ['numpy', 'tfdata', 'tfdata-cache', 'tfdata-memmap']
+
+
+def synthetic(rows, features, pos_rate=0.2, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.standard_normal((rows, features), dtype=np.float32)
+    logits = X[:, :5].sum(axis=1) + np.log(pos_rate / (1 - pos_rate))
+    y = (rng.random(rows) < 1 / (1 + np.exp(-logits))).astype(np.int64)
+    return X, y
+
+
+def run_mode(mode, arch, X, y, epochs, tmpdir):
+    weights_by_class = class_weights(y)
+    timer = epoch_timer()
+    model = build_model(arch, X.shape[1])
+    if mode == 'numpy':
+        model.fit(X, y, batch_size=TRAIN_BATCH_SIZE, epochs=epochs, class_weight=weights_by_class,
+                  verbose=0, callbacks=[timer])
+        return timer.times
+
+    weights = sample_weights(y, weights_by_class)
+    if mode == 'tfdata-memmap':
+        X, y, weights = open_memmap(save_memmap(os.path.join(tmpdir, 'memmap'), X, y, weights))
+    ds = make_dataset(X, y, weights, batch_size=TRAIN_BATCH_SIZE, cache=mode == 'tfdata-cache')
+    model.fit(ds, epochs=epochs, verbose=0, callbacks=[timer])
+    return timer.times
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark tf.data input modes against NumPy fit")
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--features', type=int, default=40)
+    parser.add_argument('--epochs', type=int, default=4)
+    parser.add_argument('--arch', default='medium', choices=list(ARCHITECTURES))
+    parser.add_argument('--modes', nargs='+', default=MODES, choices=MODES)
+    args = parser.parse_args()
+
+    X, y = synthetic(args.rows, args.features)
+    print(f"Rows: {args.rows:,} x {args.features} features, positive rate {y.mean():.3f}, "
+          f"{args.arch}, {args.epochs} epochs")
+    print(f"{'mode':<16}{'epoch 1 s':>11}{'median s':>10}{'rows/s':>14}")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        baseline = None
+        for mode in args.modes:
+            times = run_mode(mode, args.arch, X, y, args.epochs, tmpdir)
+            steady = float(np.median(times[1:] if len(times) > 1 else times))
+            baseline = baseline or steady
+            print(f"{mode:<16}{times[0]:>11.2f}{steady:>10.2f}{args.rows / steady:>14,.0f}"
+                  f"   ({baseline / steady:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
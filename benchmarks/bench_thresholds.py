@@ -0,0 +1,85 @@
+"""
+Threshold tuning benchmark: notebook grid vs popmusic.thresholds
+
+On synthetic scores for --rows predictions (with decade and time-of-day
+segments) it times:
+
+    grid            17 thresholds x precision_recall_fscore_support (notebook cell 20)
+    exact           optimize_threshold over every distinct cut
+    exact + CI      the same with --boot bootstrap replicates
+    per segment     tune_by_segment over decade x time_of_day
+
+and checks that the exact optimum is at least as good as the grid's.
+
+Usage:
+    python benchmarks/bench_thresholds.py --rows 5000000 --boot 1000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from popmusic.thresholds import optimize_threshold, tune_by_segment  # noqa: E402
+
+TIMES_OF_DAY = np.array(['morning', 'afternoon', 'evening', 'night'], dtype=object)
+
+
+def synthetic(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    y = (rng.random(rows) < 0.3).astype(np.int8)
+    scores = np.clip(rng.normal(0.35 + 0.3 * y, 0.2), 0, 1).astype(np.float32)
+    decade = rng.choice(np.arange(1960, 2030, 10), size=rows)
+    time_of_day = TIMES_OF_DAY[rng.integers(0, len(TIMES_OF_DAY), size=rows)]
+    return y, scores, decade, time_of_day
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def grid_search(y, scores):
+    from sklearn.metrics import precision_recall_fscore_support
+
+    best = (-1.0, 0.5)
+    for thr in np.linspace(0.1, 0.9, 17):
+        _, _, f1, _ = precision_recall_fscore_support(y, (scores >= thr).astype(int), average='binary',
+                                                      zero_division=0)
+        best = max(best, (f1, thr))
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark threshold optimization")
+    parser.add_argument('--rows', type=int, default=2_000_000)
+    parser.add_argument('--boot', type=int, default=1000)
+    args = parser.parse_args()
+
+    y, scores, decade, time_of_day = synthetic(args.rows)
+    segments = [f'{d}s {t}' for d, t in zip(decade, time_of_day)]
+
+    (grid_f1, grid_thr), grid_s = timed(lambda: grid_search(y, scores))
+    exact, exact_s = timed(lambda: optimize_threshold(y, scores))
+    with_ci, ci_s = timed(lambda: optimize_threshold(y, scores, n_boot=args.boot))
+    per_segment, seg_s = timed(lambda: tune_by_segment(y, scores, segments))
+
+    if exact['f1'] + 1e-12 < grid_f1:
+        raise SystemExit(f"Exact F1 {exact['f1']:.6f} below grid F1 {grid_f1:.6f}")
+
+    print(f"Rows: {args.rows:,}, {exact['n_cuts']:,} distinct cuts, {len(per_segment)} segments")
+    print(f"{'grid (17 pts)':<22}{grid_s:>9.2f} s   thr {grid_thr:.4f}  F1 {grid_f1:.5f}")
+    print(f"{'exact':<22}{exact_s:>9.2f} s   thr {exact['threshold']:.4f}  F1 {exact['f1']:.5f}")
+    lo, hi = with_ci['ci']['f1']
+    print(f"{f'exact + {args.boot} boot':<22}{ci_s:>9.2f} s   F1 95% CI {lo:.5f}-{hi:.5f}")
+    print(f"{'per segment':<22}{seg_s:>9.2f} s   thresholds {per_segment['threshold'].min():.4f}"
+          f"-{per_segment['threshold'].max():.4f}")
+
+
+if __name__ == "__main__":
+    main()
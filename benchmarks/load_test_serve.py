@@ -0,0 +1,193 @@
+"""
+Load test for popmusic.serve: unbatched vs micro-batched scoring
+
+For each server configuration (--configs, as MAX_BATCH:MAX_WAIT_MS) this
+starts `python -m popmusic.serve` in a subprocess on a free port, then runs
+--clients threads that each keep one connection open and POST single tracks
+back to back for --seconds. It reports client-side throughput and p50/p99
+latency next to the server's /metrics (mean rows per model call). The first
+configuration, 1:0, scores every request on its own and is the baseline.
+
+Tracks are sampled from --data (the notebook's dataset by default).
+
+Usage:
+    python benchmarks/load_test_serve.py --pipeline models/feature_pipeline.joblib \\
+        --model models/pop_ffn.keras --clients 32 --seconds 15 --configs 1:0 64:2 256:5
+"""
+
+import argparse
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+DEFAULT_DATA = os.path.join(ROOT, 'data', 'spotify_final_with_behavior.csv')
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def get_json(url, timeout=5.0):
+    with urllib.request.urlopen(url, timeout=timeout) as resp:
+        return json.loads(resp.read())
+
+
+def start_server(args, max_batch, max_wait_ms):
+    """Launch the scoring server and wait for /health; returns (process, base_url, health)"""
+    port = free_port()
+    cmd = [sys.executable, '-m', 'popmusic.serve', '--pipeline', os.path.abspath(args.pipeline),
+           '--model', os.path.abspath(args.model),
+           '--port', str(port), '--max-batch', str(max_batch), '--max-wait-ms', str(max_wait_ms)]
+    proc = subprocess.Popen(cmd, cwd=ROOT, stdout=subprocess.DEVNULL)
+    base_url = f'http://127.0.0.1:{port}'
+    deadline = time.time() + args.startup_timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise SystemExit(f"Server exited with status {proc.returncode}: {' '.join(cmd)}")
+        try:
+            return proc, base_url, get_json(f'{base_url}/health', timeout=1.0)
+        except OSError:
+            time.sleep(0.2)
+    proc.kill()
+    raise SystemExit(f"Server did not become healthy within {args.startup_timeout:.0f} s")
+
+
+def sample_bodies(path, columns, n, seed=42):
+    """n single-track JSON bodies drawn from the dataset"""
+    frame = pd.read_csv(path, usecols=lambda col: col in columns)
+    frame = frame.sample(n=min(n, len(frame)), random_state=seed)
+    records = json.loads(frame.to_json(orient='records'))
+    return [json.dumps(record).encode('utf-8') for record in records]
+
+
+def client(port, bodies, offset, stop_at, latencies, failures):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    headers = {'Content-Type': 'application/json'}
+    i = offset
+    while time.perf_counter() < stop_at:
+        body = bodies[i % len(bodies)]
+        i += 1
+        start = time.perf_counter()
+        try:
+            conn.request('POST', '/predict', body, headers)
+            resp = conn.getresponse()
+            resp.read()
+        except (OSError, http.client.HTTPException):
+            failures.append(1)
+            conn.close()
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+            continue
+        if resp.status != 200:
+            failures.append(resp.status)
+            continue
+        latencies.append((time.perf_counter() - start) * 1000.0)
+    conn.close()
+
+
+def run_config(args, bodies_for, max_batch, max_wait_ms):
+    proc, base_url, health = start_server(args, max_batch, max_wait_ms)
+    try:
+        bodies = bodies_for(health['input_columns'])
+        port = int(base_url.rsplit(':', 1)[1])
+
+        # Warm-up: first model calls build graphs / allocate
+        warm_stop = time.perf_counter() + args.warmup
+        threads = [threading.Thread(target=client, args=(port, bodies, i, warm_stop, [], []))
+                   for i in range(min(args.clients, 4))]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        before = get_json(f'{base_url}/metrics')
+
+        latencies, failures = [], []
+        start = time.perf_counter()
+        stop_at = start + args.seconds
+        threads = [threading.Thread(target=client, args=(port, bodies, i * 997, stop_at, latencies, failures))
+                   for i in range(args.clients)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - start
+        after = get_json(f'{base_url}/metrics')
+    finally:
+        proc.terminate()
+        proc.wait()
+
+    batches = after['batches'] - before['batches']
+    rows = after['rows'] - before['rows']
+    lat = np.asarray(latencies) if latencies else np.zeros(1)
+    return {
+        'max_batch': max_batch,
+        'max_wait_ms': max_wait_ms,
+        'clients': args.clients,
+        'requests': len(latencies),
+        'failures': len(failures),
+        'requests_per_s': len(latencies) / elapsed,
+        'p50_ms': float(np.percentile(lat, 50)),
+        'p99_ms': float(np.percentile(lat, 99)),
+        'mean_batch_rows': rows / batches if batches else 0.0,
+    }
+
+
+def parse_config(value):
+    max_batch, _, max_wait_ms = value.partition(':')
+    return int(max_batch), float(max_wait_ms or 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the micro-batching scoring server")
+    parser.add_argument('--pipeline', default='models/feature_pipeline.joblib')
+    parser.add_argument('--model', default='models/pop_ffn.keras')
+    parser.add_argument('--data', default=DEFAULT_DATA, help="CSV the request bodies are sampled from")
+    parser.add_argument('--configs', nargs='+', default=['1:0', '64:2', '256:5'], help="MAX_BATCH:MAX_WAIT_MS")
+    parser.add_argument('--clients', type=int, default=32)
+    parser.add_argument('--seconds', type=float, default=15.0)
+    parser.add_argument('--warmup', type=float, default=3.0)
+    parser.add_argument('--samples', type=int, default=5000, help="distinct tracks to send")
+    parser.add_argument('--startup-timeout', type=float, default=120.0)
+    parser.add_argument('--json', help="also write the results to this file")
+    args = parser.parse_args()
+
+    cache = {}
+
+    def bodies_for(columns):
+        key = tuple(columns)
+        if key not in cache:
+            cache[key] = sample_bodies(args.data, set(columns) | {'song_spotify_id'}, args.samples)
+        return cache[key]
+
+    results = []
+    for value in args.configs:
+        max_batch, max_wait_ms = parse_config(value)
+        print(f"▶ max_batch={max_batch} max_wait_ms={max_wait_ms:g}, {args.clients} clients, {args.seconds:g} s")
+        results.append(run_config(args, bodies_for, max_batch, max_wait_ms))
+
+    baseline = results[0]['requests_per_s'] or 1e-9
+    print(f"\n{'config':<14}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'rows/call':>11}{'failed':>8}{'speedup':>9}")
+    for r in results:
+        label = f"{r['max_batch']}:{r['max_wait_ms']:g}"
+        print(f"{label:<14}{r['requests_per_s']:>10,.0f}{r['p50_ms']:>10.2f}{r['p99_ms']:>10.2f}"
+              f"{r['mean_batch_rows']:>11.1f}{r['failures']:>8}{r['requests_per_s'] / baseline:>8.1f}x")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nSaved results to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Synthetic tracks with the schema of spotify_final_with_behavior.csv, at any size
+
+Rows are drawn from a synthetic catalogue, so values repeat the way they do
+in real data. Artists carry a comma-separated genre list, 0-4 genres, ~6%
+missing. About 16% of tracks come from pop artists (popmusic.labels finds
+their pop genres). Albums carry an artist, a release date and an
+explicitness rate. Tracks pick albums Zipf-style. The track-level columns
+then follow the dataset's shape, with a modest pop signal:
+
+    spotify_popularity      0-100, higher for pop and recent releases
+    album_release_year/date skewed towards recent years, pop more so
+    tempo_bpm_synth         ~N(120, 28) clipped to 55-210
+    time_of_day_synth       morning / afternoon / evening / night
+    is_explicit             ~25%, lower for pop
+    danceability, energy,   Beta-distributed in [0, 1], ~2% missing
+    valence, acousticness
+    position, skipped_synth chart position 1-100, skip flag
+
+Generation is vectorized and chunked. A chunk depends only on the seed,
+the dataset size and its offset, so the same arguments always give the same
+rows, and 40M rows can be written without holding them in memory.
+
+    from synthetic_data import generate
+    df = generate(400_000)
+
+    python benchmarks/synthetic_data.py --rows 4m --output data/synthetic_4m.parquet
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+SEED = 42
+SIZES = {'40k': 40_000, '400k': 400_000, '4m': 4_000_000, '40m': 40_000_000}
+CHUNK_ROWS = 1_000_000
+
+POP_GENRES = ['pop', 'dance pop', 'electropop', 'synthpop', 'teen pop', 'pop rock', 'pop rap', 'latin pop',
+              'indie pop', 'k-pop', 'bedroom pop', 'art pop', 'pop punk']
+OTHER_GENRES = ['rock', 'classic rock', 'alternative rock', 'modern rock', 'hard rock', 'metal', 'hip hop', 'rap',
+                'trap', 'drill', 'country', 'contemporary country', 'jazz', 'blues', 'soul', 'r&b',
+                'alternative r&b', 'edm', 'house', 'techno', 'dubstep', 'reggaeton', 'salsa', 'afrobeats',
+                'classical', 'folk', 'indie folk', 'bluegrass', 'punk', 'emo', 'grunge', 'gospel', 'lo-fi',
+                'ambient', 'k-rap', 'popping']
+POP_ARTIST_RATE = 0.16
+MISSING_GENRE_RATE = 0.06
+MISSING_AUDIO_RATE = 0.02
+TIMES_OF_DAY = np.array(['morning', 'afternoon', 'evening', 'night'], dtype=object)
+TIME_OF_DAY_P = [0.22, 0.31, 0.29, 0.18]
+
+
+def parse_rows(value):
+    """Row count from '40k', '4M', '40m' or a plain integer"""
+    value = str(value).lower().replace('_', '').replace(',', '')
+    if value in SIZES:
+        return SIZES[value]
+    for suffix, scale in (('k', 1_000), ('m', 1_000_000)):
+        if value.endswith(suffix):
+            return int(float(value[:-1]) * scale)
+    return int(value)
+
+
+def catalogue(rows, seed=SEED):
+    """Artists (genre list, pop flag) and albums (artist, year, date, explicit rate) for a dataset of `rows`"""
+    rng = np.random.default_rng([seed, 0])
+    n_artists = int(np.clip(rows // 10, 1_000, 2_000_000))
+    n_albums = 3 * n_artists
+
+    artist_pop = rng.random(n_artists) < POP_ARTIST_RATE
+    # Distinct tags per artist: the first n of a random permutation of each vocabulary
+    pop_tags = np.argsort(rng.random((n_artists, len(POP_GENRES)), dtype=np.float32), axis=1)[:, :2]
+    other_tags = np.argsort(rng.random((n_artists, len(OTHER_GENRES)), dtype=np.float32), axis=1)[:, :3]
+    n_pop = np.where(artist_pop, rng.integers(1, 3, n_artists), 0)
+    n_other = rng.integers(0, 3, n_artists) + (~artist_pop)
+    genres = np.array([', '.join([POP_GENRES[t] for t in p[:k]] + [OTHER_GENRES[t] for t in o[:m]])
+                       for p, k, o, m in zip(pop_tags.tolist(), n_pop.tolist(), other_tags.tolist(),
+                                             n_other.tolist())], dtype=object)
+    genres[rng.random(n_artists) < MISSING_GENRE_RATE] = None
+
+    album_artist = rng.integers(0, n_artists, n_albums)
+    pop = artist_pop[album_artist]
+    age = np.floor(rng.gamma(1.3, np.where(pop, 6.0, 9.0))).astype(np.int64)
+    year = np.clip(2025 - age, 1950, 2025)
+    days = (year - 1970).astype('datetime64[Y]').astype('datetime64[D]') + rng.integers(0, 365, n_albums)
+    days = np.minimum(days, np.datetime64('2025-12-31'))
+    return {
+        'artist_pop': artist_pop,
+        'artist_genre': genres,
+        'album_artist': album_artist,
+        'album_year': year,
+        'album_date': days.astype(str).astype(object),
+        'album_explicit': np.clip(rng.beta(1.2, 3.5, n_albums) - 0.1 * pop, 0, 1),
+    }
+
+
+def _beta(rng, a, b, size):
+    return np.round(rng.beta(a, b, size), 3)
+
+
+def generate(rows, seed=SEED, start=0, tables=None):
+    """DataFrame of `rows` synthetic tracks, rows start..start+rows of the dataset for (seed, tables)"""
+    tables = tables if tables is not None else catalogue(rows, seed)
+    rng = np.random.default_rng([seed, 1, start])
+    n_albums = len(tables['album_artist'])
+    album = (rng.zipf(1.25, rows) - 1) % n_albums
+    album = (album * 2_654_435_761 + 97) % n_albums  # spread the popular albums over artists
+    artist = tables['album_artist'][album]
+    pop = tables['artist_pop'][artist]
+    year = tables['album_year'][album]
+    recent = year >= 2020
+
+    popularity = np.clip(np.round(rng.normal(38 + 9 * pop + 6 * recent, 18)), 0, 100).astype(np.int64)
+    df = pd.DataFrame({
+        'song_spotify_id': np.char.add('syn', np.char.zfill(np.arange(start, start + rows).astype(str), 19)),
+        'position': rng.integers(1, 101, rows),
+        'spotify_popularity': popularity,
+        'album_release_date': tables['album_date'][album],
+        'album_release_year': year,
+        'is_explicit': rng.random(rows) < tables['album_explicit'][album],
+        'tempo_bpm_synth': np.round(np.clip(rng.normal(120 + 4 * pop, 28), 55, 210), 3),
+        'time_of_day_synth': TIMES_OF_DAY[rng.choice(len(TIMES_OF_DAY), rows, p=TIME_OF_DAY_P)],
+        'skipped_synth': rng.random(rows) < 1 / (1 + np.exp((popularity - 40) / 15)),
+        'danceability': _beta(rng, 5 + 1.5 * pop, 3, rows),
+        'energy': _beta(rng, 4 + pop, 3, rows),
+        'valence': _beta(rng, 3 + 0.5 * pop, 3, rows),
+        'acousticness': _beta(rng, 0.8, 3 + 1.5 * pop, rows),
+        'genre': tables['artist_genre'][artist],
+    })
+    for column in ('danceability', 'energy', 'valence', 'acousticness'):
+        df.loc[rng.random(rows) < MISSING_AUDIO_RATE, column] = np.nan
+    return df
+
+
+def iter_chunks(rows, chunk_rows=CHUNK_ROWS, seed=SEED):
+    """The dataset of `rows` tracks as DataFrames of at most chunk_rows rows"""
+    tables = catalogue(rows, seed)
+    for start in range(0, rows, chunk_rows):
+        yield generate(min(chunk_rows, rows - start), seed, start, tables)
+
+
+def write_dataset(path, rows, chunk_rows=CHUNK_ROWS, seed=SEED):
+    """Write the dataset to a CSV or Parquet file chunk by chunk; returns path"""
+    parquet = path.endswith('.parquet') or path.endswith('.pq')
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    writer = None
+    tmp_path = f'{path}.tmp'
+    try:
+        for i, chunk in enumerate(iter_chunks(rows, chunk_rows, seed)):
+            if parquet:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(tmp_path, table.schema)
+                writer.write_table(table)
+            else:
+                chunk.to_csv(tmp_path, mode='w' if i == 0 else 'a', header=i == 0, index=False)
+    finally:
+        if writer is not None:
+            writer.close()
+    os.replace(tmp_path, path)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic spotify_final_with_behavior dataset")
+    parser.add_argument('--rows', default='40k', help="row count: 40k, 400k, 4m, 40m or any integer")
+    parser.add_argument('--output', required=True, help="CSV or Parquet path")
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS)
+    parser.add_argument('--seed', type=int, default=SEED)
+    args = parser.parse_args()
+
+    rows = parse_rows(args.rows)
+    start = time.perf_counter()
+    write_dataset(args.output, rows, args.chunk_rows, args.seed)
+    print(f"✅ Wrote {rows:,} synthetic tracks in {time.perf_counter() - start:.1f} s -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
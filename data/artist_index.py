@@ -0,0 +1,80 @@
+"""
+Persistent artist -> genres index for fetch_spotify_tracks_and_tags.py
+
+Artist genres change rarely and the same artists recur across the whole
+catalogue, so every artist fetched is recorded here with the time it was
+fetched. A run only requests artists that are not in the index or whose entry
+is older than ARTIST_INDEX_MAX_AGE_DAYS; an incremental crawl of new songs
+costs API calls for the new artists only.
+
+Artists Spotify returns nothing for are recorded with no genres, so they are
+not requested again until their entry goes stale.
+
+Environment:
+    ARTIST_INDEX_PATH          index file (default: artist_genres.sqlite)
+    ARTIST_INDEX_MAX_AGE_DAYS  refresh entries older than this (default: 30)
+"""
+
+import json
+import os
+import sqlite3
+import time
+
+import pandas as pd
+
+ARTIST_INDEX_PATH = os.getenv('ARTIST_INDEX_PATH', 'artist_genres.sqlite')
+ARTIST_INDEX_MAX_AGE_DAYS = float(os.getenv('ARTIST_INDEX_MAX_AGE_DAYS', '30'))
+GENRE_COLUMNS = ['artist_id', 'artist_name', 'genre_tag']
+
+
+class ArtistGenreIndex:
+    """SQLite table of artist_id -> (name, genres, fetched_at)"""
+
+    def __init__(self, path=ARTIST_INDEX_PATH, max_age_days=ARTIST_INDEX_MAX_AGE_DAYS):
+        self.path = path
+        self.max_age = max_age_days * 24 * 3600
+        self._conn = sqlite3.connect(path)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS artists ('
+            ' artist_id TEXT PRIMARY KEY, artist_name TEXT, genres TEXT NOT NULL, fetched_at REAL NOT NULL)'
+        )
+        self._conn.commit()
+
+    def __len__(self):
+        return self._conn.execute('SELECT COUNT(*) FROM artists').fetchone()[0]
+
+    def fresh_ids(self, now=None):
+        """IDs of artists fetched within max_age (these need no request)"""
+        cutoff = (now or time.time()) - self.max_age
+        rows = self._conn.execute('SELECT artist_id FROM artists WHERE fetched_at >= ?', (cutoff,))
+        return {artist_id for (artist_id,) in rows}
+
+    def record(self, artist_ids, artists, now=None):
+        """
+        Store one /artists batch: artists[i] is the object for artist_ids[i]
+        (None when Spotify has no such artist). Committed per call.
+        """
+        fetched_at = now or time.time()
+        rows = []
+        for artist_id, artist in zip(artist_ids, artists):
+            if artist is None:
+                rows.append((artist_id, None, '[]', fetched_at))
+            else:
+                rows.append((artist_id, artist.get('name'), json.dumps(artist.get('genres', [])), fetched_at))
+        with self._conn:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO artists (artist_id, artist_name, genres, fetched_at) VALUES (?, ?, ?, ?)',
+                rows,
+            )
+
+    def genre_frame(self, artist_ids=None):
+        """(artist_id, artist_name, genre_tag) rows, one per genre, optionally limited to artist_ids"""
+        df = pd.read_sql_query('SELECT artist_id, artist_name, genres FROM artists', self._conn)
+        if artist_ids is not None:
+            df = df[df['artist_id'].isin(artist_ids)]
+        df = df.assign(genre_tag=df['genres'].map(json.loads)).explode('genre_tag')
+        return df.dropna(subset=['genre_tag'])[GENRE_COLUMNS].reset_index(drop=True)
+
+    def close(self):
+        self._conn.close()
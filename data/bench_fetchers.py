@@ -0,0 +1,206 @@
+"""
+Fetcher throughput benchmark against the local Spotify stand-in
+
+Starts spotify_standin.py on a background thread, points the fetch scripts at
+it (SPOTIFY_API_BASE) and times each fetch path:
+
+  search-sequential    fetch_songs_data.fetch_songs_from_search_with_saving
+  search-concurrent    fetch_songs_data concurrent harvest (search_harvest.py)
+  tracks-and-tags      fetch_spotify_tracks_and_tags.main
+  audio-features       fetch_audio_features.main
+  audio-features-http  fetch_audio_features_alternative.main
+
+For each path it reports requests/sec, tracks/sec and wall-clock time (for the
+search paths: time to reach --target songs, default TARGET_SONGS).
+
+Usage:
+    python bench_fetchers.py --target 5000 --latency-ms 40 --rate-429 0.01
+    python bench_fetchers.py --paths search-concurrent --concurrency 32 --rps 50 --json bench.json
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from spotify_standin import Faults, Fixtures, start_standin
+
+PATHS = ['search-sequential', 'search-concurrent', 'tracks-and-tags', 'audio-features', 'audio-features-http']
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the Spotify fetchers against a local stand-in")
+    parser.add_argument('--paths', nargs='+', default=PATHS, choices=PATHS)
+    parser.add_argument('--target', type=int, default=None, help="songs to harvest (default: TARGET_SONGS)")
+    parser.add_argument('--tracks', type=int, default=None,
+                        help="tracks to enrich in the metadata/audio paths (default: --target)")
+    parser.add_argument('--catalogue', type=int, default=60000, help="synthetic catalogue size")
+    parser.add_argument('--fixtures', help="JSON fixtures (spotify_standin.py --save-fixtures)")
+    parser.add_argument('--from-cache', help="recorded spotify_cache.sqlite to serve")
+    parser.add_argument('--latency-ms', type=float, default=30.0)
+    parser.add_argument('--jitter-ms', type=float, default=10.0)
+    parser.add_argument('--rate-429', type=float, default=0.0)
+    parser.add_argument('--retry-after', type=int, default=1)
+    parser.add_argument('--forbid', action='append', default=[])
+    parser.add_argument('--rps', type=float, default=None, help="concurrent harvest requests/sec")
+    parser.add_argument('--concurrency', type=int, default=None, help="concurrent harvest pages in flight")
+    parser.add_argument('--cache', action='store_true', help="keep the response cache enabled")
+    parser.add_argument('--json', help="write results to this JSON file")
+    return parser.parse_args()
+
+
+def configure_environment(server, args, workdir):
+    """Must run before the fetch modules are imported: they read their config at import"""
+    os.environ['SPOTIFY_API_BASE'] = f'{server.base_url}/v1/'
+    os.environ['SPOTIFY_TOKEN_URL'] = f'{server.base_url}/api/token'
+    if args.cache:
+        os.environ['SPOTIFY_CACHE_PATH'] = os.path.join(workdir, 'bench_cache.sqlite')
+    else:
+        os.environ['SPOTIFY_CACHE_DISABLE'] = '1'
+    if args.rps is not None:
+        os.environ['SEARCH_REQUESTS_PER_SECOND'] = str(args.rps)
+    if args.concurrency is not None:
+        os.environ['SEARCH_CONCURRENCY'] = str(args.concurrency)
+
+
+def run_search_sequential(target, workdir):
+    import fetch_songs_data
+    from harvest_journal import HarvestJournal
+
+    sp = fetch_songs_data.setup_spotify_client()
+    journal = HarvestJournal(os.path.join(workdir, 'bench_sequential.journal.jsonl'))
+    songs = fetch_songs_data.fetch_songs_from_search_with_saving(sp, target, 0, set(), journal)
+    journal.close()
+    return len(songs)
+
+
+def run_search_concurrent(target, workdir):
+    import fetch_songs_data
+
+    sp = fetch_songs_data.setup_spotify_client(pool_size=fetch_songs_data.SEARCH_CONCURRENCY)
+    search_terms, genres = fetch_songs_data.build_search_terms()
+    songs = fetch_songs_data.fetch_songs_from_search_concurrent(
+        sp, search_terms, genres, target, 0, set(),
+        requests_per_second=fetch_songs_data.SEARCH_REQUESTS_PER_SECOND,
+        concurrency=fetch_songs_data.SEARCH_CONCURRENCY,
+    )
+    return len(songs)
+
+
+def write_inputs(track_ids, workdir):
+    """Input files the enrichment scripts expect in their working directory"""
+    import pandas as pd
+
+    pd.DataFrame({
+        'spotify_id': track_ids,
+        'name': 'n',
+        'artist': 'a',
+        'position': range(1, len(track_ids) + 1),
+        'genre_name': 'g',
+    }).to_csv(os.path.join(workdir, 'songs_fetched.csv'), sep=';', index=False, quoting=1)
+    pd.DataFrame({'song_spotify_id': track_ids}).to_csv(
+        os.path.join(workdir, 'spotify_final_with_behavior.csv'), index=False
+    )
+
+
+def run_in_workdir(main, workdir):
+    previous = os.getcwd()
+    os.chdir(workdir)
+    try:
+        main()
+    finally:
+        os.chdir(previous)
+
+
+def run_tracks_and_tags(n_tracks, workdir):
+    import fetch_spotify_tracks_and_tags
+    run_in_workdir(fetch_spotify_tracks_and_tags.main, workdir)
+    return n_tracks
+
+
+def run_audio_features(n_tracks, workdir):
+    import fetch_audio_features
+    run_in_workdir(fetch_audio_features.main, workdir)
+    return n_tracks
+
+
+def run_audio_features_http(n_tracks, workdir):
+    import fetch_audio_features_alternative
+    run_in_workdir(fetch_audio_features_alternative.main, workdir)
+    return n_tracks
+
+
+def main():
+    args = parse_args()
+
+    if args.from_cache:
+        fixtures = Fixtures.from_cache(args.from_cache)
+    elif args.fixtures:
+        fixtures = Fixtures.load(args.fixtures)
+    else:
+        fixtures = Fixtures.synthetic(n_tracks=args.catalogue)
+    faults = Faults(args.latency_ms, args.jitter_ms, args.rate_429, args.retry_after, args.forbid)
+    server = start_standin(fixtures, faults)
+    workdir = tempfile.mkdtemp(prefix='bench_fetchers_')
+    configure_environment(server, args, workdir)
+
+    import fetch_songs_data
+    target = args.target or fetch_songs_data.TARGET_SONGS
+    n_tracks = min(args.tracks or target, len(fixtures.tracks))
+    write_inputs(list(fixtures.tracks)[:n_tracks], workdir)
+
+    runners = {
+        'search-sequential': lambda: run_search_sequential(target, workdir),
+        'search-concurrent': lambda: run_search_concurrent(target, workdir),
+        'tracks-and-tags': lambda: run_tracks_and_tags(n_tracks, workdir),
+        'audio-features': lambda: run_audio_features(n_tracks, workdir),
+        'audio-features-http': lambda: run_audio_features_http(n_tracks, workdir),
+    }
+
+    print(f"Stand-in: {server.base_url} ({len(fixtures.tracks):,} tracks), "
+          f"latency {args.latency_ms:g}±{args.jitter_ms:g} ms, 429 rate {args.rate_429:g}")
+    results = []
+    for path in args.paths:
+        before = server.snapshot()
+        start = time.perf_counter()
+        error = None
+        tracks = 0
+        try:
+            tracks = runners[path]()
+        except Exception as e:
+            error = str(e)
+        wall = time.perf_counter() - start
+        delta = server.snapshot() - before
+        requests_sent = sum(n for (endpoint, _), n in delta.items() if endpoint != 'token')
+        throttled = sum(n for (_, status), n in delta.items() if status == 429)
+        results.append({
+            'path': path,
+            'wall_seconds': round(wall, 3),
+            'requests': requests_sent,
+            'requests_429': throttled,
+            'requests_per_sec': round(requests_sent / wall, 2) if wall > 0 else None,
+            'tracks': tracks,
+            'tracks_per_sec': round(tracks / wall, 2) if wall > 0 else None,
+            'target': target if path.startswith('search') else n_tracks,
+            'error': error,
+        })
+    server.shutdown()
+
+    print("\n" + "=" * 92)
+    print(f"{'Path':<22}{'Wall (s)':>10}{'Requests':>10}{'429s':>7}{'Req/s':>10}{'Tracks':>10}{'Tracks/s':>11}  Target")
+    print("-" * 92)
+    for r in results:
+        print(f"{r['path']:<22}{r['wall_seconds']:>10.2f}{r['requests']:>10,}{r['requests_429']:>7,}"
+              f"{r['requests_per_sec'] or 0:>10.1f}{r['tracks']:>10,}{r['tracks_per_sec'] or 0:>11.1f}  "
+              f"{r['target']:,}" + (f"  ERROR: {r['error']}" if r['error'] else ''))
+    print("=" * 92)
+
+    if args.json:
+        with open(args.json, 'w') as fh:
+            json.dump({'config': vars(args), 'results': results}, fh, indent=2)
+        print(f"Saved results to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,8 @@ proxy features from existing data that can predict pop vs non-pop.
 import pandas as pd
 from pathlib import Path
 
+from feature_store import EXPORT_CSV, KEY, FeatureStore
+
 CSV_PATH = Path('spotify_final_with_behavior.csv')
 OUTPUT_PATH = Path('spotify_final_with_behavior.csv')
 
@@ -72,28 +74,37 @@ def create_derived_features(df):
     
     return df
 
+# Input columns create_derived_features() looks at (whichever exist are loaded)
+INPUT_COLUMNS = ['spotify_popularity', 'genre', 'album_release_year', 'tempo_bpm_synth',
+                 'time_of_day_synth', 'is_explicit']
+
 def main():
-    print(f"Loading {CSV_PATH}...")
-    df = pd.read_csv(CSV_PATH)
+    store = FeatureStore.open(CSV_PATH)
+    available = set(store.columns())
+    input_cols = [c for c in INPUT_COLUMNS if c in available]
+    print(f"Loading {len(input_cols)} input columns from feature store {store.root}...")
+    df = store.read(columns=input_cols)
     print(f"Loaded {len(df):,} tracks")
-    print(f"Original columns: {len(df.columns)}")
     
     # Create derived features
     df = create_derived_features(df)
     
-    print(f"\nNew columns: {len(df.columns)}")
-    print(f"Added {len(df.columns) - len(pd.read_csv(CSV_PATH).columns)} new features")
+    # Only the derived group is rewritten; other columns are untouched
+    new_cols = [c for c in df.columns if c not in input_cols and c != KEY]
+    print(f"\nAdded {len(new_cols)} new features")
     
     # Show new columns
-    new_cols = [c for c in df.columns if c not in pd.read_csv(CSV_PATH).columns]
     print(f"\nNew derived features:")
     for col in new_cols:
         non_null = df[col].notna().sum()
         print(f"  • {col}: {non_null:,}/{len(df):,} values ({100*non_null/len(df):.1f}%)")
     
     # Save
-    df.to_csv(OUTPUT_PATH, index=False)
-    print(f"\n✅ Saved to {OUTPUT_PATH}")
+    store.write_group('derived', df[[KEY] + new_cols])
+    print(f"\n✅ Saved derived group to {store.group_path('derived')}")
+    if EXPORT_CSV:
+        store.export_csv(OUTPUT_PATH)
+        print(f"✅ Exported {OUTPUT_PATH}")
     
     # Summary statistics
     print("\n" + "="*60)
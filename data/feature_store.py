@@ -0,0 +1,255 @@
+"""
+Columnar, track-keyed feature store for spotify_final_with_behavior.csv
+
+Instead of every stage reading the whole CSV and writing it back in place,
+the dataset lives in feature_store/ as one Arrow IPC (Feather v2) file per
+column group, each keyed on song_spotify_id:
+
+    base.arrow      columns of the original dataset (rows and their order)
+    derived.arrow   written by create_derived_features.py
+    audio.arrow     written by fetch_audio_features*.py
+
+A stage reads only the columns it needs and rewrites only the group it owns.
+Files are uncompressed Arrow, so loads memory-map the file and decode nothing.
+The frames returned are ordinary (writable) pandas copies of the requested
+columns: each Arrow column is released as soon as it has been converted, so a
+load holds about one copy of the data at its peak, not the Arrow table plus
+the DataFrame.
+spotify_final_with_behavior.csv remains only as a compatibility export.
+
+Usage:
+    python feature_store.py import [spotify_final_with_behavior.csv]
+    python feature_store.py export [spotify_final_with_behavior.csv]
+    python feature_store.py info
+"""
+
+import os
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+KEY = 'song_spotify_id'
+BASE_GROUP = 'base'
+STORE_DIR = Path(os.getenv('FEATURE_STORE_DIR', 'feature_store'))
+CSV_PATH = Path('spotify_final_with_behavior.csv')
+# Stages also rewrite the CSV after each update when this is set (slower; for old consumers)
+EXPORT_CSV = os.getenv('FEATURE_STORE_EXPORT_CSV', '') == '1'
+
+# Columns owned by each stage; anything else in the dataset belongs to the base group
+GROUP_COLUMNS = {
+    'derived': [
+        'is_highly_popular', 'is_moderately_popular', 'popularity_normalized',
+        'has_pop_genre', 'genre_count', 'is_recent', 'is_very_recent', 'decade',
+        'tempo_is_pop_range', 'tempo_normalized', 'is_daytime', 'is_not_explicit',
+        'popular_recent', 'mainstream_pop_signal',
+    ],
+    'audio': ['danceability', 'energy', 'valence', 'acousticness'],
+}
+
+
+class FeatureStore:
+    """Directory of column-group Arrow files joined on song_spotify_id"""
+
+    def __init__(self, root=STORE_DIR):
+        self.root = Path(root)
+
+    @classmethod
+    def open(cls, csv_path=CSV_PATH, root=STORE_DIR):
+        """Open the store, importing csv_path once if the store does not exist yet"""
+        store = cls(root)
+        if not store.exists():
+            if not Path(csv_path).exists():
+                raise FileNotFoundError(f"No feature store at {store.root} and no {csv_path} to import")
+            print(f"Importing {csv_path} into feature store {store.root} (one-time)...")
+            store.import_csv(csv_path)
+        return store
+
+    def group_path(self, group):
+        return self.root / f'{group}.arrow'
+
+    def exists(self):
+        return self.group_path(BASE_GROUP).exists()
+
+    def groups(self):
+        if not self.root.exists():
+            return []
+        names = sorted(p.stem for p in self.root.glob('*.arrow'))
+        # Base first: it defines the rows
+        return [BASE_GROUP] + [name for name in names if name != BASE_GROUP] if BASE_GROUP in names else names
+
+    def layout(self):
+        """{group: [columns]} (without the key column)"""
+        import pyarrow as pa
+
+        layout = {}
+        for group in self.groups():
+            with pa.memory_map(str(self.group_path(group))) as source:
+                schema = pa.ipc.open_file(source).schema
+            layout[group] = [name for name in schema.names if name != KEY]
+        return layout
+
+    def columns(self):
+        """All columns available, in group order"""
+        return [col for cols in self.layout().values() for col in cols]
+
+    def _read_group(self, group, columns):
+        import pyarrow.feather as feather
+
+        table = feather.read_table(str(self.group_path(group)), columns=[KEY] + list(columns), memory_map=True)
+        # Free each mapped column once converted instead of holding the whole table until the end
+        df = table.to_pandas(split_blocks=True, self_destruct=True)
+        del table
+        return df
+
+    def read(self, columns=None):
+        """
+        Load song_spotify_id plus the requested columns (default: everything),
+        one row per base row, in base order. Only groups holding a requested
+        column are touched, and only those columns are read from the mapping.
+        """
+        layout = self.layout()
+        if BASE_GROUP not in layout:
+            raise FileNotFoundError(f"Feature store {self.root} has no {BASE_GROUP} group")
+        owner = {col: group for group, cols in layout.items() for col in cols}
+
+        if columns is None:
+            wanted = layout
+            order = [col for cols in layout.values() for col in cols]
+        else:
+            order = [col for col in columns if col != KEY]
+            unknown = [col for col in order if col not in owner]
+            if unknown:
+                raise KeyError(f"Columns not in feature store: {unknown}")
+            wanted = {}
+            for col in order:
+                wanted.setdefault(owner[col], []).append(col)
+
+        df = self._read_group(BASE_GROUP, wanted.get(BASE_GROUP, []))
+        for group, cols in wanted.items():
+            if group == BASE_GROUP or not cols:
+                continue
+            df = df.merge(self._read_group(group, cols), on=KEY, how='left', validate='many_to_one')
+        return df[[KEY] + order]
+
+    def write_group(self, group, df):
+        """
+        Replace one column group. df must hold song_spotify_id plus the group's columns;
+        non-base groups are keyed, so duplicate IDs keep their first row.
+        """
+        import pyarrow as pa
+        import pyarrow.feather as feather
+
+        if KEY not in df.columns:
+            raise ValueError(f"Group '{group}' must include the {KEY} column")
+        clashes = [
+            col for other, cols in self.layout().items() if other != group
+            for col in cols if col in df.columns
+        ]
+        if clashes:
+            raise ValueError(f"Columns already owned by another group: {clashes}")
+
+        df = df.copy()
+        df[KEY] = df[KEY].astype(str)
+        if group != BASE_GROUP:
+            df = df.drop_duplicates(KEY)
+        table = pa.Table.from_pandas(df.reset_index(drop=True), preserve_index=False)
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.group_path(group).with_suffix('.arrow.tmp')
+        feather.write_feather(table, str(tmp_path), compression='uncompressed')
+        os.replace(tmp_path, self.group_path(group))
+
+    def import_csv(self, csv_path=CSV_PATH):
+        """Split a full dataset CSV into the base group and any stage-owned groups it already has"""
+        df = pd.read_csv(csv_path, dtype={KEY: str})
+        owned = {col for cols in GROUP_COLUMNS.values() for col in cols}
+        self.write_group(BASE_GROUP, df[[col for col in df.columns if col not in owned]])
+        for group, cols in GROUP_COLUMNS.items():
+            present = [col for col in cols if col in df.columns]
+            if present:
+                self.write_group(group, df[[KEY] + present])
+
+    def export_csv(self, csv_path=CSV_PATH):
+        """Write the joined dataset as a CSV (compatibility output)"""
+        df = self.read()
+        df.to_csv(csv_path, index=False)
+        return df
+
+
+def env_columns(name, group):
+    """
+    Comma-separated column names from environment variable `name` (empty when unset).
+    Raises ValueError for a name that is not one of the group's columns.
+    """
+    columns = [col.strip() for col in os.getenv(name, '').split(',') if col.strip()]
+    unknown = [col for col in columns if col not in GROUP_COLUMNS[group]]
+    if unknown:
+        raise ValueError(f"{name}: not {group} columns: {unknown} (choose from {GROUP_COLUMNS[group]})")
+    return columns
+
+
+def features_frame(records, columns):
+    """
+    Typed frame (song_spotify_id + columns) from {track_id: {column: value}}.
+    Tracks mapped to None (no features returned) are left out.
+    """
+    rows = {track_id: values for track_id, values in records.items() if values is not None}
+    frame = pd.DataFrame.from_dict(rows, orient='index', columns=columns)
+    frame = frame.apply(pd.to_numeric, errors='coerce') if len(frame) else frame.astype('float64')
+    frame.index = frame.index.astype(str)
+    return frame.rename_axis(KEY).reset_index()
+
+
+def attach_features(df, features, fill_only_missing=()):
+    """
+    Join features (song_spotify_id + columns) onto df's song_spotify_id in one merge.
+
+    By default a fetched value replaces the existing one, and rows without a fetched
+    value keep what they had. Columns listed in fill_only_missing keep every existing
+    value and only take fetched values where df is missing one.
+    """
+    columns = [col for col in features.columns if col != KEY]
+    features = features.assign(**{KEY: features[KEY].astype(str)}).drop_duplicates(KEY)
+    keys = pd.DataFrame({KEY: df[KEY].astype(str).to_numpy()})
+    fetched = keys.merge(features, on=KEY, how='left', validate='many_to_one')
+    fetched.index = df.index
+
+    df = df.copy()
+    for col in columns:
+        new = fetched[col]
+        if col not in df.columns:
+            df[col] = new
+            continue
+        old = df[col].infer_objects()
+        if old.isna().all():
+            df[col] = new
+        elif col in fill_only_missing:
+            df[col] = old.where(old.notna(), new.to_numpy())
+        else:
+            df[col] = new.where(new.notna(), old.to_numpy())
+    return df
+
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else 'info'
+    csv_path = Path(sys.argv[2]) if len(sys.argv) > 2 else CSV_PATH
+    store = FeatureStore()
+
+    if command == 'import':
+        store.import_csv(csv_path)
+        print(f"✅ Imported {csv_path} into {store.root}")
+    elif command == 'export':
+        df = store.export_csv(csv_path)
+        print(f"✅ Exported {len(df):,} rows x {len(df.columns)} columns to {csv_path}")
+    elif command == 'info':
+        for group, cols in store.layout().items():
+            size = store.group_path(group).stat().st_size
+            print(f"{group:<10} {size / 1e6:8.2f} MB  {len(cols):3d} columns: {', '.join(cols)}")
+    else:
+        print(__doc__)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
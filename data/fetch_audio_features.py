@@ -7,7 +7,18 @@ This script fetches the 4 most important audio features for pop vs non-pop class
 - valence: Musical positiveness (0.0-1.0) - Pop is typically positive/happy (>0.5)
 - acousticness: Confidence measure of whether track is acoustic (0.0-1.0) - Pop is typically low (<0.5)
 
-These features are added to spotify_final_with_behavior.csv
+These features are written to the 'audio' group of the feature store
+(feature_store.py), keyed on song_spotify_id.
+
+AUDIO_FETCH_MODE=delta (default) requests only tracks missing any of the four
+features; AUDIO_FETCH_MODE=full re-requests every track. Each finished batch is
+appended to audio_features.journal.jsonl, so an interrupted run (crash, 403
+cutoff) resumes after the last committed batch. The journal is removed once
+the features are saved to the store.
+
+By default fetched values replace stored ones. AUDIO_FILL_ONLY_MISSING lists
+audio columns (comma-separated, e.g. "danceability,energy") whose stored
+values are kept, with fetched values only filling gaps.
 """
 
 import os
@@ -15,15 +26,25 @@ import time
 import pandas as pd
 import spotipy
 from spotipy.exceptions import SpotifyException
-from spotipy.oauth2 import SpotifyClientCredentials
 from pathlib import Path
 from tqdm import tqdm
 
+from feature_store import (
+    EXPORT_CSV, GROUP_COLUMNS, KEY, FeatureStore, attach_features, env_columns, features_frame,
+)
+from harvest_journal import BatchJournal
+from spotify_cache import open_default_cache, spotify_client
+
 # Configuration
 CSV_PATH = Path('spotify_final_with_behavior.csv')
 OUTPUT_PATH = Path('spotify_final_with_behavior.csv')
 BATCH_SIZE = 100  # Spotify allows up to 100 tracks per audio_features call
 SLEEP_SECONDS = 0.1  # Small delay to respect rate limits
+# 'delta' = only tracks missing audio features, 'full' = every track
+AUDIO_FETCH_MODE = os.getenv('AUDIO_FETCH_MODE', 'delta')
+JOURNAL_PATH = Path('audio_features.journal.jsonl')
+# Audio columns whose existing values are kept (fetched values only fill gaps)
+FILL_ONLY_MISSING = env_columns('AUDIO_FILL_ONLY_MISSING', 'audio')
 
 def chunked(seq, size):
     """Split sequence into chunks of given size"""
@@ -33,27 +54,35 @@ def chunked(seq, size):
 def main():
     client_id = os.getenv("SPOTIFY_CLIENT_ID")
     client_secret = os.getenv("SPOTIFY_CLIENT_SECRET")
-    if not client_id or not client_secret:
-        raise RuntimeError("SPOTIFY_CLIENT_ID / SECRET not set. Run: source setup_spotify.sh")
+    cache = open_default_cache()
+    sp = spotify_client(client_id, client_secret, cache=cache)
 
-    sp = spotipy.Spotify(
-        client_credentials_manager=SpotifyClientCredentials(
-            client_id=client_id,
-            client_secret=client_secret,
-        )
-    )
-
-    # Load existing CSV
-    print(f"Loading {CSV_PATH}...")
-    df = pd.read_csv(CSV_PATH)
+    # Load only the track IDs (and any audio features already fetched)
+    store = FeatureStore.open(CSV_PATH)
+    existing_audio_cols = [c for c in GROUP_COLUMNS['audio'] if c in store.columns()]
+    print(f"Loading track IDs from feature store {store.root}...")
+    df = store.read(columns=existing_audio_cols)
     print(f"Loaded {len(df):,} tracks")
     
-    # Get unique track IDs
-    track_ids = df['song_spotify_id'].dropna().astype(str).unique().tolist()
-    print(f"Fetching audio features for {len(track_ids):,} unique tracks...")
+    audio_feature_cols = ['danceability', 'energy', 'valence', 'acousticness']
     
-    # Dictionary to store audio features
+    # Get unique track IDs (in delta mode, only those missing a feature)
+    if AUDIO_FETCH_MODE == 'delta' and existing_audio_cols == audio_feature_cols:
+        needs_fetch = df[audio_feature_cols].isna().any(axis=1)
+        track_ids = df.loc[needs_fetch, KEY].dropna().astype(str).unique().tolist()
+        print(f"Delta mode: {len(track_ids):,} tracks are missing audio features")
+    else:
+        track_ids = df[KEY].dropna().astype(str).unique().tolist()
+    
+    # Resume from batches committed by an interrupted run
+    journal = BatchJournal(str(JOURNAL_PATH))
     audio_features_dict = {}
+    for record in journal.replay():
+        audio_features_dict.update(record['features'])
+    if audio_features_dict:
+        print(f"Resuming: {len(audio_features_dict):,} tracks already fetched in {JOURNAL_PATH}")
+        track_ids = [track_id for track_id in track_ids if track_id not in audio_features_dict]
+    print(f"Fetching audio features for {len(track_ids):,} unique tracks...")
     
     # Fetch audio features in batches
     error_403_count = 0
@@ -61,10 +90,11 @@ def main():
         try:
             features = sp.audio_features(batch)
             
+            batch_features = {}
             for i, track_id in enumerate(batch):
                 if features[i] is not None:
                     # Fetch only the 4 priority features for pop classification
-                    audio_features_dict[track_id] = {
+                    batch_features[track_id] = {
                         'danceability': features[i].get('danceability'),
                         'energy': features[i].get('energy'),
                         'valence': features[i].get('valence'),
@@ -72,7 +102,11 @@ def main():
                     }
                 else:
                     # Track not found or no features available
-                    audio_features_dict[track_id] = None
+                    batch_features[track_id] = None
+            
+            # Commit the batch before moving on
+            journal.append({'features': batch_features})
+            audio_features_dict.update(batch_features)
             
             if idx % 10 == 0:
                 print(f"  Processed {min(idx * BATCH_SIZE, len(track_ids)):,}/{len(track_ids):,} tracks")
@@ -102,36 +136,28 @@ def main():
     # Add audio features to dataframe
     print("\nAdding audio features to dataframe...")
     
-    # Initialize new columns - only the 4 priority features
-    audio_feature_cols = ['danceability', 'energy', 'valence', 'acousticness']
-    
-    # Only add columns if they don't already exist
-    for col in audio_feature_cols:
-        if col not in df.columns:
-            df[col] = None
-    
-    # Map features to dataframe
-    for idx, row in df.iterrows():
-        track_id = str(row['song_spotify_id'])
-        if track_id in audio_features_dict and audio_features_dict[track_id] is not None:
-            features = audio_features_dict[track_id]
-            df.at[idx, 'danceability'] = features.get('danceability')
-            df.at[idx, 'energy'] = features.get('energy')
-            df.at[idx, 'valence'] = features.get('valence')
-            df.at[idx, 'acousticness'] = features.get('acousticness')
+    # Join fetched features onto song_spotify_id in one merge
+    features_df = features_frame(audio_features_dict, audio_feature_cols)
+    df = attach_features(df, features_df, fill_only_missing=FILL_ONLY_MISSING)
     
     # Calculate success rate
     success_count = df['danceability'].notna().sum()
     print(f"\nSuccessfully fetched features for {success_count:,}/{len(df):,} tracks ({100*success_count/len(df):.1f}%)")
     
-    # Save updated CSV
-    df.to_csv(OUTPUT_PATH, index=False)
-    print(f"\n✅ Saved updated dataset to {OUTPUT_PATH}")
+    # Save the audio group only
+    store.write_group('audio', df[[KEY] + audio_feature_cols])
+    journal.discard()
+    print(f"\n✅ Saved audio features to {store.group_path('audio')}")
+    if EXPORT_CSV:
+        store.export_csv(OUTPUT_PATH)
+        print(f"✅ Exported {OUTPUT_PATH}")
     print(f"   Added {len(audio_feature_cols)} new audio feature columns")
     
     # Show summary statistics
     print("\nAudio Features Summary:")
     print(df[audio_feature_cols].describe())
+    if cache is not None:
+        print(f"\nResponse cache: {cache.stats()}")
 
 if __name__ == "__main__":
     main()
@@ -5,6 +5,9 @@ This script tries multiple methods to fetch audio features:
 1. Direct HTTP requests to Spotify API
 2. Individual track requests (instead of batches)
 3. Using track endpoint to check for available data
+
+AUDIO_FILL_ONLY_MISSING (comma-separated audio columns) keeps those columns'
+stored values and only fills their gaps, as in fetch_audio_features.py.
 """
 
 import os
@@ -13,18 +16,27 @@ import pandas as pd
 import requests
 import spotipy
 from spotipy.exceptions import SpotifyException
-from spotipy.oauth2 import SpotifyClientCredentials
 from pathlib import Path
 from tqdm import tqdm
 
+from feature_store import (
+    EXPORT_CSV, GROUP_COLUMNS, KEY, FeatureStore, attach_features, env_columns, features_frame,
+)
+from spotify_cache import (
+    API_BASE, TOKEN_URL, cached_http_batch, cached_http_get, credentials_required,
+    open_default_cache, spotify_client,
+)
+
 # Configuration
 CSV_PATH = Path('spotify_final_with_behavior.csv')
 OUTPUT_PATH = Path('spotify_final_with_behavior.csv')
 SLEEP_SECONDS = 0.1
+# Audio columns whose existing values are kept (fetched values only fill gaps)
+FILL_ONLY_MISSING = env_columns('AUDIO_FILL_ONLY_MISSING', 'audio')
 
 def get_access_token(client_id, client_secret):
     """Get access token directly via HTTP"""
-    url = "https://accounts.spotify.com/api/token"
+    url = TOKEN_URL
     headers = {"Content-Type": "application/x-www-form-urlencoded"}
     data = {
         "grant_type": "client_credentials",
@@ -37,62 +49,62 @@ def get_access_token(client_id, client_secret):
     else:
         raise Exception(f"Failed to get access token: {response.status_code} - {response.text}")
 
-def fetch_audio_features_http(access_token, track_ids):
-    """Fetch audio features using direct HTTP requests"""
-    url = "https://api.spotify.com/v1/audio-features"
+def fetch_audio_features_http(access_token, track_ids, cache=None):
+    """Fetch audio features using direct HTTP requests (only uncached IDs hit the network)"""
+    url = f"{API_BASE}audio-features"
     headers = {
         "Authorization": f"Bearer {access_token}",
         "Content-Type": "application/json"
     }
     
-    # Try with comma-separated IDs
-    ids_str = ",".join(track_ids)
-    params = {"ids": ids_str}
+    def fetch(ids):
+        # Try with comma-separated IDs
+        params = {"ids": ",".join(ids)}
+        return requests.get(url, headers=headers, params=params)
     
-    response = requests.get(url, headers=headers, params=params)
-    return response
+    return cached_http_batch(cache, 'audio-features', track_ids, fetch)
 
-def fetch_audio_features_single(access_token, track_id):
+def fetch_audio_features_single(access_token, track_id, cache=None):
     """Fetch audio features for a single track"""
-    url = f"https://api.spotify.com/v1/audio-features/{track_id}"
+    url = f"{API_BASE}audio-features/{track_id}"
     headers = {
         "Authorization": f"Bearer {access_token}",
         "Content-Type": "application/json"
     }
     
-    response = requests.get(url, headers=headers)
+    response = cached_http_get(cache, url, headers=headers)
     return response
 
 def main():
     client_id = os.getenv("SPOTIFY_CLIENT_ID")
     client_secret = os.getenv("SPOTIFY_CLIENT_SECRET")
-    if not client_id or not client_secret:
+    cache = open_default_cache()
+    offline = cache is not None and cache.offline
+    if credentials_required(cache) and (not client_id or not client_secret):
         raise RuntimeError("SPOTIFY_CLIENT_ID / SECRET not set")
 
-    # Load existing CSV
-    print(f"Loading {CSV_PATH}...")
-    df = pd.read_csv(CSV_PATH)
+    # Load only the track IDs (and any audio features already fetched)
+    store = FeatureStore.open(CSV_PATH)
+    existing_audio_cols = [c for c in GROUP_COLUMNS['audio'] if c in store.columns()]
+    print(f"Loading track IDs from feature store {store.root}...")
+    df = store.read(columns=existing_audio_cols)
     print(f"Loaded {len(df):,} tracks")
     
     # Get unique track IDs
     track_ids = df['song_spotify_id'].dropna().astype(str).unique().tolist()
     print(f"Fetching audio features for {len(track_ids):,} unique tracks...")
     
-    # Initialize columns if they don't exist
     audio_feature_cols = ['danceability', 'energy', 'valence', 'acousticness']
-    for col in audio_feature_cols:
-        if col not in df.columns:
-            df[col] = None
     
     # Try Method 1: Direct HTTP with access token
     print("\n=== Method 1: Direct HTTP Requests ===")
     try:
-        access_token = get_access_token(client_id, client_secret)
+        access_token = 'offline' if offline else get_access_token(client_id, client_secret)
         print("✅ Got access token")
         
         # Try a small batch first
         test_batch = track_ids[:10]
-        response = fetch_audio_features_http(access_token, test_batch)
+        response = fetch_audio_features_http(access_token, test_batch, cache=cache)
         
         if response.status_code == 200:
             print("✅ HTTP method works! Fetching all tracks...")
@@ -102,7 +114,7 @@ def main():
             batch_size = 100
             for i in tqdm(range(0, len(track_ids), batch_size), desc="Fetching features"):
                 batch = track_ids[i:i+batch_size]
-                response = fetch_audio_features_http(access_token, batch)
+                response = fetch_audio_features_http(access_token, batch, cache=cache)
                 
                 if response.status_code == 200:
                     features = response.json().get('audio_features', [])
@@ -123,21 +135,18 @@ def main():
                 
                 time.sleep(SLEEP_SECONDS)
             
-            # Map features to dataframe
+            # Join fetched features onto song_spotify_id in one merge
             if audio_features_dict:
-                for idx, row in df.iterrows():
-                    track_id = str(row['song_spotify_id'])
-                    if track_id in audio_features_dict:
-                        features = audio_features_dict[track_id]
-                        df.at[idx, 'danceability'] = features.get('danceability')
-                        df.at[idx, 'energy'] = features.get('energy')
-                        df.at[idx, 'valence'] = features.get('valence')
-                        df.at[idx, 'acousticness'] = features.get('acousticness')
+                features_df = features_frame(audio_features_dict, audio_feature_cols)
+                df = attach_features(df, features_df, fill_only_missing=FILL_ONLY_MISSING)
                 
                 success_count = df['danceability'].notna().sum()
                 print(f"\n✅ Successfully fetched {success_count:,}/{len(df):,} tracks")
-                df.to_csv(OUTPUT_PATH, index=False)
-                print(f"✅ Saved to {OUTPUT_PATH}")
+                store.write_group('audio', df[[KEY] + audio_feature_cols])
+                print(f"✅ Saved to {store.group_path('audio')}")
+                if EXPORT_CSV:
+                    store.export_csv(OUTPUT_PATH)
+                    print(f"✅ Exported {OUTPUT_PATH}")
                 return
         elif response.status_code == 403:
             print("❌ 403 Forbidden - trying single-track method...")
@@ -149,13 +158,13 @@ def main():
     # Try Method 2: Single track requests
     print("\n=== Method 2: Single Track Requests ===")
     try:
-        access_token = get_access_token(client_id, client_secret)
+        access_token = 'offline' if offline else get_access_token(client_id, client_secret)
         audio_features_dict = {}
         success_count = 0
         
         # Test with first 10 tracks
         for track_id in tqdm(track_ids[:100], desc="Testing single-track method"):
-            response = fetch_audio_features_single(access_token, track_id)
+            response = fetch_audio_features_single(access_token, track_id, cache=cache)
             
             if response.status_code == 200:
                 features = response.json()
@@ -190,12 +199,7 @@ def main():
     # Try Method 3: Using spotipy with different approach
     print("\n=== Method 3: Spotipy with Different Batch Size ===")
     try:
-        sp = spotipy.Spotify(
-            client_credentials_manager=SpotifyClientCredentials(
-                client_id=client_id,
-                client_secret=client_secret,
-            )
-        )
+        sp = spotify_client(client_id, client_secret, cache=cache)
         
         # Try smaller batches
         test_ids = track_ids[:5]
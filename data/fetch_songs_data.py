@@ -3,38 +3,51 @@ Fetch 35,000-40,000 songs from Spotify API
 Similar to the original data collection process but using Spotify API directly
 """
 
-import spotipy
-from spotipy.oauth2 import SpotifyClientCredentials
 import pandas as pd
 import time
 import json
 from tqdm import tqdm
 import os
 
+from harvest_journal import HarvestJournal, SONG_COLUMNS
+from spotify_cache import credentials_required, open_default_cache, pooled_session, spotify_client
+from search_harvest import search_result_to_song, fetch_songs_from_search_concurrent
+
 # Configuration
 TARGET_SONGS = 40000  # Target number of songs to fetch
 OUTPUT_DIR = "."  # Current directory (data folder)
 SONGS_OUTPUT = os.path.join(OUTPUT_DIR, "songs_fetched.csv")
 TAGS_OUTPUT = os.path.join(OUTPUT_DIR, "tags_fetched.csv")
+JOURNAL_OUTPUT = os.path.join(OUTPUT_DIR, "songs_fetched.journal.jsonl")
+
+# Search harvest mode: 'sequential' (one page at a time) or 'concurrent' (asyncio, rate limited)
+HARVEST_MODE = os.getenv('HARVEST_MODE', 'sequential')
+SEARCH_REQUESTS_PER_SECOND = float(os.getenv('SEARCH_REQUESTS_PER_SECOND', '10'))
+SEARCH_CONCURRENCY = int(os.getenv('SEARCH_CONCURRENCY', '16'))
 
 # Spotify API credentials (you'll need to set these)
 # Get them from: https://developer.spotify.com/dashboard
 CLIENT_ID = os.getenv('SPOTIFY_CLIENT_ID', '')
 CLIENT_SECRET = os.getenv('SPOTIFY_CLIENT_SECRET', '')
 
-def setup_spotify_client():
-    """Initialize Spotify API client"""
-    if not CLIENT_ID or not CLIENT_SECRET:
+def setup_spotify_client(pool_size=None):
+    """
+    Initialize Spotify API client
+    With pool_size, requests share a keep-alive connection pool of that size and
+    429s are raised to the caller (with Retry-After) instead of retried in place.
+    Responses go through the shared on-disk cache (see spotify_cache.py).
+    """
+    cache = open_default_cache()
+    if credentials_required(cache) and (not CLIENT_ID or not CLIENT_SECRET):
         raise ValueError(
             "Please set SPOTIFY_CLIENT_ID and SPOTIFY_CLIENT_SECRET environment variables.\n"
             "Get them from: https://developer.spotify.com/dashboard"
         )
     
-    client_credentials_manager = SpotifyClientCredentials(
-        client_id=CLIENT_ID,
-        client_secret=CLIENT_SECRET
-    )
-    return spotipy.Spotify(client_credentials_manager=client_credentials_manager)
+    if pool_size is None:
+        return spotify_client(CLIENT_ID, CLIENT_SECRET, cache=cache)
+    
+    return spotify_client(CLIENT_ID, CLIENT_SECRET, cache=cache, requests_session=pooled_session(pool_size))
 
 def fetch_songs_from_playlists(sp, target_count):
     """
@@ -71,61 +84,60 @@ def fetch_songs_from_playlists(sp, target_count):
     print(f"Target: {target_count:,} songs")
     
     for playlist_id in tqdm(popular_playlists, desc="Playlists"):
-                if len(songs_data) >= target_count:
-                    break
-                
+        if len(songs_data) >= target_count:
+            break
+        
         try:
             # Get playlist info
             playlist = sp.playlist(playlist_id)
-                playlist_name = playlist['name']
-                
-                    # Get tracks from playlist
-                    results = sp.playlist_tracks(playlist_id, limit=100)
+            playlist_name = playlist['name']
+            
+            # Get tracks from playlist
+            results = sp.playlist_tracks(playlist_id, limit=100)
+            
+            while results and len(songs_data) < target_count:
+                for item in results['items']:
+                    if len(songs_data) >= target_count:
+                        break
                     
-                    while results and len(songs_data) < target_count:
-                        for item in results['items']:
-                            if len(songs_data) >= target_count:
-                                break
-                            
-                            if item['track'] and item['track']['id']:
-                                track = item['track']
-                                
-                        # Skip if track is None or local
-                        if not track or track.get('is_local', False):
-                            continue
-                        
-                        # Extract genre from playlist name or use default
-                        genre = 'mixed'
-                        if 'pop' in playlist_name.lower():
-                            genre = 'pop'
-                        elif 'rock' in playlist_name.lower():
-                            genre = 'rock'
-                        elif 'hip' in playlist_name.lower() or 'rap' in playlist_name.lower():
-                            genre = 'hip hop'
-                        elif 'jazz' in playlist_name.lower():
-                            genre = 'jazz'
-                        elif 'country' in playlist_name.lower():
-                            genre = 'country'
-                        elif 'electronic' in playlist_name.lower() or 'edm' in playlist_name.lower():
-                            genre = 'electronic'
-                                
-                                songs_data.append({
-                                    'spotify_id': track['id'],
-                                    'name': track['name'],
-                                    'artist': ', '.join([artist['name'] for artist in track['artists']]),
-                                    'position': len(songs_data) + 1,
-                                    'genre_name': genre,
-                                    'popularity': track.get('popularity', 0),
-                                    'duration_ms': track.get('duration_ms', 0),
-                                    'album': track['album']['name'] if track.get('album') else '',
-                                    'playlist_name': playlist_name
-                                })
-                        
-                        # Get next page if available
-                        if results['next'] and len(songs_data) < target_count:
-                            results = sp.next(results)
+                    track = item['track'] if item['track'] and item['track']['id'] else None
+                    
+                    # Skip if track is None or local
+                    if not track or track.get('is_local', False):
+                        continue
+                    
+                    # Extract genre from playlist name or use default
+                    genre = 'mixed'
+                    if 'pop' in playlist_name.lower():
+                        genre = 'pop'
+                    elif 'rock' in playlist_name.lower():
+                        genre = 'rock'
+                    elif 'hip' in playlist_name.lower() or 'rap' in playlist_name.lower():
+                        genre = 'hip hop'
+                    elif 'jazz' in playlist_name.lower():
+                        genre = 'jazz'
+                    elif 'country' in playlist_name.lower():
+                        genre = 'country'
+                    elif 'electronic' in playlist_name.lower() or 'edm' in playlist_name.lower():
+                        genre = 'electronic'
+                    
+                    songs_data.append({
+                        'spotify_id': track['id'],
+                        'name': track['name'],
+                        'artist': ', '.join([artist['name'] for artist in track['artists']]),
+                        'position': len(songs_data) + 1,
+                        'genre_name': genre,
+                        'popularity': track.get('popularity', 0),
+                        'duration_ms': track.get('duration_ms', 0),
+                        'album': track['album']['name'] if track.get('album') else '',
+                        'playlist_name': playlist_name
+                    })
+                
+                # Get next page if available
+                if results['next'] and len(songs_data) < target_count:
+                    results = sp.next(results)
                     time.sleep(0.1)  # Rate limiting
-                        else:
+                else:
                     break
         
         except Exception as e:
@@ -155,57 +167,53 @@ def fetch_songs_from_featured_playlists(sp, target_count):
     ]
     
     for playlist_id in tqdm(popular_playlist_ids, desc="Featured playlists"):
-            if len(songs_data) >= target_count:
-                break
-            
+        if len(songs_data) >= target_count:
+            break
+        
         try:
             playlist = sp.playlist(playlist_id)
             playlist_name = playlist['name']
-                results = sp.playlist_tracks(playlist_id, limit=100)
-                
-                while results and len(songs_data) < target_count:
-                    for item in results['items']:
-                        if len(songs_data) >= target_count:
-                            break
-                        
-                        if item['track'] and item['track']['id']:
-                            track = item['track']
-                            
-                        if not track or track.get('is_local', False):
-                            continue
-                        
-                            songs_data.append({
-                                'spotify_id': track['id'],
-                                'name': track['name'],
-                                'artist': ', '.join([artist['name'] for artist in track['artists']]),
-                                'position': len(songs_data) + 1,
-                                'genre_name': 'featured',
-                                'popularity': track.get('popularity', 0),
-                                'duration_ms': track.get('duration_ms', 0),
-                                'album': track['album']['name'] if track.get('album') else '',
-                                'playlist_name': playlist_name
-                            })
+            results = sp.playlist_tracks(playlist_id, limit=100)
+            
+            while results and len(songs_data) < target_count:
+                for item in results['items']:
+                    if len(songs_data) >= target_count:
+                        break
+                    
+                    track = item['track'] if item['track'] and item['track']['id'] else None
                     
-                    if results['next'] and len(songs_data) < target_count:
-                        results = sp.next(results)
+                    if not track or track.get('is_local', False):
+                        continue
+                    
+                    songs_data.append({
+                        'spotify_id': track['id'],
+                        'name': track['name'],
+                        'artist': ', '.join([artist['name'] for artist in track['artists']]),
+                        'position': len(songs_data) + 1,
+                        'genre_name': 'featured',
+                        'popularity': track.get('popularity', 0),
+                        'duration_ms': track.get('duration_ms', 0),
+                        'album': track['album']['name'] if track.get('album') else '',
+                        'playlist_name': playlist_name
+                    })
+                
+                if results['next'] and len(songs_data) < target_count:
+                    results = sp.next(results)
                     time.sleep(0.1)
-                    else:
-                        break
-            
-            except Exception as e:
+                else:
+                    break
+        
+        except Exception as e:
             print(f"Error with playlist {playlist_id}: {e}")
-                continue
+            continue
     
     return songs_data
 
-def fetch_songs_from_search(sp, target_count, current_count, existing_ids=None):
+def build_search_terms():
     """
-    Fetch songs by searching for popular tracks with extensive search terms
+    Build the ordered list of search queries used by the search-based fetchers.
+    Returns (search_terms, genres) - genres is needed to label results.
     """
-    if existing_ids is None:
-        existing_ids = set()
-    
-    songs_data = []
     search_terms = []
     
     # Years - expand range
@@ -246,6 +254,18 @@ def fetch_songs_from_search(sp, target_count, current_count, existing_ids=None):
     for keyword in keywords:
         search_terms.append(keyword)
     
+    return search_terms, genres
+
+def fetch_songs_from_search(sp, target_count, current_count, existing_ids=None):
+    """
+    Fetch songs by searching for popular tracks with extensive search terms
+    """
+    if existing_ids is None:
+        existing_ids = set()
+    
+    songs_data = []
+    search_terms, genres = build_search_terms()
+    
     print("Fetching songs via search...")
     print(f"Total search terms: {len(search_terms)}")
     
@@ -260,35 +280,20 @@ def fetch_songs_from_search(sp, target_count, current_count, existing_ids=None):
             
             while offset < max_offset and current_count + len(songs_data) < target_count:
                 results = sp.search(q=term, type='track', limit=50, offset=offset, market='US')
-            
+                
                 if not results['tracks']['items']:
                     break
                 
                 new_songs_this_batch = 0
-            for track in results['tracks']['items']:
-                if current_count + len(songs_data) >= target_count:
-                    break
-                
+                for track in results['tracks']['items']:
+                    if current_count + len(songs_data) >= target_count:
+                        break
+                    
                     if track['id'] and track['id'] not in existing_ids:
-                        # Extract genre from search term
-                        genre = 'mixed'
-                        if ':' in term:
-                            genre = term.split(':')[1].strip()
-                        elif term in genres:
-                            genre = term
-                        
                         existing_ids.add(track['id'])  # Mark as seen
-                    songs_data.append({
-                        'spotify_id': track['id'],
-                        'name': track['name'],
-                        'artist': ', '.join([artist['name'] for artist in track['artists']]),
-                        'position': current_count + len(songs_data) + 1,
-                            'genre_name': genre,
-                        'popularity': track.get('popularity', 0),
-                        'duration_ms': track.get('duration_ms', 0),
-                        'album': track['album']['name'] if track.get('album') else '',
-                        'playlist_name': 'search'
-                    })
+                        songs_data.append(search_result_to_song(
+                            track, term, genres, current_count + len(songs_data) + 1
+                        ))
                         new_songs_this_batch += 1
                 
                 # If no new songs in this batch, break to avoid infinite loop
@@ -310,120 +315,75 @@ def fetch_songs_from_search(sp, target_count, current_count, existing_ids=None):
     
     return songs_data
 
-def fetch_songs_from_search_with_saving(sp, target_count, current_count, existing_ids, existing_songs_list):
+def fetch_songs_from_search_with_saving(sp, target_count, current_count, existing_ids, journal):
     """
-    Fetch songs with periodic saving to track progress
+    Fetch songs, checkpointing every finished page to the harvest journal.
+    Terms resume from the journal's cursor, so a restarted run continues where it stopped.
     """
     songs_data = []
-    search_terms = []
-    
-    # Years - expand range
-    for year in range(1960, 2025, 5):
-        search_terms.append(f'year:{year}')
-    
-    # Popular artists
-    popular_artists = [
-        'Taylor Swift', 'Drake', 'The Weeknd', 'Ed Sheeran', 'Ariana Grande',
-        'Post Malone', 'Billie Eilish', 'Dua Lipa', 'Bad Bunny', 'The Beatles',
-        'Queen', 'Eminem', 'Kanye West', 'Rihanna', 'Beyonce', 'Justin Bieber',
-        'Bruno Mars', 'Adele', 'Coldplay', 'Imagine Dragons', 'Maroon 5',
-        'Kendrick Lamar', 'Travis Scott', 'J. Cole', 'SZA', 'Doja Cat',
-        'Olivia Rodrigo', 'Harry Styles', 'Lana Del Rey', 'The Weeknd',
-        'Michael Jackson', 'Elvis Presley', 'Madonna', 'Prince', 'David Bowie',
-        'Bob Dylan', 'The Rolling Stones', 'Led Zeppelin', 'Pink Floyd',
-        'Nirvana', 'Radiohead', 'U2', 'Red Hot Chili Peppers', 'Foo Fighters',
-        'Linkin Park', 'Green Day', 'Blink-182', 'Metallica', 'AC/DC',
-        'Jay-Z', 'Nas', 'Tupac', 'Biggie', '50 Cent', 'Snoop Dogg',
-        'Frank Sinatra', 'Ella Fitzgerald', 'Louis Armstrong', 'Miles Davis',
-        'John Coltrane', 'Duke Ellington', 'Charlie Parker', 'Thelonious Monk'
-    ]
-    
-    for artist in popular_artists:
-        search_terms.append(f'artist:{artist}')
-    
-    # Genres
-    genres = ['pop', 'rock', 'hip hop', 'rap', 'electronic', 'edm', 'house', 'techno',
-              'jazz', 'country', 'r&b', 'soul', 'reggae', 'indie', 'alternative',
-              'metal', 'punk', 'folk', 'blues', 'classical', 'k-pop', 'j-pop',
-              'latin', 'salsa', 'bossa nova', 'funk', 'disco', 'gospel', 'bluegrass']
-    for genre in genres:
-        search_terms.append(f'genre:{genre}')
-    
-    # Popular keywords
-    keywords = ['hits', 'popular', 'top', 'best', 'classic', 'new', 'trending', 
-                'viral', 'chart', 'billboard', 'hot', 'fresh', 'latest']
-    for keyword in keywords:
-        search_terms.append(keyword)
+    search_terms, genres = build_search_terms()
     
     print("Fetching songs via search...")
     print(f"Total search terms: {len(search_terms)}")
     
-    save_counter = 0
-    for term_idx, term in enumerate(tqdm(search_terms, desc="Search terms")):
+    for term in tqdm(search_terms, desc="Search terms"):
         if current_count + len(songs_data) >= target_count:
             break
         
+        offset = journal.start_offset(term)
+        if offset is None:
+            continue  # Finished in an earlier run
+        
         try:
-            offset = 0
             max_offset = 1000
             
             while offset < max_offset and current_count + len(songs_data) < target_count:
                 results = sp.search(q=term, type='track', limit=50, offset=offset, market='US')
                 
                 if not results['tracks']['items']:
+                    journal.record_page(term, offset, None, [])
                     break
                 
-                new_songs_this_batch = 0
+                first_new = len(songs_data)
                 for track in results['tracks']['items']:
                     if current_count + len(songs_data) >= target_count:
                         break
                     
                     if track['id'] and track['id'] not in existing_ids:
-                        genre = 'mixed'
-                        if ':' in term:
-                            genre = term.split(':')[1].strip()
-                        elif term in genres:
-                            genre = term
-                        
                         existing_ids.add(track['id'])
-                        songs_data.append({
-                            'spotify_id': track['id'],
-                            'name': track['name'],
-                            'artist': ', '.join([artist['name'] for artist in track['artists']]),
-                            'position': current_count + len(songs_data) + 1,
-                            'genre_name': genre,
-                            'popularity': track.get('popularity', 0),
-                            'duration_ms': track.get('duration_ms', 0),
-                            'album': track['album']['name'] if track.get('album') else '',
-                            'playlist_name': 'search'
-                        })
-                        new_songs_this_batch += 1
+                        songs_data.append(search_result_to_song(
+                            track, term, genres, current_count + len(songs_data) + 1
+                        ))
+                new_songs_this_batch = len(songs_data) - first_new
+                
+                # Checkpoint: one append + fsync, independent of how much is already saved
+                term_done = new_songs_this_batch == 0 or offset + 50 >= max_offset
+                journal.record_page(term, offset, None if term_done else offset + 50, songs_data[first_new:])
                 
                 if new_songs_this_batch == 0:
                     break
                 
                 offset += 50
                 time.sleep(0.1)
-                
-                # Save every 100 new songs or every 5 search terms
-                save_counter += new_songs_this_batch
-                if save_counter >= 100 or (term_idx + 1) % 5 == 0:
-                    # Save current progress
-                    all_current_songs = existing_songs_list + songs_data
-                    df_temp = pd.DataFrame(all_current_songs)
-                    if len(df_temp) > 0:
-                        df_temp = df_temp[['spotify_id', 'name', 'artist', 'position', 'genre_name']].copy()
-                        df_temp['position'] = range(1, len(df_temp) + 1)
-                        df_temp.to_csv(SONGS_OUTPUT, sep=';', index=False, quoting=1)
-                        print(f"\n💾 Progress saved: {len(df_temp):,} total songs (just added {new_songs_this_batch} new)")
-                    save_counter = 0
         
         except Exception as e:
-            print(f"Error searching for {term}: {e}")
+            # The failed page is not journaled, so the term's cursor stays at it and the next run retries it
+            print(f"Error searching for {term} at offset {offset}: {e} (retried on the next run)")
             continue
     
     return songs_data
 
+def load_existing_songs():
+    """Read songs_fetched.csv once (vectorized) and return it de-duplicated"""
+    if not os.path.exists(SONGS_OUTPUT):
+        return pd.DataFrame(columns=SONG_COLUMNS)
+    try:
+        existing_df = pd.read_csv(SONGS_OUTPUT, sep=';', dtype={'spotify_id': str})
+        return existing_df[SONG_COLUMNS].drop_duplicates('spotify_id')
+    except Exception as e:
+        print(f"⚠️  Could not read {SONGS_OUTPUT}: {e}")
+        return pd.DataFrame(columns=SONG_COLUMNS)
+
 def main():
     """Main function to fetch songs data"""
     print("=" * 60)
@@ -433,35 +393,41 @@ def main():
     
     # Setup
     os.makedirs(OUTPUT_DIR, exist_ok=True)
-    sp = setup_spotify_client()
+    concurrent = HARVEST_MODE == 'concurrent'
+    sp = setup_spotify_client(pool_size=SEARCH_CONCURRENCY if concurrent else None)
     
     all_songs = []
     
     # Primary method: Use search (most reliable)
     print("\n[Method 1] Fetching songs via search (primary method)...")
-    print("Note: Songs will be saved periodically to track progress")
+    print(f"Note: Every finished page is checkpointed to {JOURNAL_OUTPUT}")
     
     # Load existing songs if file exists
-    existing_ids = set()
-    existing_songs_list = []
-    if os.path.exists(SONGS_OUTPUT):
-        try:
-            existing_df = pd.read_csv(SONGS_OUTPUT, sep=';')
-            existing_ids = set(existing_df['spotify_id'].astype(str))
-            for _, row in existing_df.iterrows():
-                existing_songs_list.append({
-                    'spotify_id': row['spotify_id'],
-                    'name': row['name'],
-                    'artist': row['artist'],
-                    'position': len(existing_songs_list) + 1,
-                    'genre_name': row['genre_name']
-                })
-            print(f"Found existing file with {len(existing_ids):,} unique songs")
-        except:
-            pass
-    
-    # Fetch songs with periodic saving
-    songs1 = fetch_songs_from_search_with_saving(sp, TARGET_SONGS, len(existing_ids), existing_ids, existing_songs_list)
+    existing_df = load_existing_songs()
+    existing_ids = set(existing_df['spotify_id'])
+    if len(existing_df) > 0:
+        print(f"Found existing file with {len(existing_ids):,} unique songs")
+    
+    # Replay the journal of an interrupted run on top of the CSV
+    journal = HarvestJournal(JOURNAL_OUTPUT)
+    journaled_songs = journal.load(existing_ids)
+    if journal.cursor:
+        finished_terms = sum(1 for next_offset in journal.cursor.values() if next_offset is None)
+        print(f"Resuming from journal: {len(journaled_songs):,} songs, {finished_terms} finished search terms")
+    all_songs.extend(journaled_songs)
+    
+    if concurrent:
+        # Many (term, offset) pages in flight under a shared requests/second budget
+        print(f"Concurrent harvest: {SEARCH_CONCURRENCY} in flight, {SEARCH_REQUESTS_PER_SECOND:g} requests/sec")
+        search_terms, genres = build_search_terms()
+        songs1 = fetch_songs_from_search_concurrent(
+            sp, search_terms, genres, TARGET_SONGS, len(existing_ids), existing_ids,
+            requests_per_second=SEARCH_REQUESTS_PER_SECOND, concurrency=SEARCH_CONCURRENCY,
+            resume_offsets=journal.cursor, on_page=journal.record_page,
+        )
+    else:
+        # Fetch songs with per-page checkpoints
+        songs1 = fetch_songs_from_search_with_saving(sp, TARGET_SONGS, len(existing_ids), existing_ids, journal)
     all_songs.extend(songs1)
     print(f"Fetched {len(songs1):,} new songs via search")
     
@@ -479,50 +445,26 @@ def main():
         all_songs.extend(songs3)
         print(f"Fetched {len(songs3):,} additional songs from categories")
     
-    # Remove duplicates based on spotify_id
+    # Remove duplicates based on spotify_id (existing songs keep their place first)
     print(f"\nRemoving duplicates...")
-    seen_ids = set()
-    unique_songs = []
-    
-    # Add existing songs if file exists
-    if os.path.exists(SONGS_OUTPUT):
-        try:
-            existing_df = pd.read_csv(SONGS_OUTPUT, sep=';')
-            for _, row in existing_df.iterrows():
-                if row['spotify_id'] not in seen_ids:
-                    seen_ids.add(row['spotify_id'])
-                    unique_songs.append({
-                        'spotify_id': row['spotify_id'],
-                        'name': row['name'],
-                        'artist': row['artist'],
-                        'position': len(unique_songs) + 1,
-                        'genre_name': row['genre_name']
-                    })
-        except:
-            pass
+    new_df = pd.DataFrame(all_songs, columns=SONG_COLUMNS)
+    df_output = pd.concat([existing_df, new_df], ignore_index=True).drop_duplicates('spotify_id')
     
-    # Add new songs
-    for song in all_songs:
-        if song['spotify_id'] not in seen_ids:
-            seen_ids.add(song['spotify_id'])
-            unique_songs.append(song)
-    
-    print(f"Total unique songs: {len(unique_songs):,}")
-    
-    # Convert to DataFrame
-    df = pd.DataFrame(unique_songs)
-    
-    # Reorder and select columns matching original format
-    df_output = df[['spotify_id', 'name', 'artist', 'position', 'genre_name']].copy()
-    df_output.columns = ['spotify_id', 'name', 'artist', 'position', 'genre_name']
+    print(f"Total unique songs: {len(df_output):,}")
     
     # Update positions
     df_output['position'] = range(1, len(df_output) + 1)
     
-    # Save to CSV with semicolon delimiter (matching original format)
-    df_output.to_csv(SONGS_OUTPUT, sep=';', index=False, quoting=1)
+    # Save to CSV with semicolon delimiter (matching original format).
+    # Written to a temp file first so a crash never leaves a half-written CSV.
+    tmp_output = SONGS_OUTPUT + '.tmp'
+    df_output.to_csv(tmp_output, sep=';', index=False, quoting=1)
+    os.replace(tmp_output, SONGS_OUTPUT)
     print(f"\n✅ Saved {len(df_output):,} songs to {SONGS_OUTPUT}")
     
+    # The songs now live in the CSV; keep only the search cursor in the journal
+    journal.compact()
+    
     # Print summary
     print("\n" + "=" * 60)
     print("Summary:")
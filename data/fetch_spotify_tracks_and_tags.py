@@ -4,118 +4,104 @@ Outputs:
   - songs_track_metadata.csv
   - spotify_tags.csv  (song_spotify_id, tag, popularity)
 Requires SPOTIFY_CLIENT_ID / SPOTIFY_CLIENT_SECRET env vars.
+
+Track and artist batches are fetched as one pipeline (metadata_pipeline.py):
+METADATA_REQUESTS_PER_SECOND (default 10) and METADATA_CONCURRENCY (requests in
+flight, default 8) control it. Artist genres are kept in a persistent index
+(artist_index.py); only artists that are new or stale are requested.
+If any batch still fails after its retries, nothing is written and the script
+exits non-zero; genres fetched so far stay in the artist index for the rerun.
 """
 
 import os
-import time
-from typing import List
+import sys
 
 import pandas as pd
-import spotipy
-from spotipy.oauth2 import SpotifyClientCredentials
+
+from artist_index import ArtistGenreIndex
+from metadata_pipeline import TRACK_COLUMNS, fetch_metadata_pipelined
+from spotify_cache import open_default_cache, pooled_session, spotify_client
 
 SONGS_FILE = "songs_fetched.csv"
 TRACK_OUTPUT = "spotify_track_metadata.csv"
 TAGS_OUTPUT = "spotify_tags.csv"
-BATCH_SIZE = 50
-SLEEP_SECONDS = 0.1
-
-
-def chunked(seq: List[str], size: int):
-    for idx in range(0, len(seq), size):
-        yield seq[idx: idx + size]
+# Track and artist requests share one rate limit and one connection pool
+METADATA_REQUESTS_PER_SECOND = float(os.getenv("METADATA_REQUESTS_PER_SECOND", "10"))
+METADATA_CONCURRENCY = int(os.getenv("METADATA_CONCURRENCY", "8"))
+TAG_CHUNK_ROWS = 200_000  # tracks per chunk when building the tag table
+
+
+def write_tags(track_path: str, artist_genres_df: pd.DataFrame, output_path: str,
+               chunk_rows: int = TAG_CHUNK_ROWS) -> int:
+    """
+    Build the (song_spotify_id, tag, popularity) table from track metadata and artist genres.
+    Tracks are read back in chunks, exploded to one row per artist and joined to the
+    artist's genres, so memory stays bounded by the chunk size, not the catalogue.
+    Returns the number of tag rows written.
+    """
+    genres = artist_genres_df[["artist_id", "genre_tag"]]
+    tmp_path = f"{output_path}.tmp"
+    total = 0
+    chunks = pd.read_csv(
+        track_path,
+        usecols=["spotify_id", "track_popularity", "artist_ids"],
+        dtype={"spotify_id": str, "artist_ids": str},
+        chunksize=chunk_rows,
+    )
+    for idx, chunk in enumerate(chunks):
+        chunk = chunk.assign(
+            artist_id=chunk["artist_ids"].fillna("").str.split("|"),
+            popularity=chunk["track_popularity"].fillna(0).astype(int),
+        ).explode("artist_id")
+        tags = chunk.merge(genres, on="artist_id", how="inner")
+        tags = tags.rename(columns={"spotify_id": "song_spotify_id", "genre_tag": "tag"})
+        tags[["song_spotify_id", "tag", "popularity"]].to_csv(
+            tmp_path, mode="w" if idx == 0 else "a", header=idx == 0, index=False
+        )
+        total += len(tags)
+    if total == 0:
+        pd.DataFrame(columns=["song_spotify_id", "tag", "popularity"]).to_csv(tmp_path, index=False)
+    os.replace(tmp_path, output_path)
+    return total
 
 
 def main():
     client_id = os.getenv("SPOTIFY_CLIENT_ID")
     client_secret = os.getenv("SPOTIFY_CLIENT_SECRET")
-    if not client_id or not client_secret:
-        raise RuntimeError("SPOTIFY_CLIENT_ID / SECRET not set")
-
-    sp = spotipy.Spotify(
-        client_credentials_manager=SpotifyClientCredentials(
-            client_id=client_id,
-            client_secret=client_secret,
-        )
-    )
+    cache = open_default_cache()
+    sp = spotify_client(client_id, client_secret, cache=cache,
+                        requests_session=pooled_session(METADATA_CONCURRENCY))
 
     songs = pd.read_csv(SONGS_FILE, sep=";")
     track_ids = songs["spotify_id"].dropna().astype(str).unique().tolist()
     print(f"Loaded {len(track_ids):,} tracks from {SONGS_FILE}")
 
-    track_rows = []
-    artist_ids = set()
-
-    for idx, batch in enumerate(chunked(track_ids, BATCH_SIZE), start=1):
-        data = sp.tracks(batch)
-        for track in data["tracks"]:
-            if track is None:
-                continue
-            tid = track["id"]
-            artists = track.get("artists", [])
-            artist_id_list = [artist["id"] for artist in artists if artist and artist.get("id")]
-            artist_ids.update(artist_id_list)
-            track_rows.append(
-                {
-                    "spotify_id": tid,
-                    "track_name": track["name"],
-                    "track_popularity": track.get("popularity"),
-                    "explicit": track.get("explicit"),
-                    "album_name": track["album"]["name"] if track.get("album") else None,
-                    "album_release_date": track["album"].get("release_date") if track.get("album") else None,
-                    "artist_ids": "|".join(artist_id_list),
-                }
-            )
-        if idx % 50 == 0:
-            print(f"Track metadata: processed {min(idx * BATCH_SIZE, len(track_ids)):,}/{len(track_ids):,}")
-        time.sleep(SLEEP_SECONDS)
-
-    track_df = pd.DataFrame(track_rows)
+    artist_index = ArtistGenreIndex()
+    known_artists = artist_index.fresh_ids()
+    print(f"Artist index {artist_index.path}: {len(known_artists):,} fresh of {len(artist_index):,} artists")
+
+    track_rows, _, failed = fetch_metadata_pipelined(
+        sp, track_ids, requests_per_second=METADATA_REQUESTS_PER_SECOND, max_in_flight=METADATA_CONCURRENCY,
+        known_artists=known_artists, on_artists=artist_index.record,
+    )
+    if failed["tracks"] or failed["artists"]:
+        artist_index.close()
+        sys.exit(f"Not writing {TRACK_OUTPUT} / {TAGS_OUTPUT}: {len(failed['tracks']):,} tracks and "
+                 f"{len(failed['artists']):,} artists could not be fetched; rerun to retry them")
+
+    track_df = pd.DataFrame(track_rows, columns=TRACK_COLUMNS)
     track_df.to_csv(TRACK_OUTPUT, index=False)
     print(f"Saved track metadata to {TRACK_OUTPUT} ({len(track_df):,} rows)")
 
-    artist_ids = [aid for aid in artist_ids if aid]
-    print(f"Fetching genres for {len(artist_ids):,} artist IDs")
-    artist_rows = []
-    for idx, batch in enumerate(chunked(artist_ids, BATCH_SIZE), start=1):
-        data = sp.artists(batch)
-        for artist in data["artists"]:
-            if artist is None:
-                continue
-            genres = artist.get("genres", [])
-            for genre in genres:
-                artist_rows.append(
-                    {
-                        "artist_id": artist["id"],
-                        "artist_name": artist["name"],
-                        "genre_tag": genre,
-                    }
-                )
-        if idx % 50 == 0:
-            print(f"Artist genres: processed {min(idx * BATCH_SIZE, len(artist_ids)):,}/{len(artist_ids):,}")
-        time.sleep(SLEEP_SECONDS)
-
-    artist_genres_df = pd.DataFrame(artist_rows)
-    artist_genres_df.to_csv("artist_genres_temp.csv", index=False)
-    print(f"Saved artist genres snapshot (debug) with {len(artist_genres_df):,} rows")
-
-    artist_genre_map = artist_genres_df.groupby("artist_id")["genre_tag"].apply(list).to_dict()
-    tag_rows = []
-    for _, row in track_df.iterrows():
-        popularity = row.get("track_popularity", 0)
-        for aid in (row["artist_ids"] or "").split("|"):
-            for genre in artist_genre_map.get(aid, []):
-                tag_rows.append(
-                    {
-                        "song_spotify_id": row["spotify_id"],
-                        "tag": genre,
-                        "popularity": popularity if pd.notna(popularity) else 0,
-                    }
-                )
-
-    tags_df = pd.DataFrame(tag_rows)
-    tags_df.to_csv(TAGS_OUTPUT, index=False)
-    print(f"Saved Spotify tags to {TAGS_OUTPUT} ({len(tags_df):,} rows)")
+    track_artist_ids = set(track_df["artist_ids"].str.split("|").explode().dropna())
+    artist_genres_df = artist_index.genre_frame(track_artist_ids)
+    artist_index.close()
+    print(f"Collected {len(artist_genres_df):,} artist genre rows")
+
+    tag_count = write_tags(TRACK_OUTPUT, artist_genres_df, TAGS_OUTPUT)
+    print(f"Saved Spotify tags to {TAGS_OUTPUT} ({tag_count:,} rows)")
+    if cache is not None:
+        print(f"Response cache: {cache.stats()}")
 
 
 if __name__ == "__main__":
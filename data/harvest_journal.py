@@ -0,0 +1,134 @@
+"""
+Append-only checkpoint journal for fetch_songs_data.py
+
+Each finished search page appends one JSON line holding the songs it added and
+the (term, next offset) cursor, then fsyncs. A checkpoint therefore costs the
+same however large the harvest already is. On restart, replaying the journal
+on top of songs_fetched.csv restores both the songs and the exact page each
+term stopped at.
+
+Record format (one per line):
+    {"term": "year:1990", "offset": 150, "next_offset": 200, "songs": [...]}
+next_offset is null once a term is finished.
+"""
+
+import json
+import os
+
+SONG_COLUMNS = ['spotify_id', 'name', 'artist', 'position', 'genre_name']
+
+
+def _truncate_torn_tail(path):
+    """Drop a partial last line left by a crash mid-write, so appends stay line-aligned"""
+    with open(path, 'rb+') as fh:
+        end = fh.seek(0, os.SEEK_END)
+        pos = end
+        while pos > 0:
+            step = min(65536, pos)
+            pos -= step
+            fh.seek(pos)
+            block = fh.read(step)
+            newline = block.rfind(b'\n')
+            if newline != -1:
+                keep = pos + newline + 1
+                if keep != end:
+                    fh.truncate(keep)
+                return
+        fh.truncate(0)
+
+
+class BatchJournal:
+    """
+    Append-only JSON-lines journal with one fsync per appended record.
+    A crash loses at most the record being written; replay() stops at a torn tail.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._fh = None
+
+    def replay(self):
+        """Yield every complete record; stops at a torn or corrupt tail"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'rb') as fh:
+            for line in fh:
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    break
+
+    def append(self, record):
+        """Durably append one record (a single write + fsync)"""
+        if self._fh is None:
+            if os.path.exists(self.path):
+                _truncate_torn_tail(self.path)
+            self._fh = open(self.path, 'a', encoding='utf-8')
+        self._fh.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self._fh.flush()
+        os.fsync(self._fh.fileno())
+
+    def discard(self):
+        """Delete the journal once its records have been written to their final output"""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def close(self):
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+
+class HarvestJournal(BatchJournal):
+    """Append-only, fsync-per-batch journal of harvested songs and search cursors"""
+
+    def __init__(self, path):
+        super().__init__(path)
+        # term -> next offset to request (None once the term is finished)
+        self.cursor = {}
+
+    def load(self, existing_ids):
+        """
+        Replay the journal and return the songs it holds that are not in existing_ids.
+        existing_ids is updated in place and self.cursor is restored.
+        """
+        songs = []
+        for record in self.replay():
+            self.cursor[record['term']] = record['next_offset']
+            for song in record.get('songs', []):
+                if song['spotify_id'] not in existing_ids:
+                    existing_ids.add(song['spotify_id'])
+                    songs.append(song)
+        return songs
+
+    def start_offset(self, term):
+        """Offset to resume `term` from, or None if it is already finished"""
+        return self.cursor.get(term, 0)
+
+    def record_page(self, term, offset, next_offset, songs):
+        """Durably append one finished page (a single write + fsync)"""
+        record = {
+            'term': term,
+            'offset': offset,
+            'next_offset': next_offset,
+            'songs': [{col: song[col] for col in SONG_COLUMNS} for song in songs],
+        }
+        self.append(record)
+        self.cursor[term] = next_offset
+
+    def compact(self):
+        """
+        Rewrite the journal keeping only the cursor.
+        Call after the songs have been written to songs_fetched.csv.
+        """
+        self.close()
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as fh:
+            for term, next_offset in self.cursor.items():
+                fh.write(json.dumps({'term': term, 'offset': None, 'next_offset': next_offset, 'songs': []}) + '\n')
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,181 @@
+"""
+Pipelined track -> artist metadata fetcher for fetch_spotify_tracks_and_tags.py
+
+The sequential fetcher requests every /tracks batch (with a fixed sleep after
+each), and only then starts on /artists. Here both stages share one thread
+pool and one TokenBucket:
+
+- at most `max_in_flight` requests are outstanding at any time
+- artist IDs found in a finished track batch are queued straight away, and a
+  full artist batch is dispatched ahead of the next track batch, so artist
+  requests run while track batches are still in flight
+- tokens are taken inside the client (rate_limit.gate_requests), so IDs the
+  response cache already holds cost no tokens
+- 429s pause the shared bucket for the server's Retry-After
+- a batch that fails for any other reason is resubmitted up to
+  MAX_BATCH_RETRIES times; IDs still failing after that are returned, so the
+  caller can refuse to write output that would silently miss them
+
+With a pooled session (spotify_cache.pooled_session) the worker threads reuse
+keep-alive connections, and total time approaches the longer of the two stages
+rather than their sum.
+"""
+
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from spotipy.exceptions import SpotifyException
+
+from rate_limit import TokenBucket, gate_requests, retry_after_seconds
+
+BATCH_SIZE = 50  # Spotify allows up to 50 IDs per /tracks and /artists call
+MAX_RATE_LIMIT_RETRIES = 8
+MAX_BATCH_RETRIES = 2  # resubmissions of a batch that failed with a non-429 error
+TRACK_COLUMNS = [
+    "spotify_id", "track_name", "track_popularity", "explicit",
+    "album_name", "album_release_date", "artist_ids",
+]
+
+
+def track_to_row(track):
+    """Flatten one /tracks object into a track metadata row"""
+    artists = track.get("artists", [])
+    artist_id_list = [artist["id"] for artist in artists if artist and artist.get("id")]
+    return {
+        "spotify_id": track["id"],
+        "track_name": track["name"],
+        "track_popularity": track.get("popularity"),
+        "explicit": track.get("explicit"),
+        "album_name": track["album"]["name"] if track.get("album") else None,
+        "album_release_date": track["album"].get("release_date") if track.get("album") else None,
+        "artist_ids": "|".join(artist_id_list),
+    }
+
+
+def artist_to_rows(artist):
+    """One (artist_id, artist_name, genre_tag) row per genre of an /artists object"""
+    return [
+        {"artist_id": artist["id"], "artist_name": artist["name"], "genre_tag": genre}
+        for genre in artist.get("genres", [])
+    ]
+
+
+def call_with_backoff(bucket, fetch, batch, wait=True):
+    """
+    Run fetch(batch), honouring Retry-After on 429.
+    wait=False when the client takes its own tokens (rate_limit.gate_requests).
+    """
+    for attempt in range(MAX_RATE_LIMIT_RETRIES):
+        if wait:
+            bucket.wait()
+        try:
+            return fetch(batch)
+        except SpotifyException as e:
+            if e.http_status != 429:
+                raise
+            bucket.pause(retry_after_seconds(getattr(e, "headers", None), default=2 ** attempt))
+    raise RuntimeError(f"Still rate limited after {MAX_RATE_LIMIT_RETRIES} retries")
+
+
+def fetch_metadata_pipelined(sp, track_ids, requests_per_second=10.0, max_in_flight=8, batch_size=BATCH_SIZE,
+                             known_artists=None, on_artists=None):
+    """
+    Fetch track metadata for track_ids and genres for every artist on those tracks.
+    Returns (track_rows, artist_rows, failed); track rows follow the order of track_ids,
+    and failed maps "tracks" / "artists" to the IDs whose batches still failed
+    after MAX_BATCH_RETRIES resubmissions (empty lists on a complete run).
+
+    Artists in known_artists are not requested (their genres are already known).
+    on_artists(artist_ids, artists) is called for every completed artist batch,
+    with None in artists where Spotify has no such artist.
+    """
+    known_artists = known_artists or set()
+    track_batches = [track_ids[idx: idx + batch_size] for idx in range(0, len(track_ids), batch_size)]
+    track_results = [None] * len(track_batches)
+    artist_rows = []
+    seen_artists = set()
+    artist_queue = []
+    next_track_batch = 0
+    tracks_done = 0
+    artists_requested = 0
+    failed = {"tracks": [], "artists": []}
+
+    bucket = TokenBucket(requests_per_second)
+    executor = ThreadPoolExecutor(max_workers=max_in_flight)
+    in_flight = {}
+
+    def fetch_tracks(batch):
+        return sp.tracks(batch)["tracks"]
+
+    def fetch_artists(batch):
+        return sp.artists(batch)["artists"]
+
+    def submit(stage, idx, batch, attempt=0):
+        fetch = fetch_tracks if stage == "tracks" else fetch_artists
+        future = executor.submit(call_with_backoff, bucket, fetch, batch, not client_gated)
+        in_flight[future] = (stage, idx, batch, attempt)
+
+    def submit_next():
+        """Fill a free slot: a full artist batch first, then a track batch, then leftover artists"""
+        nonlocal next_track_batch, artists_requested
+        tracks_left = next_track_batch < len(track_batches)
+        if len(artist_queue) >= batch_size or (artist_queue and not tracks_left):
+            batch = artist_queue[:batch_size]
+            del artist_queue[:batch_size]
+            artists_requested += len(batch)
+            submit("artists", None, batch)
+            return True
+        if tracks_left:
+            idx = next_track_batch
+            next_track_batch += 1
+            submit("tracks", idx, track_batches[idx])
+            return True
+        return False
+
+    with gate_requests(sp, bucket) as client_gated:
+        try:
+            while True:
+                while len(in_flight) < max_in_flight and submit_next():
+                    pass
+                if not in_flight:
+                    break
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage, idx, batch, attempt = in_flight.pop(future)
+                    try:
+                        objects = future.result()
+                    except Exception as e:
+                        if attempt < MAX_BATCH_RETRIES:
+                            print(f"Error fetching {stage} batch ({len(batch)} IDs), retrying: {e}")
+                            submit(stage, idx, batch, attempt + 1)
+                            continue
+                        print(f"Error fetching {stage} batch ({len(batch)} IDs), giving up: {e}")
+                        failed[stage].extend(batch)
+                        objects = []
+
+                    if stage == "tracks":
+                        rows = [track_to_row(track) for track in objects if track is not None]
+                        track_results[idx] = rows
+                        for row in rows:
+                            for aid in row["artist_ids"].split("|"):
+                                if aid and aid not in seen_artists and aid not in known_artists:
+                                    seen_artists.add(aid)
+                                    artist_queue.append(aid)
+                        tracks_done += 1
+                        if tracks_done % 50 == 0:
+                            print(f"Track metadata: processed {min(tracks_done * batch_size, len(track_ids)):,}"
+                                  f"/{len(track_ids):,} (artists queued: {len(seen_artists):,})")
+                    else:
+                        if on_artists is not None and objects:
+                            on_artists(batch, objects)
+                        for artist in objects:
+                            if artist is not None:
+                                artist_rows.extend(artist_to_rows(artist))
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    print(f"Fetched {len(track_batches):,} track batches and {artists_requested:,} artists")
+    if failed["tracks"] or failed["artists"]:
+        print(f"⚠️  Failed after {MAX_BATCH_RETRIES} retries: {len(failed['tracks']):,} tracks, "
+              f"{len(failed['artists']):,} artists")
+    track_rows = [row for rows in track_results if rows for row in rows]
+    return track_rows, artist_rows, failed
@@ -0,0 +1,91 @@
+"""
+Shared rate limiting helpers for the Spotify fetch scripts.
+
+A single TokenBucket is shared by every request a fetcher makes, whether it
+is issued from a thread (time.sleep) or from asyncio (await). A 429 response
+pauses the whole bucket for the server's Retry-After instead of each caller
+sleeping blindly.
+
+gate_requests(client, bucket) hands the bucket to a client with a
+request_gate hook (spotify_cache.CachedSpotify), which then takes a token
+only for requests that miss its response cache.
+"""
+
+import asyncio
+import threading
+import time
+from contextlib import contextmanager
+
+
+class TokenBucket:
+    """Thread-safe token bucket allowing `rate` requests per second on average"""
+
+    def __init__(self, rate, capacity=None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        # Default burst: one second worth of requests
+        self.capacity = float(capacity) if capacity is not None else max(1.0, self.rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self):
+        """Take one token and return how many seconds the caller must wait before using it"""
+        with self._lock:
+            now = time.monotonic()
+            if now > self._updated:
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+            self._tokens -= 1.0
+            ready_at = self._updated + max(0.0, -self._tokens) / self.rate
+            return max(0.0, ready_at - now)
+
+    def pause(self, seconds):
+        """Hand out no tokens for the next `seconds` (used for 429 Retry-After)"""
+        with self._lock:
+            until = time.monotonic() + max(0.0, seconds)
+            if until > self._updated:
+                self._updated = until
+            self._tokens = min(self._tokens, 0.0)
+
+    def wait(self):
+        """Block the calling thread until a request may be sent"""
+        delay = self._reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire(self):
+        """Asyncio equivalent of wait()"""
+        delay = self._reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+def retry_after_seconds(headers, default=1.0):
+    """Read Retry-After (seconds) from response headers, falling back to `default`"""
+    if not headers:
+        return default
+    value = headers.get('Retry-After') or headers.get('retry-after')
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return default
+
+
+@contextmanager
+def gate_requests(client, bucket):
+    """
+    Within the block, client waits on bucket right before each network request.
+    Yields True when the client took the bucket, False when it has no request_gate
+    hook (the caller must then wait on the bucket itself before every call).
+    """
+    if not hasattr(client, 'request_gate'):
+        yield False
+        return
+    previous = client.request_gate
+    client.request_gate = bucket.wait
+    try:
+        yield True
+    finally:
+        client.request_gate = previous
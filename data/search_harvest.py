@@ -0,0 +1,205 @@
+"""
+Concurrent search harvester for fetch_songs_data.py
+
+The sequential fetcher walks every (term, offset) search page one after the
+other with a fixed sleep after each call. This module issues many page
+requests at once through a thread pool, bounded by a shared TokenBucket
+(requests per second), and backs off for the server's Retry-After on 429s.
+Tokens are only spent on pages the response cache does not already hold.
+
+Pages may complete in any order, so results are merged in (term, offset)
+order with exactly the sequential rules: first-seen dedupe on spotify_id,
+a term stops at its first empty page or first page without new songs, and
+everything stops at the target count. A page that fails (other than a 429)
+ends its term for this run like the sequential loop's except branch, but is
+not reported to on_page: the journal cursor stays at the failed offset and a
+restarted run retries it. Given the same API responses the output is
+identical to fetch_songs_from_search_with_saving.
+"""
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from spotipy.exceptions import SpotifyException
+from tqdm import tqdm
+
+from rate_limit import TokenBucket, gate_requests, retry_after_seconds
+
+PAGE_SIZE = 50
+MAX_OFFSET = 1000  # Spotify allows up to 1000 results per search
+MAX_RATE_LIMIT_RETRIES = 8
+_FAILED = object()  # page whose request raised; never merged as an empty page
+
+
+def search_result_to_song(track, term, genres, position):
+    """Convert one search result into a song row, labelling the genre from the search term"""
+    genre = 'mixed'
+    if ':' in term:
+        genre = term.split(':')[1].strip()
+    elif term in genres:
+        genre = term
+
+    return {
+        'spotify_id': track['id'],
+        'name': track['name'],
+        'artist': ', '.join([artist['name'] for artist in track['artists']]),
+        'position': position,
+        'genre_name': genre,
+        'popularity': track.get('popularity', 0),
+        'duration_ms': track.get('duration_ms', 0),
+        'album': track['album']['name'] if track.get('album') else '',
+        'playlist_name': 'search'
+    }
+
+
+async def search_page(sp, bucket, executor, term, offset, wait=True):
+    """
+    Fetch one search page, honouring Retry-After on 429.
+    wait=False when sp takes its own tokens (rate_limit.gate_requests), so cached pages cost none.
+    """
+    loop = asyncio.get_running_loop()
+    call = functools.partial(sp.search, q=term, type='track', limit=PAGE_SIZE, offset=offset, market='US')
+    for attempt in range(MAX_RATE_LIMIT_RETRIES):
+        if wait:
+            await bucket.acquire()
+        try:
+            return await loop.run_in_executor(executor, call)
+        except SpotifyException as e:
+            if e.http_status != 429:
+                raise
+            delay = retry_after_seconds(getattr(e, 'headers', None), default=2 ** attempt)
+            bucket.pause(delay)
+    raise RuntimeError(f"Still rate limited after {MAX_RATE_LIMIT_RETRIES} retries")
+
+
+async def harvest_search(sp, search_terms, genres, target_count, current_count, existing_ids,
+                         requests_per_second=10.0, concurrency=16, resume_offsets=None, on_page=None):
+    """
+    Fetch songs for all search terms concurrently.
+    existing_ids is updated in place, like the sequential fetchers.
+
+    resume_offsets maps term -> offset to start from (None = term already finished).
+    on_page(term, offset, next_offset, new_songs) is called for every merged page,
+    in order, so a checkpoint journal can record the cursor. Failed pages are not
+    reported, so their term resumes from the failed offset.
+    """
+    resume_offsets = resume_offsets or {}
+    # Offset each term starts from; None (or past the end) means nothing left to fetch
+    starts = []
+    for term in search_terms:
+        start = resume_offsets.get(term, 0)
+        starts.append(start if start is not None and start < MAX_OFFSET else None)
+
+    bucket = TokenBucket(requests_per_second)
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    songs_data = []
+
+    # Pages that arrived but are not merged yet: (term_idx, offset) -> items (_FAILED on error)
+    pages = {}
+    # Offset of the first empty/failed page per term; later pages are not needed
+    exhausted = {}
+    cursor = {'term_idx': 0, 'offset': 0, 'done': False}
+    progress = tqdm(total=len(search_terms), desc="Search terms")
+
+    queue = asyncio.Queue()
+    for term_idx, start in enumerate(starts):
+        if start is not None:
+            for offset in range(start, MAX_OFFSET, PAGE_SIZE):
+                queue.put_nowait((term_idx, offset))
+
+    def move_to_term(term_idx):
+        """Point the merge cursor at the next term that still has pages to fetch"""
+        while term_idx < len(search_terms) and starts[term_idx] is None:
+            progress.update(1)
+            term_idx += 1
+        cursor['term_idx'] = term_idx
+        if term_idx >= len(search_terms):
+            cursor['done'] = True
+        else:
+            cursor['offset'] = starts[term_idx]
+
+    def finish_term():
+        term_idx = cursor['term_idx']
+        for offset in range(0, MAX_OFFSET, PAGE_SIZE):
+            pages.pop((term_idx, offset), None)
+        progress.update(1)
+        move_to_term(term_idx + 1)
+
+    def merge_ready_pages():
+        """Apply the sequential dedupe/stop rules to every page that is next in order"""
+        while not cursor['done'] and (cursor['term_idx'], cursor['offset']) in pages:
+            term_idx, offset = cursor['term_idx'], cursor['offset']
+            term = search_terms[term_idx]
+            items = pages.pop((term_idx, offset))
+            if items is _FAILED:
+                # Leave the term's cursor at this offset so the next run retries it
+                finish_term()
+                continue
+
+            first_new = len(songs_data)
+            new_songs_this_batch = 0
+            for track in items or []:
+                if current_count + len(songs_data) >= target_count:
+                    break
+                if track['id'] and track['id'] not in existing_ids:
+                    existing_ids.add(track['id'])
+                    songs_data.append(search_result_to_song(
+                        track, term, genres, current_count + len(songs_data) + 1
+                    ))
+                    new_songs_this_batch += 1
+
+            if current_count + len(songs_data) >= target_count:
+                next_offset = offset + PAGE_SIZE if offset + PAGE_SIZE < MAX_OFFSET else None
+                cursor['done'] = True
+            elif new_songs_this_batch == 0 or offset + PAGE_SIZE >= MAX_OFFSET:
+                next_offset = None
+                finish_term()
+            else:
+                next_offset = offset + PAGE_SIZE
+                cursor['offset'] = next_offset
+
+            if on_page is not None:
+                on_page(term, offset, next_offset, songs_data[first_new:])
+
+    async def worker():
+        while not cursor['done']:
+            try:
+                term_idx, offset = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            if term_idx < cursor['term_idx'] or offset > exhausted.get(term_idx, MAX_OFFSET):
+                continue
+
+            term = search_terms[term_idx]
+            try:
+                results = await search_page(sp, bucket, executor, term, offset, wait=not client_gated)
+                items = results['tracks']['items']
+            except Exception as e:
+                print(f"Error searching for {term} at offset {offset}: {e} (retried on the next run)")
+                items = _FAILED
+
+            if items is _FAILED or not items:
+                exhausted[term_idx] = min(offset, exhausted.get(term_idx, MAX_OFFSET))
+            pages[(term_idx, offset)] = items
+            merge_ready_pages()
+
+    move_to_term(0)
+    with gate_requests(sp, bucket) as client_gated:
+        try:
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+        finally:
+            progress.close()
+            executor.shutdown(wait=False)
+
+    return songs_data
+
+
+def fetch_songs_from_search_concurrent(sp, search_terms, genres, target_count, current_count, existing_ids,
+                                       requests_per_second=10.0, concurrency=16, resume_offsets=None, on_page=None):
+    """Synchronous entry point for harvest_search"""
+    return asyncio.run(harvest_search(
+        sp, search_terms, genres, target_count, current_count, existing_ids,
+        requests_per_second=requests_per_second, concurrency=concurrency,
+        resume_offsets=resume_offsets, on_page=on_page,
+    ))
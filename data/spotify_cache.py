@@ -0,0 +1,393 @@
+"""
+Persistent on-disk cache for Spotify Web API responses
+
+Shared by all fetch scripts (fetch_songs_data.py, fetch_spotify_tracks_and_tags.py,
+fetch_audio_features.py, fetch_audio_features_alternative.py), so data one
+script pulled is never requested again by another or by a re-run.
+
+- Backed by a single SQLite file (stdlib, safe across threads and processes)
+- Keyed by endpoint + normalized query params
+- Batch endpoints (/tracks, /artists, /audio-features) are cached per ID, so a
+  repeat run only requests IDs that are not cached yet
+- Per-endpoint TTLs and size-bounded LRU eviction; "no such object" results
+  (None payloads) expire after NEGATIVE_TTL whatever their endpoint
+- CachedSpotify.request_gate, when set, is called right before each network
+  request, so a shared rate limiter only spends tokens on cache misses
+- SPOTIFY_CACHE_OFFLINE=1 serves everything from the cache and never touches
+  the network (a cache miss raises OfflineCacheMiss)
+
+Environment:
+    SPOTIFY_CACHE_PATH     cache file (default: spotify_cache.sqlite)
+    SPOTIFY_CACHE_MAX_MB   size bound before LRU eviction (default: 1024)
+    SPOTIFY_CACHE_OFFLINE  1 = replay from cache only
+    SPOTIFY_CACHE_DISABLE  1 = no caching at all
+    SPOTIFY_API_BASE       Web API root (default: https://api.spotify.com/v1/); point it
+                           at spotify_standin.py to run the fetchers locally
+    SPOTIFY_TOKEN_URL      client-credentials token endpoint
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from urllib.parse import urlencode, urlsplit, parse_qsl
+
+import requests
+import spotipy
+from requests.adapters import HTTPAdapter
+from spotipy.oauth2 import SpotifyClientCredentials
+from urllib3.util.retry import Retry
+
+CACHE_PATH = os.getenv('SPOTIFY_CACHE_PATH', 'spotify_cache.sqlite')
+CACHE_MAX_MB = float(os.getenv('SPOTIFY_CACHE_MAX_MB', '1024'))
+CACHE_OFFLINE = os.getenv('SPOTIFY_CACHE_OFFLINE', '') == '1'
+CACHE_DISABLE = os.getenv('SPOTIFY_CACHE_DISABLE', '') == '1'
+
+DEFAULT_API_BASE = 'https://api.spotify.com/v1/'
+API_BASE = os.getenv('SPOTIFY_API_BASE', DEFAULT_API_BASE)
+TOKEN_URL = os.getenv('SPOTIFY_TOKEN_URL', 'https://accounts.spotify.com/api/token')
+
+DAY = 24 * 3600
+# Seconds before a cached response is considered stale (None = never)
+DEFAULT_TTLS = {
+    'search': 7 * DAY,           # search rankings drift
+    'playlists': 1 * DAY,        # editorial playlists change daily
+    'tracks': 30 * DAY,          # popularity moves slowly
+    'artists': 30 * DAY,         # genres rarely change
+    'audio-features': None,      # static per track
+}
+DEFAULT_TTL = 7 * DAY
+# None payloads (e.g. audio features Spotify has not computed yet) are re-requested after this
+NEGATIVE_TTL = 7 * DAY
+
+# Endpoints that take ?ids=a,b,c and are cached per ID
+BATCH_ENDPOINTS = {'tracks': 'tracks', 'artists': 'artists', 'audio-features': 'audio_features'}
+
+_SQL_VARS = 500  # stay below SQLite's bound-parameter limit
+
+
+class OfflineCacheMiss(RuntimeError):
+    """Raised in offline mode when a response is not in the cache"""
+
+
+def endpoint_of(path):
+    """'playlists/37i9.../tracks' -> 'playlists'"""
+    return path.strip('/').split('/', 1)[0]
+
+
+def make_key(path, params=None):
+    """Cache key: endpoint path plus its query params sorted by name, with None values dropped"""
+    items = sorted((str(k), str(v)) for k, v in (params or {}).items() if v is not None)
+    return path.strip('/') + ('?' + urlencode(items) if items else '')
+
+
+def item_key(endpoint, item_id):
+    """Cache key of a single object from a batch endpoint"""
+    return f'{endpoint}/{item_id}'
+
+
+class ResponseCache:
+    """SQLite-backed response store with per-endpoint TTLs and LRU eviction"""
+
+    def __init__(self, path=CACHE_PATH, max_bytes=int(CACHE_MAX_MB * 1024 * 1024), ttls=None, offline=CACHE_OFFLINE):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.offline = offline
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS responses ('
+            ' key TEXT PRIMARY KEY, endpoint TEXT NOT NULL, body BLOB NOT NULL,'
+            ' size INTEGER NOT NULL, stored_at REAL NOT NULL, accessed_at REAL NOT NULL)'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS responses_lru ON responses (accessed_at)')
+        self._total_bytes = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+
+    def _fresh(self, endpoint, stored_at, now, negative=False):
+        ttl = NEGATIVE_TTL if negative else self.ttls.get(endpoint, DEFAULT_TTL)
+        return ttl is None or stored_at + ttl >= now
+
+    def get_many(self, keys):
+        """Return {key: payload} for every key that is cached and fresh"""
+        now = time.time()
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), _SQL_VARS):
+                chunk = keys[start:start + _SQL_VARS]
+                marks = ','.join('?' * len(chunk))
+                rows = self._conn.execute(
+                    f'SELECT key, endpoint, body, stored_at FROM responses WHERE key IN ({marks})', chunk
+                ).fetchall()
+                for key, endpoint, body, stored_at in rows:
+                    payload = json.loads(zlib.decompress(body))
+                    if self._fresh(endpoint, stored_at, now, negative=payload is None):
+                        found[key] = payload
+                hit_keys = [key for key in chunk if key in found]
+                if hit_keys:
+                    marks = ','.join('?' * len(hit_keys))
+                    self._conn.execute(f'UPDATE responses SET accessed_at = ? WHERE key IN ({marks})', [now] + hit_keys)
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def get(self, key):
+        """Return (hit, payload); a cached payload may itself be None"""
+        found = self.get_many([key])
+        return (True, found[key]) if key in found else (False, None)
+
+    def put_many(self, items):
+        """Store {key: payload}; each key's endpoint decides its TTL"""
+        if not items:
+            return
+        now = time.time()
+        rows = []
+        for key, payload in items.items():
+            body = zlib.compress(json.dumps(payload, separators=(',', ':')).encode('utf-8'))
+            rows.append((key, endpoint_of(key.split('?', 1)[0]), body, len(body), now, now))
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                for start in range(0, len(rows), _SQL_VARS):
+                    chunk = [row[0] for row in rows[start:start + _SQL_VARS]]
+                    marks = ','.join('?' * len(chunk))
+                    replaced = self._conn.execute(
+                        f'SELECT COALESCE(SUM(size), 0) FROM responses WHERE key IN ({marks})', chunk
+                    ).fetchone()[0]
+                    self._total_bytes -= replaced
+                self._conn.executemany('INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)', rows)
+                self._total_bytes += sum(row[3] for row in rows)
+                if self._total_bytes > self.max_bytes:
+                    self._evict()
+                self._conn.execute('COMMIT')
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+
+    def put(self, key, payload):
+        self.put_many({key: payload})
+
+    def _evict(self):
+        """Drop least recently used entries until the cache is back under 90% of max_bytes"""
+        target = int(self.max_bytes * 0.9)
+        while self._total_bytes > target:
+            rows = self._conn.execute('SELECT key, size FROM responses ORDER BY accessed_at LIMIT 1000').fetchall()
+            if not rows:
+                self._total_bytes = 0
+                return
+            victims = []
+            for key, size in rows:
+                if self._total_bytes <= target:
+                    break
+                victims.append((key,))
+                self._total_bytes -= size
+            self._conn.executemany('DELETE FROM responses WHERE key = ?', victims)
+
+    def stats(self):
+        with self._lock:
+            entries = self._conn.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+        return {'entries': entries, 'bytes': self._total_bytes, 'hits': self.hits, 'misses': self.misses}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class CachedSpotify(spotipy.Spotify):
+    """
+    spotipy client that answers from a ResponseCache before going to the network.
+    request_gate (e.g. TokenBucket.wait) is called before every request that
+    actually goes out; cache hits never reach it.
+    """
+
+    def __init__(self, *args, cache=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cache = cache
+        self.request_gate = None
+
+    def _wait_for_gate(self):
+        if self.request_gate is not None:
+            self.request_gate()
+
+    def _get(self, url, args=None, payload=None, **kwargs):
+        if args:
+            kwargs.update(args)
+        if self.cache is None:
+            self._wait_for_gate()
+            return super()._get(url, payload=payload, **kwargs)
+
+        # sp.next() passes absolute URLs with the query already encoded
+        parts = urlsplit(url)
+        path = parts.path
+        if path.startswith(urlsplit(self.prefix).path):
+            path = path[len(urlsplit(self.prefix).path):]
+        params = dict(parse_qsl(parts.query), **kwargs)
+        key = make_key(path, params)
+
+        hit, cached = self.cache.get(key)
+        if hit:
+            return cached
+        if self.cache.offline:
+            raise OfflineCacheMiss(f"Not cached (offline mode): {key}")
+        self._wait_for_gate()
+        result = super()._get(url, payload=payload, **kwargs)
+        self.cache.put(key, result)
+        return result
+
+    def _cached_batch(self, endpoint, ids, fetch_missing):
+        """Return objects for ids (None where Spotify has none), fetching only uncached IDs"""
+        if self.cache is None:
+            return fetch_missing(ids)
+        keys = [item_key(endpoint, item_id) for item_id in ids]
+        found = self.cache.get_many(keys)
+        missing = [item_id for item_id, key in zip(ids, keys) if key not in found]
+        if missing:
+            if self.cache.offline:
+                raise OfflineCacheMiss(f"{len(missing)} {endpoint} IDs not cached (offline mode)")
+            fetched = fetch_missing(missing)
+            new_items = {item_key(endpoint, item_id): obj for item_id, obj in zip(missing, fetched)}
+            self.cache.put_many(new_items)
+            found.update(new_items)
+        return [found[key] for key in keys]
+
+    def _uncached_ids_get(self, endpoint, ids, **kwargs):
+        # Batch request that bypasses the key-level cache (entries are stored per ID instead)
+        self._wait_for_gate()
+        return spotipy.Spotify._get(self, f"{endpoint}/?ids=" + ",".join(ids), **kwargs)
+
+    def tracks(self, tracks, market=None):
+        ids = [self._get_id('track', t) for t in tracks]
+        objs = self._cached_batch(
+            'tracks', ids, lambda missing: self._uncached_ids_get('tracks', missing, market=market)['tracks']
+        )
+        return {'tracks': objs}
+
+    def artists(self, artists):
+        ids = [self._get_id('artist', a) for a in artists]
+        objs = self._cached_batch(
+            'artists', ids, lambda missing: self._uncached_ids_get('artists', missing)['artists']
+        )
+        return {'artists': objs}
+
+    def audio_features(self, tracks=[]):
+        if isinstance(tracks, str):
+            return self.audio_features([tracks])
+        ids = [self._get_id('track', t) for t in tracks]
+        return self._cached_batch(
+            'audio-features', ids,
+            lambda missing: self._uncached_ids_get('audio-features', missing)['audio_features']
+        )
+
+
+def open_default_cache():
+    """ResponseCache configured from the environment, or None when caching is disabled"""
+    if CACHE_DISABLE:
+        return None
+    return ResponseCache()
+
+
+def credentials_required(cache=None):
+    """Real credentials are only needed when talking to the real API over the network"""
+    offline = cache is not None and cache.offline
+    return not offline and API_BASE == DEFAULT_API_BASE
+
+
+def pooled_session(pool_size):
+    """
+    requests.Session keeping up to pool_size keep-alive connections per host, for
+    clients shared by several threads. Server errors are retried; 429s are not, so
+    callers see them (with Retry-After) and can back off a shared rate limiter.
+    """
+    session = requests.Session()
+    retry = Retry(total=3, backoff_factor=0.3, status_forcelist=(500, 502, 503, 504), allowed_methods=False)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def spotify_client(client_id, client_secret, cache=None, **kwargs):
+    """
+    Build a CachedSpotify client for the fetch scripts.
+    In offline mode, or against a local stand-in (SPOTIFY_API_BASE), no credentials
+    are needed.
+    """
+    if not credentials_required(cache):
+        sp = CachedSpotify(auth='local', cache=cache, **kwargs)
+        sp.prefix = API_BASE
+        return sp
+    if not client_id or not client_secret:
+        raise RuntimeError("SPOTIFY_CLIENT_ID / SECRET not set. Run: source setup_spotify.sh")
+    return CachedSpotify(
+        client_credentials_manager=SpotifyClientCredentials(client_id=client_id, client_secret=client_secret),
+        cache=cache,
+        **kwargs,
+    )
+
+
+class CachedResponse:
+    """Minimal stand-in for requests.Response built from cached JSON"""
+
+    def __init__(self, payload, status_code=200):
+        self._payload = payload
+        self.status_code = status_code
+        self.headers = {}
+        self.text = json.dumps(payload)
+
+    def json(self):
+        return self._payload
+
+
+def cached_http_get(cache, url, headers=None, params=None, session=None):
+    """
+    requests.get() through the cache, for scripts that call the Web API directly.
+    Only 200 responses are stored; errors are always returned live.
+    """
+    http = session or requests
+    if cache is None:
+        return http.get(url, headers=headers, params=params)
+    path = urlsplit(url).path
+    if path.startswith(urlsplit(API_BASE).path):
+        path = path[len(urlsplit(API_BASE).path):]
+    key = make_key(path, params)
+    hit, cached = cache.get(key)
+    if hit:
+        return CachedResponse(cached)
+    if cache.offline:
+        raise OfflineCacheMiss(f"Not cached (offline mode): {key}")
+    response = http.get(url, headers=headers, params=params)
+    if response.status_code == 200:
+        cache.put(key, response.json())
+    return response
+
+
+def cached_http_batch(cache, endpoint, ids, fetch_missing):
+    """
+    Per-ID cached version of a raw ?ids= batch call.
+    fetch_missing(ids) must return a requests.Response whose JSON holds the objects
+    under the endpoint's key (e.g. 'audio_features'). Returns a response-like object.
+    """
+    field = BATCH_ENDPOINTS[endpoint]
+    if cache is None:
+        return fetch_missing(ids)
+    keys = [item_key(endpoint, item_id) for item_id in ids]
+    found = cache.get_many(keys)
+    missing = [item_id for item_id, key in zip(ids, keys) if key not in found]
+    if missing:
+        if cache.offline:
+            raise OfflineCacheMiss(f"{len(missing)} {endpoint} IDs not cached (offline mode)")
+        response = fetch_missing(missing)
+        if response.status_code != 200:
+            return response
+        objs = response.json().get(field, [])
+        new_items = {item_key(endpoint, item_id): (objs[i] if i < len(objs) else None)
+                     for i, item_id in enumerate(missing)}
+        cache.put_many(new_items)
+        found.update(new_items)
+    return CachedResponse({field: [found[key] for key in keys]})
@@ -0,0 +1,360 @@
+"""
+Local stand-in for the Spotify Web API
+
+Serves /search, /tracks, /artists, /audio-features, /playlists/{id}[/tracks]
+and the client-credentials token endpoint from fixtures, so the fetch scripts
+can be run, tuned and regression-tested without credentials or network.
+
+Fixtures come from either:
+  - a recorded response cache (spotify_cache.sqlite, see spotify_cache.py),
+  - a JSON fixture file written by --save-fixtures, or
+  - a deterministic synthetic catalogue (default).
+
+Faults can be injected to exercise the fetchers' error handling:
+  --latency-ms / --jitter-ms   per-request delay
+  --rate-429 P                 fraction of requests answered 429 + Retry-After
+  --forbid ENDPOINT            answer 403 for an endpoint (e.g. audio-features)
+
+Usage:
+    python spotify_standin.py --port 8765 --latency-ms 40 --rate-429 0.01
+    export SPOTIFY_API_BASE=http://127.0.0.1:8765/v1/
+    export SPOTIFY_TOKEN_URL=http://127.0.0.1:8765/api/token
+    python fetch_songs_data.py
+"""
+
+import argparse
+import json
+import random
+import sqlite3
+import threading
+import time
+import zlib
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+BASE62 = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'
+SYNTHETIC_GENRES = [
+    'pop', 'dance pop', 'rock', 'classic rock', 'hip hop', 'rap', 'trap', 'r&b', 'soul',
+    'jazz', 'bebop', 'country', 'modern country rock', 'edm', 'house', 'techno', 'indie rock',
+    'indie pop', 'alternative rock', 'metal', 'punk', 'folk', 'blues', 'classical', 'k-pop',
+    'j-pop', 'latin pop', 'reggaeton', 'salsa', 'bossa nova', 'funk', 'disco', 'gospel',
+]
+# Playlist IDs requested by fetch_songs_data.py
+PLAYLIST_IDS = [
+    '37i9dQZF1DXcBWIGoYBM5M', '37i9dQZF1DX0XUsuxWHRQd', '37i9dQZF1DX4o1oenSJRJd',
+    '37i9dQZF1DX76t638VZCAQ', '37i9dQZF1DXbITWG1ZJKYt', '37i9dQZF1DX4sWSpwq3LiO',
+    '37i9dQZF1DX4sSPT1KXqQO', '37i9dQZF1DX4JAvHpjipBk', '37i9dQZF1DXcF6B6QPhFDv',
+    '37i9dQZF1DX10zKzsJ2jqH', '37i9dQZF1DX0kbJZpiYdSz', '37i9dQZF1DX4dyzvuaRJ0n',
+    '37i9dQZF1DX4UtSsGT1Sbe', '37i9dQZF1DX2sUQwD7tbmL',
+]
+MAX_SEARCH_RESULTS = 1000
+
+
+def _spotify_id(rng):
+    return ''.join(rng.choice(BASE62) for _ in range(22))
+
+
+class Fixtures:
+    """Objects the stand-in serves, keyed the same way as spotify_cache.py"""
+
+    def __init__(self):
+        self.tracks = {}
+        self.artists = {}
+        self.audio_features = {}
+        self.playlists = {}   # id -> {'id', 'name', 'track_ids'}
+        self.responses = {}   # recorded GET responses by cache key (search pages, ...)
+        self._search_lock = threading.Lock()
+        self._search_results = {}
+
+    @classmethod
+    def synthetic(cls, n_tracks=60000, n_artists=8000, seed=42):
+        """Deterministic synthetic catalogue with Spotify-shaped objects"""
+        rng = random.Random(seed)
+        fx = cls()
+        artist_ids = [_spotify_id(rng) for _ in range(n_artists)]
+        for idx, aid in enumerate(artist_ids):
+            fx.artists[aid] = {
+                'id': aid,
+                'name': f'Artist {idx}',
+                'genres': rng.sample(SYNTHETIC_GENRES, rng.choice([0, 1, 2, 2, 3, 4])),
+                'popularity': rng.randint(0, 100),
+                'type': 'artist',
+            }
+        for idx in range(n_tracks):
+            tid = _spotify_id(rng)
+            artists = [fx.artists[aid] for aid in rng.sample(artist_ids, rng.choice([1, 1, 1, 2, 3]))]
+            year = rng.randint(1955, 2024)
+            fx.tracks[tid] = {
+                'id': tid,
+                'name': f'Track {idx}',
+                'artists': [{'id': a['id'], 'name': a['name'], 'type': 'artist'} for a in artists],
+                'album': {'name': f'Album {idx // 10}', 'release_date': f'{year}-{rng.randint(1, 12):02d}-01'},
+                'popularity': rng.randint(0, 100),
+                'duration_ms': rng.randint(90000, 420000),
+                'explicit': rng.random() < 0.2,
+                'is_local': False,
+                'type': 'track',
+            }
+            fx.audio_features[tid] = {
+                'id': tid,
+                'danceability': round(rng.random(), 3),
+                'energy': round(rng.random(), 3),
+                'valence': round(rng.random(), 3),
+                'acousticness': round(rng.random(), 3),
+                'tempo': round(rng.uniform(60, 200), 3),
+                'type': 'audio_features',
+            }
+        track_ids = list(fx.tracks)
+        for idx, pid in enumerate(PLAYLIST_IDS):
+            fx.playlists[pid] = {'id': pid, 'name': f'Playlist {idx}', 'track_ids': rng.sample(track_ids, 100)}
+        return fx
+
+    @classmethod
+    def from_cache(cls, path):
+        """Build fixtures from a recorded spotify_cache.sqlite"""
+        fx = cls()
+        conn = sqlite3.connect(path)
+        per_id = {'tracks': fx.tracks, 'artists': fx.artists, 'audio-features': fx.audio_features}
+        for key, body in conn.execute('SELECT key, body FROM responses'):
+            payload = json.loads(zlib.decompress(body))
+            endpoint, _, rest = key.partition('/')
+            if endpoint in per_id and rest and '?' not in rest and '/' not in rest:
+                if payload is not None:
+                    per_id[endpoint][rest] = payload
+            else:
+                fx.responses[key] = payload
+        conn.close()
+        return fx
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding='utf-8') as fh:
+            data = json.load(fh)
+        fx = cls()
+        for name in ('tracks', 'artists', 'audio_features', 'playlists', 'responses'):
+            setattr(fx, name, data.get(name, {}))
+        return fx
+
+    def save(self, path):
+        data = {name: getattr(self, name) for name in ('tracks', 'artists', 'audio_features', 'playlists', 'responses')}
+        with open(path, 'w', encoding='utf-8') as fh:
+            json.dump(data, fh)
+
+    def search_results(self, query):
+        """Stable pseudo-random result list for a query (up to 1000 track IDs)"""
+        with self._search_lock:
+            if query not in self._search_results:
+                rng = random.Random(zlib.crc32(query.encode('utf-8')))
+                track_ids = list(self.tracks)
+                total = min(len(track_ids), rng.randint(MAX_SEARCH_RESULTS // 4, MAX_SEARCH_RESULTS))
+                self._search_results[query] = rng.sample(track_ids, total)
+            return self._search_results[query]
+
+
+class Faults:
+    """Latency and error injection settings"""
+
+    def __init__(self, latency_ms=0.0, jitter_ms=0.0, rate_429=0.0, retry_after=1, forbid=(), seed=0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rate_429 = rate_429
+        self.retry_after = retry_after
+        self.forbid = set(forbid)
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def draw(self):
+        """Return (delay seconds, throttle?) for one request"""
+        with self._lock:
+            delay = (self.latency_ms + self._rng.uniform(0, self.jitter_ms)) / 1000.0
+            throttle = self._rng.random() < self.rate_429
+        return delay, throttle
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, like the real API
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, payload, headers=None):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status, message, headers=None):
+        self._send(status, {'error': {'status': status, 'message': message}}, headers)
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        self.rfile.read(length)
+        if urlsplit(self.path).path.rstrip('/') == '/api/token':
+            self.server.count('token', 200)
+            self._send(200, {'access_token': 'standin', 'token_type': 'Bearer', 'expires_in': 3600})
+        else:
+            self._error(404, 'Not found')
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        path = parts.path
+        if not path.startswith('/v1/'):
+            return self._error(404, 'Not found')
+        segments = [seg for seg in path[len('/v1/'):].split('/') if seg]
+        query = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+        endpoint = segments[0] if segments else ''
+
+        delay, throttle = self.server.faults.draw()
+        if delay:
+            time.sleep(delay)
+        if throttle:
+            self.server.count(endpoint, 429)
+            return self._error(429, 'API rate limit exceeded', {'Retry-After': str(self.server.faults.retry_after)})
+        if endpoint in self.server.faults.forbid:
+            self.server.count(endpoint, 403)
+            return self._error(403, 'Forbidden')
+
+        status, payload = self.server.route(endpoint, segments[1:], query)
+        self.server.count(endpoint, status)
+        if status != 200:
+            return self._error(status, payload)
+        self._send(200, payload)
+
+
+class StandinServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, fixtures, faults=None):
+        super().__init__(address, StandinHandler)
+        self.fixtures = fixtures
+        self.faults = faults or Faults()
+        self.counts = Counter()
+        self._count_lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def count(self, endpoint, status):
+        with self._count_lock:
+            self.counts[(endpoint, status)] += 1
+
+    def snapshot(self):
+        """Copy of the request counters: {(endpoint, status): n}"""
+        with self._count_lock:
+            return Counter(self.counts)
+
+    def route(self, endpoint, rest, query):
+        fx = self.fixtures
+        key = '/'.join([endpoint] + rest)
+        recorded_key = key + ('?' + urlencode(sorted(query.items())) if query else '')
+        if recorded_key in fx.responses:
+            return 200, fx.responses[recorded_key]
+
+        per_id = {'tracks': (fx.tracks, 'tracks'), 'artists': (fx.artists, 'artists'),
+                  'audio-features': (fx.audio_features, 'audio_features')}
+        if endpoint in per_id:
+            store, field = per_id[endpoint]
+            if rest:
+                obj = store.get(rest[0])
+                return (200, obj) if obj is not None else (404, 'Not found')
+            ids = [i for i in query.get('ids', '').split(',') if i]
+            if not ids:
+                return 400, 'Missing ids'
+            limit = 100 if endpoint == 'audio-features' else 50
+            if len(ids) > limit:
+                return 400, 'Too many ids requested'
+            return 200, {field: [store.get(i) for i in ids]}
+
+        if endpoint == 'search':
+            return self._search(query)
+
+        if endpoint == 'playlists' and rest:
+            playlist = fx.playlists.get(rest[0])
+            if playlist is None:
+                return 404, 'Not found'
+            if len(rest) > 1 and rest[1] == 'tracks':
+                return 200, self._playlist_page(playlist, query)
+            return 200, {'id': playlist['id'], 'name': playlist['name'],
+                         'tracks': self._playlist_page(playlist, {})}
+
+        return 404, 'Not found'
+
+    def _page_url(self, path, query, offset):
+        return f'{self.base_url}/v1/{path}?' + urlencode(sorted(dict(query, offset=offset).items()))
+
+    def _search(self, query):
+        q = query.get('q', '')
+        limit = int(query.get('limit', 10))
+        offset = int(query.get('offset', 0))
+        if limit > 50 or offset + limit > MAX_SEARCH_RESULTS:
+            return 400, 'Invalid limit/offset'
+        results = self.fixtures.search_results(q)
+        items = [self.fixtures.tracks[tid] for tid in results[offset:offset + limit]]
+        next_url = self._page_url('search', query, offset + limit) if offset + limit < len(results) else None
+        return 200, {'tracks': {'items': items, 'limit': limit, 'offset': offset, 'total': len(results), 'next': next_url}}
+
+    def _playlist_page(self, playlist, query):
+        limit = int(query.get('limit', 100))
+        offset = int(query.get('offset', 0))
+        ids = playlist['track_ids']
+        items = [{'track': self.fixtures.tracks.get(tid)} for tid in ids[offset:offset + limit]]
+        next_url = None
+        if offset + limit < len(ids):
+            next_url = self._page_url(f"playlists/{playlist['id']}/tracks", query, offset + limit)
+        return {'items': items, 'limit': limit, 'offset': offset, 'total': len(ids), 'next': next_url}
+
+
+def start_standin(fixtures, faults=None, host='127.0.0.1', port=0):
+    """Start a stand-in server on a background thread; returns the server (call .shutdown())"""
+    server = StandinServer((host, port), fixtures, faults)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Spotify Web API stand-in")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--from-cache', help="serve fixtures recorded in a spotify_cache.sqlite")
+    parser.add_argument('--fixtures', help="serve fixtures from a JSON file")
+    parser.add_argument('--save-fixtures', help="write the fixtures to a JSON file and exit")
+    parser.add_argument('--tracks', type=int, default=60000, help="synthetic catalogue size")
+    parser.add_argument('--artists', type=int, default=8000)
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--jitter-ms', type=float, default=0.0)
+    parser.add_argument('--rate-429', type=float, default=0.0)
+    parser.add_argument('--retry-after', type=int, default=1)
+    parser.add_argument('--forbid', action='append', default=[], help="endpoint to answer with 403")
+    args = parser.parse_args()
+
+    if args.from_cache:
+        fixtures = Fixtures.from_cache(args.from_cache)
+    elif args.fixtures:
+        fixtures = Fixtures.load(args.fixtures)
+    else:
+        fixtures = Fixtures.synthetic(args.tracks, args.artists)
+    if args.save_fixtures:
+        fixtures.save(args.save_fixtures)
+        print(f"Saved fixtures to {args.save_fixtures}")
+        return
+
+    faults = Faults(args.latency_ms, args.jitter_ms, args.rate_429, args.retry_after, args.forbid)
+    server = StandinServer((args.host, args.port), fixtures, faults)
+    print(f"Spotify stand-in on {server.base_url} ({len(fixtures.tracks):,} tracks, {len(fixtures.artists):,} artists)")
+    print(f"  export SPOTIFY_API_BASE={server.base_url}/v1/")
+    print(f"  export SPOTIFY_TOKEN_URL={server.base_url}/api/token")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
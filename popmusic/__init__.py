@@ -0,0 +1,6 @@
+"""
+Reusable pieces of the Pop vs Non-pop pipeline from Furey_Solanki_PopMusicFFNN.ipynb.ipynb
+
+Modules are imported on use (``from popmusic.labels import label_pop``) so that
+importing the package itself stays cheap.
+"""
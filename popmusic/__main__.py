@@ -0,0 +1,3 @@
+from popmusic.cli import main
+
+main()
@@ -0,0 +1,313 @@
+"""
+Command line entry point: python -m popmusic <command> [options]
+
+    label          pop labels for a dataset (pandas only)
+    fit-features   fit the FeaturePipeline on the training split and save it
+    train          train FFN architectures (in parallel with --jobs), save .keras and .npz
+    evaluate       test-split report for saved models
+    search         ASHA hyperparameter search over the FFN family (popmusic.search)
+    stack          out-of-fold stacking ensemble with cached base-learner columns (popmusic.stacking)
+    score          stream a catalogue through pipeline + model (popmusic.score)
+    serve          micro-batching HTTP scoring service (popmusic.serve)
+    export-numpy   fold a saved Keras FFN into a TensorFlow-free .npz (popmusic.numpy_ffn)
+
+This module imports nothing beyond the standard library at load time. Each
+command imports what it needs when it runs, so `--help` and the data-only
+commands never pay for TensorFlow, scikit-learn or matplotlib.
+"""
+
+import argparse
+import importlib
+import os
+import sys
+
+# command -> module whose main(argv) handles it
+DELEGATED = {
+    'score': ('popmusic.score', "stream a catalogue through the saved pipeline and model"),
+    'serve': ('popmusic.serve', "serve predictions over HTTP with micro-batching"),
+    'export-numpy': ('popmusic.numpy_ffn', "export a saved Keras FFN to a TensorFlow-free .npz"),
+}
+ARCHITECTURE_NAMES = ['shallow', 'medium', 'deep', 'improved']  # popmusic.models.ARCHITECTURES
+# popmusic.stacking.LEARNERS
+LEARNER_NAMES = ['xgboost', 'lightgbm', 'gradient_boosting', 'catboost', 'logistic', 'ffn']
+
+
+def _load_labeled(args, columns=None):
+    from popmusic.data import add_target, load_dataset
+
+    df = load_dataset(args.data, args.store, columns)
+    return add_target(df)
+
+
+def _load_or_fit_pipeline(args, df, idx_train):
+    from popmusic.pipeline import FeaturePipeline
+
+    if os.path.exists(args.pipeline):
+        return FeaturePipeline.load(args.pipeline)
+    print(f"No pipeline at {args.pipeline}; fitting on the training split")
+    pipeline = FeaturePipeline().fit(df.iloc[idx_train])
+    os.makedirs(os.path.dirname(os.path.abspath(args.pipeline)), exist_ok=True)
+    pipeline.save(args.pipeline)
+    return pipeline
+
+
+def _prepare(args, sparse=False):
+    """
+    (pipeline, X, y, (train, val, test)) for the full dataset; splits index X and y.
+    With sparse=True, the CSR input (FeaturePipeline.transform(..., sparse=True)) is appended.
+    """
+    from popmusic.data import TARGET_COLUMN, split_indices
+
+    if not args.no_cache:
+        from popmusic.matrix_cache import load_or_build
+
+        matrices = load_or_build(args.data, args.store)
+        prepared = matrices.pipeline, matrices.X, matrices.y, matrices.splits()
+        return prepared + (matrices.sparse,) if sparse else prepared
+
+    df = _load_labeled(args)
+    y = df[TARGET_COLUMN].astype(int).to_numpy()
+    splits = split_indices(y)
+    pipeline = _load_or_fit_pipeline(args, df, splits[0])
+    prepared = pipeline, pipeline.transform(df), y, splits
+    return prepared + (pipeline.transform(df, sparse=True),) if sparse else prepared
+
+
+def _save_pipeline(args, pipeline):
+    """Save the pipeline the models were just trained on, so score / serve pair them correctly"""
+    os.makedirs(os.path.dirname(os.path.abspath(args.pipeline)), exist_ok=True)
+    tmp_path = f'{args.pipeline}.tmp'
+    pipeline.save(tmp_path)
+    os.replace(tmp_path, args.pipeline)
+    print(f"💾 Saved the feature pipeline these models use to {args.pipeline}")
+
+
+def cmd_label(args):
+    from popmusic.data import TARGET_COLUMN
+
+    df = _load_labeled(args, columns=None if args.output else ['song_spotify_id', 'genre'])
+    labels = df[TARGET_COLUMN]
+    print(f"Pop tracks: {int(labels.sum()):,}, Non-pop: {int((labels == 0).sum()):,}, rate {labels.mean():.3f}")
+    if args.output:
+        df[['song_spotify_id', TARGET_COLUMN]].to_csv(args.output, index=False)
+        print(f"✅ Saved labels to {args.output}")
+
+
+def cmd_fit_features(args):
+    from popmusic.data import TARGET_COLUMN, split_indices
+    from popmusic.pipeline import FeaturePipeline
+
+    df = _load_labeled(args)
+    idx_train, _, _ = split_indices(df[TARGET_COLUMN].astype(int).to_numpy())
+    pipeline = FeaturePipeline().fit(df.iloc[idx_train])
+    os.makedirs(os.path.dirname(os.path.abspath(args.pipeline)), exist_ok=True)
+    pipeline.save(args.pipeline)
+    print(f"✅ Fitted on {len(idx_train):,} training rows: {pipeline.n_features} features -> {args.pipeline}")
+
+
+def _on_disk(directory, X, y):
+    """(X, y) memory-mapped: X itself when it already is a memmap (a matrix cache split), else a copy in directory"""
+    import numpy as np
+
+    from popmusic.tfdata import open_memmap, save_memmap
+
+    if isinstance(X, np.memmap):
+        return X, y
+    X, y, _ = open_memmap(save_memmap(directory, X, y))
+    return X, y
+
+
+def _fit(args, name, X_train, y_train, X_val, y_val):
+    if args.input_mode == 'numpy':
+        from popmusic.models import train_model
+
+        return train_model(name, X_train, y_train, X_val, y_val, epochs=args.epochs, verbose=args.verbose)
+
+    from popmusic.tfdata import train_model_tfdata
+
+    if args.input_mode == 'memmap':
+        # Cache splits are contiguous slices of the memory-mapped X.npy, so both are read from disk as is
+        X_train, y_train = _on_disk(os.path.join(args.output_dir, 'train_memmap'), X_train, y_train)
+        X_val, y_val = _on_disk(os.path.join(args.output_dir, 'val_memmap'), X_val, y_val)
+    return train_model_tfdata(name, X_train, y_train, X_val, y_val, epochs=args.epochs,
+                              cache=args.cache, verbose=args.verbose)
+
+
+def cmd_train(args):
+    from popmusic.evaluate import evaluate_probs, print_evaluation
+    from popmusic.numpy_ffn import export_numpy
+
+    pipeline, X, y, (idx_train, idx_val, idx_test) = _prepare(args)
+    os.makedirs(args.output_dir, exist_ok=True)
+    if args.jobs > 1 and len(args.architectures) > 1:
+        from popmusic.parallel_train import print_report, train_parallel
+
+        report = train_parallel(X, y, (idx_train, idx_val, idx_test), args.architectures, args.output_dir,
+                                jobs=args.jobs, threads_per_job=args.threads_per_job, epochs=args.epochs)
+        print_report(report)
+        return _save_pipeline(args, pipeline)
+    for name in args.architectures:
+        print(f"\n🚀 Training {name} on {len(y[idx_train]):,} rows x {X.shape[1]} features")
+        model, history = _fit(args, name, X[idx_train], y[idx_train], X[idx_val], y[idx_val])
+        path = os.path.join(args.output_dir, f'{name}_ffn.keras')
+        model.save(path)
+        export_numpy(model, os.path.splitext(path)[0] + '.npz')
+        print(f"💾 Saved {path} (+ .npz), best val_loss {min(history.history['val_loss']):.6f}")
+        probs = model.predict(X[idx_test], verbose=0).ravel()
+        print_evaluation(model.name, y[idx_test], evaluate_probs(y[idx_test], probs))
+    _save_pipeline(args, pipeline)
+
+
+def cmd_evaluate(args):
+    from popmusic.evaluate import evaluate_probs, print_comparison, print_evaluation
+    from popmusic.models import load_predictor
+
+    pipeline, X, y, (_, _, idx_test) = _prepare(args)
+    results = {}
+    for path in args.models:
+        name = os.path.basename(path)
+        results[name] = evaluate_probs(y[idx_test], load_predictor(path)(X[idx_test]), args.threshold)
+        print_evaluation(name, y[idx_test], results[name])
+    print_comparison(results)
+
+
+def cmd_search(args):
+    from popmusic.search import print_report, search
+
+    pipeline, X, y, (train, val, _) = _prepare(args)
+    os.makedirs(args.output_dir, exist_ok=True)
+    report = search(X[train], y[train], X[val], y[val], args.output_dir, trials=args.trials, jobs=args.jobs,
+                    threads_per_job=args.threads_per_job, min_epochs=args.min_epochs, max_epochs=args.max_epochs,
+                    eta=args.eta, seed=args.seed)
+    print_report(report)
+    _save_pipeline(args, pipeline)
+
+
+def _learner_params(assignments):
+    """{'xgboost': {'max_depth': 8}} from ['xgboost.max_depth=8']; values are parsed as JSON when they can be"""
+    import json
+
+    params = {}
+    for assignment in assignments:
+        target, _, value = assignment.partition('=')
+        learner, _, param = target.partition('.')
+        if not (learner and param and value):
+            raise SystemExit(f"--param expects LEARNER.PARAMETER=VALUE, got {assignment!r}")
+        try:
+            value = json.loads(value)
+        except ValueError:
+            pass
+        params.setdefault(learner, {})[param] = value
+    return params
+
+
+def cmd_stack(args):
+    import numpy as np
+
+    from popmusic.stacking import print_report, stack
+
+    pipeline, X, y, (train, val, test), X_sparse = _prepare(args, sparse=True)
+    # Base learners don't early-stop, so validation rows join the out-of-fold training set
+    fit_rows = np.concatenate([np.arange(len(y))[train], np.arange(len(y))[val]])
+    test_rows = np.arange(len(y))[test]
+    report = stack(X[fit_rows], y[fit_rows], X[test_rows], y[test_rows], learners=args.learners,
+                   params=_learner_params(args.param), meta=args.meta, folds=args.folds, jobs=args.jobs,
+                   threads_per_job=args.threads_per_job, cache_dir=args.cache_dir,
+                   output_path=os.path.join(args.output_dir, 'stacking_ensemble.joblib'),
+                   X_sparse=X_sparse[fit_rows], X_holdout_sparse=X_sparse[test_rows],
+                   sparse_offset=pipeline.sparse_offset)
+    print_report(report)
+    _save_pipeline(args, pipeline)
+
+
+def build_parser():
+    from popmusic.data import DATA_DIR, DATA_PATH, FEATURE_STORE_PATH, MODEL_DIR, PIPELINE_PATH
+
+    stacking_cache = os.path.join(DATA_DIR, 'stacking_cache')  # popmusic.stacking.CACHE_DIR
+
+    data_args = argparse.ArgumentParser(add_help=False)
+    data_args.add_argument('--data', default=DATA_PATH, help="dataset CSV (used when there is no feature store)")
+    data_args.add_argument('--store', default=FEATURE_STORE_PATH, help="feature store directory")
+    pipeline_args = argparse.ArgumentParser(add_help=False)
+    pipeline_args.add_argument('--pipeline', default=PIPELINE_PATH, help="saved FeaturePipeline (.joblib)")
+    pipeline_args.add_argument('--no-cache', action='store_true',
+                               help="rebuild features in memory instead of using the matrix cache "
+                                    "(train / search / stack save the pipeline they used to --pipeline either way)")
+
+    parser = argparse.ArgumentParser(prog='python -m popmusic', description="Pop vs Non-pop classifier tools")
+    commands = parser.add_subparsers(dest='command', required=True, metavar='command')
+
+    label = commands.add_parser('label', parents=[data_args], help="pop labels for the dataset")
+    label.add_argument('--output', help="write song_spotify_id, is_pop_genre to this CSV")
+    label.set_defaults(func=cmd_label)
+
+    fit = commands.add_parser('fit-features', parents=[data_args, pipeline_args],
+                              help="fit and save the feature pipeline on the training split")
+    fit.set_defaults(func=cmd_fit_features)
+
+    train = commands.add_parser('train', parents=[data_args, pipeline_args], help="train FFN architectures")
+    train.add_argument('architectures', nargs='+', choices=ARCHITECTURE_NAMES)
+    train.add_argument('--epochs', type=int, help="override the architecture's epoch budget")
+    train.add_argument('--output-dir', default=MODEL_DIR)
+    train.add_argument('--verbose', type=int, default=2)
+    train.add_argument('--input-mode', choices=['numpy', 'tfdata', 'memmap'], default='numpy',
+                       help="feed NumPy arrays, a tf.data pipeline, or tf.data over a memory-mapped train split")
+    train.add_argument('--cache', action='store_true', help="tf.data modes: cache loaded batches in memory")
+    train.add_argument('--jobs', type=int, default=1,
+                       help="train architectures in this many processes at once (NumPy input only)")
+    train.add_argument('--threads-per-job', type=int, help="thread cap per process (default: CPUs / jobs)")
+    train.set_defaults(func=cmd_train)
+
+    evaluate = commands.add_parser('evaluate', parents=[data_args, pipeline_args],
+                                   help="evaluate saved models on the test split")
+    evaluate.add_argument('models', nargs='+', help="saved models (.keras, .npz, .joblib)")
+    evaluate.add_argument('--threshold', type=float, default=0.5)
+    evaluate.set_defaults(func=cmd_evaluate)
+
+    search = commands.add_parser('search', parents=[data_args, pipeline_args],
+                                 help="ASHA hyperparameter search over the FFN family")
+    search.add_argument('--trials', type=int, default=200, help="configurations to sample")
+    search.add_argument('--jobs', type=int, help="worker processes (default: CPUs / 2)")
+    search.add_argument('--threads-per-job', type=int)
+    search.add_argument('--min-epochs', type=int, default=1, help="epochs at the first rung")
+    search.add_argument('--max-epochs', type=int, default=81, help="epochs at the last rung")
+    search.add_argument('--eta', type=int, default=3, help="reduction factor between rungs")
+    search.add_argument('--seed', type=int, default=42)
+    search.add_argument('--output-dir', default=MODEL_DIR)
+    search.set_defaults(func=cmd_search)
+
+    stack = commands.add_parser('stack', parents=[data_args, pipeline_args],
+                                help="stacking ensemble over cached out-of-fold base-learner predictions")
+    stack.add_argument('--learners', nargs='+', choices=LEARNER_NAMES,
+                       help="base learners (default: all installed)")
+    stack.add_argument('--param', action='append', default=[], metavar='LEARNER.PARAMETER=VALUE',
+                       help="override a base learner's parameter (repeatable); only its column is recomputed")
+    stack.add_argument('--meta', choices=['xgboost', 'logistic'], default='xgboost')
+    stack.add_argument('--folds', type=int, default=5)
+    stack.add_argument('--jobs', type=int, help="worker processes, one (learner, fold) each (default: CPUs)")
+    stack.add_argument('--threads-per-job', type=int)
+    stack.add_argument('--cache-dir', default=stacking_cache, help="out-of-fold column cache")
+    stack.add_argument('--output-dir', default=MODEL_DIR)
+    stack.set_defaults(func=cmd_stack)
+
+    for name, (_, description) in DELEGATED.items():
+        sub = commands.add_parser(name, help=description, add_help=False)
+        sub.add_argument('args', nargs=argparse.REMAINDER)
+    return parser
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] in DELEGATED:
+        # Hand the rest of the command line to the module untouched (including --help)
+        module = importlib.import_module(DELEGATED[argv[0]][0])
+        sys.argv[0] = f'python -m popmusic {argv[0]}'
+        return module.main(argv[1:])
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command == 'train' and args.jobs > 1 and len(args.architectures) > 1 and (
+            args.input_mode != 'numpy' or args.cache):
+        # Parallel workers train on shared NumPy arrays and have no tf.data / memmap input
+        parser.error("train: --input-mode tfdata/memmap and --cache need --jobs 1 "
+                     "(parallel jobs train on NumPy arrays)")
+    return args.func(args)
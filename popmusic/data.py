@@ -0,0 +1,63 @@
+"""
+Dataset loading, pop target and the train/val/test split (notebook cell 3)
+
+The dataset is read from the columnar feature store (data/feature_store.py)
+when it exists, otherwise from spotify_final_with_behavior.csv. Splits are
+row indices, 85% train / 10% validation / 5% test, stratified on the target,
+so the feature pipeline can be fitted on the training rows only.
+
+Only the standard library is imported at module level: the CLI reads the
+default paths from here without loading pandas.
+"""
+
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(REPO_ROOT, 'data')
+DATA_PATH = os.path.join(DATA_DIR, 'spotify_final_with_behavior.csv')
+FEATURE_STORE_PATH = os.path.join(DATA_DIR, 'feature_store')
+MODEL_DIR = os.path.join(REPO_ROOT, 'models')
+PIPELINE_PATH = os.path.join(MODEL_DIR, 'feature_pipeline.joblib')
+
+TARGET_COLUMN = 'is_pop_genre'
+SPLIT_SEED = 42
+HOLDOUT_FRACTION = 0.15  # validation + test
+TEST_SHARE = 0.333       # of the holdout: 0.333 of 15% = 5%
+
+
+def load_dataset(data_path=DATA_PATH, store_path=FEATURE_STORE_PATH, columns=None):
+    """Dataset as a DataFrame, from the feature store if there is one"""
+    if DATA_DIR not in sys.path:
+        sys.path.insert(0, DATA_DIR)
+    from feature_store import FeatureStore
+
+    store = FeatureStore(store_path)
+    if store.exists():
+        return store.read(columns)
+
+    import pandas as pd
+
+    return pd.read_csv(data_path, usecols=columns)
+
+
+def add_target(df):
+    """Add the is_pop_genre label column in place (and return df)"""
+    from popmusic.labels import label_pop
+
+    df[TARGET_COLUMN] = label_pop(df['genre']) if 'genre' in df.columns else 0
+    return df
+
+
+def split_indices(y, seed=SPLIT_SEED):
+    """(idx_train, idx_val, idx_test) stratified on y"""
+    import numpy as np
+    from sklearn.model_selection import train_test_split
+
+    idx_train, idx_holdout, _, y_holdout = train_test_split(
+        np.arange(len(y)), y, test_size=HOLDOUT_FRACTION, random_state=seed, stratify=y
+    )
+    idx_val, idx_test = train_test_split(
+        idx_holdout, test_size=TEST_SHARE, random_state=seed, stratify=y_holdout
+    )
+    return idx_train, idx_val, idx_test
@@ -0,0 +1,103 @@
+"""
+Test-set evaluation for the pop classifiers (notebook cells 14-16)
+
+evaluate_probs computes the notebook's metrics for one model's scores;
+print_evaluation / print_comparison reproduce its report and summary table.
+The plotting helpers import matplotlib when called.
+"""
+
+import numpy as np
+
+CLASS_NAMES = ['Non-pop', 'Pop']
+
+
+def evaluate_probs(y_true, probs, threshold=0.5):
+    """accuracy, precision, recall, f1, auc, probs, preds and confusion matrix for pop scores"""
+    from sklearn.metrics import confusion_matrix, roc_auc_score
+
+    probs = np.asarray(probs).ravel()
+    preds = (probs >= threshold).astype(int)
+    try:
+        auc = roc_auc_score(y_true, probs)
+    except ValueError:
+        auc = 0.0
+    cm = confusion_matrix(y_true, preds, labels=[0, 1])
+    tn, fp, fn, tp = cm.ravel()
+    precision = tp / (tp + fp) if tp + fp else 0.0
+    recall = tp / (tp + fn) if tp + fn else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return {
+        'accuracy': (tn + tp) / cm.sum(),
+        'precision': precision,
+        'recall': recall,
+        'f1': f1,
+        'auc': auc,
+        'probs': probs,
+        'preds': preds,
+        'cm': cm,
+    }
+
+
+def print_evaluation(name, y_true, metrics):
+    from sklearn.metrics import classification_report
+
+    cm = metrics['cm']
+    print(f"\n{'=' * 60}\n{name}\n{'=' * 60}")
+    print("\nClassification Report:")
+    print(classification_report(y_true, metrics['preds'], digits=3, target_names=CLASS_NAMES, zero_division=0))
+    print(f"\nROC AUC: {metrics['auc']:.4f}")
+    print("\nConfusion Matrix:")
+    print("                Predicted")
+    print("              Non-pop  Pop")
+    print(f"Actual Non-pop  {cm[0, 0]:5d}  {cm[0, 1]:4d}")
+    print(f"        Pop     {cm[1, 0]:5d}  {cm[1, 1]:4d}")
+
+
+def print_comparison(results):
+    """Summary table for {name: metrics}; returns the best name by F1"""
+    print("\n" + "=" * 80)
+    print("MODEL COMPARISON SUMMARY")
+    print("=" * 80)
+    print(f"{'Model':<25} {'Accuracy':<10} {'Precision':<10} {'Recall':<10} {'F1-Score':<10} {'ROC AUC':<10}")
+    print("-" * 80)
+    for name, metrics in results.items():
+        print(f"{name:<25} {metrics['accuracy']:<10.4f} {metrics['precision']:<10.4f} "
+              f"{metrics['recall']:<10.4f} {metrics['f1']:<10.4f} {metrics['auc']:<10.4f}")
+
+    best = max(results, key=lambda name: results[name]['f1'])
+    print(f"\n🏆 Best Model (by F1-Score): {best}")
+    print(f"   F1-Score: {results[best]['f1']:.4f}")
+    print(f"   ROC AUC: {results[best]['auc']:.4f}")
+    return best
+
+
+def plot_confusion_matrices(results):
+    import matplotlib.pyplot as plt
+    from sklearn.metrics import ConfusionMatrixDisplay
+
+    fig, axes = plt.subplots(1, len(results), figsize=(6 * len(results), 5), squeeze=False)
+    for ax, (name, metrics) in zip(axes[0], results.items()):
+        ConfusionMatrixDisplay(metrics['cm'], display_labels=CLASS_NAMES).plot(ax=ax, cmap='Blues', values_format='d')
+        ax.set_title(f'{name}\nAccuracy: {metrics["accuracy"]:.3f}, F1: {metrics["f1"]:.3f}')
+    plt.tight_layout()
+    return fig
+
+
+def plot_roc_curves(y_true, results):
+    import matplotlib.pyplot as plt
+    from sklearn.metrics import roc_curve
+
+    fig = plt.figure(figsize=(10, 8))
+    for name, metrics in results.items():
+        fpr, tpr, _ = roc_curve(y_true, metrics['probs'])
+        plt.plot(fpr, tpr, label=f'{name} (AUC={metrics["auc"]:.3f})', linewidth=2)
+    plt.plot([0, 1], [0, 1], 'k--', label='Random (AUC=0.500)', linewidth=1, alpha=0.5)
+    plt.xlabel('False Positive Rate', fontsize=12)
+    plt.ylabel('True Positive Rate', fontsize=12)
+    plt.title('ROC Curves: FFN Models Comparison', fontsize=14, fontweight='bold')
+    plt.legend(loc='lower right', fontsize=10)
+    plt.grid(True, alpha=0.3)
+    plt.xlim([0.0, 1.0])
+    plt.ylim([0.0, 1.05])
+    plt.tight_layout()
+    return fig
@@ -0,0 +1,151 @@
+"""
+Feature assembly for the Pop vs Non-pop models (notebook cell 3)
+
+The feature matrix is built block by block:
+
+    numeric   scaled metadata, audio, interaction, temporal and safe derived columns
+    one-hot   time_of_day_synth
+    genre     TF-IDF over the safe genre text (popmusic.labels.clean_genre_text)
+
+The numeric block is fully populated, so it stays a dense float32 array. The
+one-hot and TF-IDF blocks are CSR, hstacked into one float32 CSR, and are
+robust-scaled without densifying (sparse_robust_stats), so the genre vocabulary
+can grow to thousands of terms. Models that accept sparse input take the dense
+numeric block hstacked with that CSR (FeaturePipeline.transform(df, sparse=True));
+only the Keras FFNs need the fully dense matrix.
+
+The fitted scaler, categories and vocabulary live in popmusic.pipeline.FeaturePipeline.
+"""
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from popmusic.labels import clean_genre_text
+
+NUMERIC_FEATURES = ['spotify_popularity', 'album_release_year', 'tempo_bpm_synth', 'position']
+AUDIO_FEATURES = ['danceability', 'energy', 'valence', 'acousticness']
+ENGINEERED_FEATURES = ['is_explicit_binary', 'release_month', 'release_decade', 'popularity_x_year', 'tempo_x_year']
+# Non-leaky derived features, used when create_derived_features.py has run (probe column -> group)
+SAFE_DERIVED_GROUPS = [
+    ('is_highly_popular', ['is_highly_popular', 'is_moderately_popular', 'popularity_normalized']),
+    ('is_recent', ['is_recent', 'is_very_recent']),
+    ('tempo_normalized', ['tempo_normalized']),
+    ('is_daytime', ['is_daytime']),
+    ('is_not_explicit', ['is_not_explicit']),
+]
+CAT_FEATURE = 'time_of_day_synth'
+GENRE_COLUMN = 'genre'
+TFIDF_PARAMS = {
+    'max_features': 20,    # Top 20 genre terms
+    'ngram_range': (1, 2),  # Single words and 2-word phrases
+    'min_df': 20,          # Must appear in at least 20 tracks
+    'stop_words': 'english',
+}
+
+
+_FLAG_TEXT = {'true': 1.0, 'false': 0.0, '1': 1.0, '0': 0.0}
+
+
+def as_float(values):
+    """
+    float64 Series with NaN where a value is missing or unparseable; booleans and
+    'true' / 'false' strings become 1.0 / 0.0 (a CSV column with gaps loads as object)
+    """
+    if values.dtype == object:
+        values = pd.to_numeric(values.map(
+            lambda v: float(v) if isinstance(v, (bool, np.bool_))
+            else _FLAG_TEXT.get(v.strip().lower(), v) if isinstance(v, str) else v
+        ), errors='coerce')
+    return pd.Series(values.astype('Float64').to_numpy(np.float64, na_value=np.nan), index=values.index)
+
+
+def add_engineered_columns(df):
+    """
+    Add the interaction and temporal columns in place (and return df).
+    Missing inputs give NaN, which FeaturePipeline maps to its fill value.
+    """
+    df['is_explicit_binary'] = as_float(df['is_explicit'])
+    release_date = pd.to_datetime(df['album_release_date'], errors='coerce')
+    df['album_release_date'] = release_date
+    df['release_month'] = release_date.dt.month.fillna(0).astype(int)
+    year = as_float(df['album_release_year'])
+    df['release_decade'] = year // 10 * 10
+    df['popularity_x_year'] = as_float(df['spotify_popularity']) * year
+    df['tempo_x_year'] = as_float(df['tempo_bpm_synth']) * year
+    return df
+
+
+def numeric_feature_columns(columns):
+    """Ordered numeric feature list for a dataset with these columns"""
+    columns = set(columns)
+    audio = [col for col in AUDIO_FEATURES if col in columns]
+    derived = [col for probe, group in SAFE_DERIVED_GROUPS if probe in columns for col in group]
+    return NUMERIC_FEATURES + audio + ENGINEERED_FEATURES + derived
+
+
+def numeric_block(df, columns, scaler):
+    """Scaled numeric columns as a dense float32 array (NaNs are kept for the data-quality step)"""
+    values = df[columns].to_numpy(dtype=np.float64)
+    return scaler.transform(values).astype(np.float32)
+
+
+def one_hot_block(values, categories):
+    """
+    One-hot CSR with one column per category, like pd.get_dummies(drop_first=False).
+    Values outside categories (or missing) get an all-zero row.
+    """
+    codes = pd.Categorical(values, categories=categories).codes
+    rows = np.flatnonzero(codes >= 0)
+    data = np.ones(len(rows), dtype=np.float32)
+    return sp.csr_matrix((data, (rows, codes[rows])), shape=(len(codes), len(categories)))
+
+
+def one_hot_names(categories):
+    return [f'{CAT_FEATURE}_{category}' for category in categories]
+
+
+def genre_block(genre_text, vectorizer):
+    """TF-IDF CSR for already-cleaned genre text (empty block when there is no vectorizer)"""
+    if vectorizer is None:
+        return sp.csr_matrix((len(genre_text), 0), dtype=np.float32)
+    return vectorizer.transform(genre_text).astype(np.float32)
+
+
+def hstack_blocks(blocks):
+    return sp.hstack(blocks, format='csr', dtype=np.float32)
+
+
+def sparse_robust_stats(block, quantile_range=(25.0, 75.0)):
+    """
+    Per-column (median, interquartile range) of a CSR block, counting its implicit zeros:
+    RobustScaler(quantile_range=...).fit(block.toarray()) without densifying.
+    A zero range becomes 1, as in scikit-learn.
+    """
+    n_rows, n_cols = block.shape
+    columns = sp.csc_matrix(block)
+    positions = np.array([quantile_range[0], 50.0, quantile_range[1]]) / 100 * (n_rows - 1)
+    low = np.floor(positions).astype(np.int64)
+    high = np.minimum(low + 1, n_rows - 1)
+    frac = positions - low
+    stats = np.zeros((3, n_cols))
+    for col in range(n_cols):
+        values = np.sort(columns.data[columns.indptr[col]:columns.indptr[col + 1]]).astype(np.float64)
+        n_negative = np.searchsorted(values, 0.0)
+        n_zero = n_rows - len(values)
+
+        def at(ranks):
+            # Sorted column = stored negatives, implicit zeros, stored non-negatives
+            out = np.zeros(len(ranks))
+            negative = ranks < n_negative
+            out[negative] = values[ranks[negative]]
+            positive = ranks >= n_negative + n_zero
+            out[positive] = values[ranks[positive] - n_zero]
+            return out
+
+        below = at(low)
+        stats[:, col] = below + frac * (at(high) - below)
+    q_low, median, q_high = stats
+    scale = q_high - q_low
+    scale[scale < 10 * np.finfo(np.float64).eps] = 1.0
+    return median, scale
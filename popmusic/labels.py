@@ -0,0 +1,120 @@
+"""
+Genre labeling for the Pop vs Non-pop target
+
+The notebook used to label tracks with ``df.apply(is_pop_track, axis=1)``, running
+one ``re.search`` per pattern per row. Here every rule's patterns are compiled
+into a single alternation, and the genre column is factorized first: a genre
+string shared by thousands of tracks (one artist's genre list) is matched once,
+and the result is broadcast back to all rows with an integer take.
+
+Labels are identical to the notebook's is_pop_track: the genre text is
+lower-cased, missing genres never match.
+
+clean_genre_text produces the "safe genre" text used for TF-IDF features: the
+pop token is removed in a single regex pass, together with the single-word fused
+forms (electropop, synthpop, k-pop / j-pop / c-pop), so the features carry no
+direct trace of the target. The other genre words stay, so "pop rock" becomes
+"rock" and "latin pop" becomes "latin". Training and scoring both use it.
+
+Multi-label rules map a label name to its patterns:
+
+    labeler = GenreLabeler({'pop': POP_KEYWORD_PATTERNS, 'rock': [r'\\brock\\b', r'metal']})
+    labels = labeler.label(df['genre'])   # one int8 column per rule
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+
+# Patterns that define a pop track (the target; see README "Feature Engineering")
+POP_KEYWORD_PATTERNS = [
+    r"\bpop\b",
+    r"dance[- ]?pop",
+    r"electro[- ]?pop",
+    r"synth[- ]?pop",
+    r"teen pop",
+    r"pop rock",
+    r"pop rap",
+    r"latin pop",
+    r"indie pop",
+    r"k[- ]?pop",
+    r"j[- ]?pop",
+    r"c[- ]?pop",
+]
+
+
+# Pop removed from genre text before it becomes a feature: the "pop" token with any hyphen
+# joining it to a neighbour ("dance-pop" -> "dance"), and whole fused words that are only pop
+# (electropop, synthpop, k-pop). Words next to pop ("pop rock", "indie pop") are kept.
+SAFE_GENRE_REGEX = re.compile(r'\b(?:[kjc][- ]?|(?:electro|synth)-?)pop\b|-?\bpop\b-?')
+
+
+def compile_rule(patterns):
+    """One compiled alternation matching if any of the patterns matches"""
+    return re.compile('|'.join(f'(?:{pattern})' for pattern in patterns))
+
+
+def factorize_text(values):
+    """
+    (codes, lower-cased unique strings) for a text column; missing values get code -1.
+    Matching the uniques and taking by codes labels every row.
+    """
+    codes, uniques = pd.factorize(pd.Series(values, copy=False), use_na_sentinel=True)
+    uniques = pd.Series(np.asarray(uniques, dtype=object)).astype(str).str.lower()
+    return codes, uniques
+
+
+def _broadcast(codes, unique_values, missing_value):
+    unique_values = np.asarray(unique_values)
+    if len(unique_values) == 0:
+        return np.full(len(codes), missing_value, dtype=unique_values.dtype)
+    out = unique_values[np.maximum(codes, 0)]
+    out[codes < 0] = missing_value
+    return out
+
+
+class GenreLabeler:
+    """Multi-label genre rules, each compiled to one regex and evaluated per unique genre string"""
+
+    def __init__(self, rules):
+        self.rules = {name: compile_rule(patterns) for name, patterns in rules.items()}
+
+    def _match(self, uniques, regex):
+        return uniques.str.contains(regex).to_numpy(dtype=bool)
+
+    def label_one(self, values, name):
+        """int8 array: 1 where the rule `name` matches the genre text"""
+        codes, uniques = factorize_text(values)
+        return _broadcast(codes, self._match(uniques, self.rules[name]), False).astype(np.int8)
+
+    def label(self, values):
+        """DataFrame with one int8 column per rule (index follows values when it is a Series)"""
+        codes, uniques = factorize_text(values)
+        index = values.index if isinstance(values, pd.Series) else None
+        return pd.DataFrame(
+            {
+                name: _broadcast(codes, self._match(uniques, regex), False).astype(np.int8)
+                for name, regex in self.rules.items()
+            },
+            index=index,
+        )
+
+
+POP_LABELER = GenreLabeler({'pop': POP_KEYWORD_PATTERNS})
+
+
+def label_pop(values):
+    """is_pop_genre for a genre column: int8 array, 1 if any pop pattern matches"""
+    return POP_LABELER.label_one(values, 'pop')
+
+
+def clean_genre_text(values):
+    """
+    Safe genre text: lower-cased, pop tokens removed (SAFE_GENRE_REGEX), whitespace collapsed.
+    Missing genres become ''. Returns a Series aligned with values.
+    """
+    codes, uniques = factorize_text(values)
+    cleaned = uniques.str.replace(SAFE_GENRE_REGEX, '', regex=True).str.replace(r'\s+', ' ', regex=True).str.strip()
+    index = values.index if isinstance(values, pd.Series) else None
+    return pd.Series(_broadcast(codes, cleaned.to_numpy(dtype=object), ''), index=index, name='genre_cleaned')
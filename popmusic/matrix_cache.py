@@ -0,0 +1,246 @@
+"""
+Content-addressed cache of the finished feature matrices
+
+Building the model inputs means reading the dataset, labeling, fitting TF-IDF
+and the scalers, splitting and transforming. load_or_build does that once and
+stores the result under a key that hashes everything it depends on:
+
+    source data      content hash of the feature store's .arrow files (or the CSV)
+    configuration    feature lists, TF-IDF parameters, pop patterns, split seed
+                     and fractions, CACHE_VERSION
+
+    <cache_dir>/<key>/
+        X.npy                 float32 model inputs, rows in split order: train | val | test
+        y.npy                 int labels, same order
+        row_index.npy         dataset row of each matrix row
+        sparse_*.npy          transform(sparse=True) CSR (data / indices / indptr), same order
+        pipeline.joblib       the fitted FeaturePipeline
+        meta.json             split sizes, key inputs, build time
+
+Arrays are opened with mmap_mode='r', so a hit costs a few file opens and no
+parsing. Because the splits are stored contiguously, X_train / X_val / X_test
+are slices (views) of the one memmap; matrices.sparse is the CSR for models
+that take sparse input, mapped the same way. Any change to the data or the
+configuration produces a new key; stale entries are simply never read again.
+Source hashes are memoized by (size, mtime) in source_hashes.json.
+
+    matrices = load_or_build()
+    model.fit(matrices.X_train, matrices.y_train, ...)
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+
+from popmusic.data import (
+    DATA_DIR, DATA_PATH, FEATURE_STORE_PATH, HOLDOUT_FRACTION, SPLIT_SEED, TARGET_COLUMN, TEST_SHARE,
+)
+
+CACHE_DIR = os.path.join(DATA_DIR, 'matrix_cache')
+CACHE_VERSION = 3  # bump when the build itself changes
+HASHES_FILE = 'source_hashes.json'
+_CHUNK = 1 << 20
+
+
+def source_files(data_path=DATA_PATH, store_path=FEATURE_STORE_PATH):
+    """Files the dataset is read from: the feature store's groups if it exists, else the CSV"""
+    if os.path.isdir(store_path):
+        files = sorted(os.path.join(store_path, name) for name in os.listdir(store_path) if name.endswith('.arrow'))
+        if files:
+            return files
+    return [data_path]
+
+
+def _file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(_CHUNK), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def source_fingerprint(paths, cache_dir=CACHE_DIR):
+    """Content hash of the source files, rehashing only files whose size or mtime changed"""
+    memo_path = os.path.join(cache_dir, HASHES_FILE)
+    try:
+        with open(memo_path) as f:
+            memo = json.load(f)
+    except (OSError, ValueError):
+        memo = {}
+
+    digest = hashlib.sha256()
+    changed = False
+    for path in paths:
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        signature = [stat.st_size, stat.st_mtime_ns]
+        entry = memo.get(path)
+        if entry is None or entry[:2] != signature:
+            entry = signature + [_file_digest(path)]
+            memo[path] = entry
+            changed = True
+        digest.update(f'{os.path.basename(path)}:{entry[2]}\n'.encode())
+
+    if changed:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = f'{memo_path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(memo, f)
+        os.replace(tmp_path, memo_path)
+    return digest.hexdigest()
+
+
+def feature_config(seed=SPLIT_SEED, tfidf_params=None):
+    """Everything besides the data that determines the matrices"""
+    from popmusic import features, labels
+
+    return {
+        'version': CACHE_VERSION,
+        'numeric': features.NUMERIC_FEATURES,
+        'audio': features.AUDIO_FEATURES,
+        'engineered': features.ENGINEERED_FEATURES,
+        'derived': features.SAFE_DERIVED_GROUPS,
+        'categorical': features.CAT_FEATURE,
+        'genre': features.GENRE_COLUMN,
+        'tfidf': dict(tfidf_params or features.TFIDF_PARAMS),
+        'pop_patterns': labels.POP_KEYWORD_PATTERNS,
+        'safe_genre_regex': labels.SAFE_GENRE_REGEX.pattern,
+        'target': TARGET_COLUMN,
+        'split': {'seed': seed, 'holdout': HOLDOUT_FRACTION, 'test_share': TEST_SHARE},
+    }
+
+
+def cache_key(sources, config, cache_dir=CACHE_DIR):
+    payload = json.dumps({'sources': source_fingerprint(sources, cache_dir), 'config': config},
+                         sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:24]
+
+
+class FeatureMatrices:
+    """Memory-mapped model inputs from one cache entry; split attributes are views"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, 'meta.json')) as f:
+            self.meta = json.load(f)
+        self.key = self.meta['key']
+        self.X = np.load(os.path.join(path, 'X.npy'), mmap_mode='r')
+        self.y = np.load(os.path.join(path, 'y.npy'), mmap_mode='r')
+        self.row_index = np.load(os.path.join(path, 'row_index.npy'), mmap_mode='r')
+        n_train, n_val = self.meta['n_train'], self.meta['n_val']
+        self.train = slice(0, n_train)
+        self.val = slice(n_train, n_train + n_val)
+        self.test = slice(n_train + n_val, len(self.y))
+        self._pipeline = None
+        self._sparse = None
+
+    @property
+    def pipeline(self):
+        if self._pipeline is None:
+            from popmusic.pipeline import FeaturePipeline
+
+            self._pipeline = FeaturePipeline.load(os.path.join(self.path, 'pipeline.joblib'))
+        return self._pipeline
+
+    @property
+    def sparse(self):
+        """FeaturePipeline.transform(..., sparse=True) as a memory-mapped CSR, rows in the same order as X"""
+        if self._sparse is None:
+            import scipy.sparse as sp
+
+            parts = [np.load(os.path.join(self.path, f'sparse_{name}.npy'), mmap_mode='r')
+                     for name in ('data', 'indices', 'indptr')]
+            self._sparse = sp.csr_matrix(tuple(parts), shape=self.X.shape, copy=False)
+        return self._sparse
+
+    def splits(self):
+        return self.train, self.val, self.test
+
+    @property
+    def X_train(self):
+        return self.X[self.train]
+
+    @property
+    def X_val(self):
+        return self.X[self.val]
+
+    @property
+    def X_test(self):
+        return self.X[self.test]
+
+    @property
+    def y_train(self):
+        return self.y[self.train]
+
+    @property
+    def y_val(self):
+        return self.y[self.val]
+
+    @property
+    def y_test(self):
+        return self.y[self.test]
+
+
+def _save(directory, name, array):
+    np.save(os.path.join(directory, f'{name}.npy'), np.ascontiguousarray(array))
+
+
+def build(directory, data_path, store_path, seed, tfidf_params):
+    """Load, label, split, fit and transform; write the cache entry into directory"""
+    from popmusic.data import add_target, load_dataset, split_indices
+    from popmusic.pipeline import FeaturePipeline
+
+    df = add_target(load_dataset(data_path, store_path))
+    y = df[TARGET_COLUMN].astype(int).to_numpy()
+    idx_train, idx_val, idx_test = split_indices(y, seed)
+    pipeline = FeaturePipeline(tfidf_params).fit(df.iloc[idx_train])
+
+    order = np.concatenate([idx_train, idx_val, idx_test])
+    ordered = df.iloc[order]
+    _save(directory, 'X', pipeline.transform(ordered))
+    _save(directory, 'y', y[order])
+    _save(directory, 'row_index', order)
+    sparse = pipeline.transform(ordered, sparse=True)
+    for name in ('data', 'indices', 'indptr'):
+        _save(directory, f'sparse_{name}', getattr(sparse, name))
+    pipeline.save(os.path.join(directory, 'pipeline.joblib'))
+    return {'n_train': len(idx_train), 'n_val': len(idx_val), 'n_test': len(idx_test),
+            'n_features': pipeline.n_features}
+
+
+def load_or_build(data_path=DATA_PATH, store_path=FEATURE_STORE_PATH, seed=SPLIT_SEED, tfidf_params=None,
+                  cache_dir=CACHE_DIR, rebuild=False, verbose=True):
+    """FeatureMatrices for the current data and configuration, building the cache entry on a miss"""
+    sources = source_files(data_path, store_path)
+    config = feature_config(seed, tfidf_params)
+    key = cache_key(sources, config, cache_dir)
+    path = os.path.join(cache_dir, key)
+
+    if rebuild and os.path.isdir(path):
+        shutil.rmtree(path)
+    if not os.path.isdir(path):
+        start = time.perf_counter()
+        tmp_path = f'{path}.tmp-{os.getpid()}'
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        try:
+            meta = build(tmp_path, data_path, store_path, seed, tfidf_params)
+            meta.update(key=key, sources=[os.path.abspath(p) for p in sources], config=config,
+                        built_at=time.strftime('%Y-%m-%dT%H:%M:%S'), build_seconds=time.perf_counter() - start)
+            with open(os.path.join(tmp_path, 'meta.json'), 'w') as f:
+                json.dump(meta, f, indent=2, default=str)
+            os.rename(tmp_path, path)
+        except BaseException:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            if not os.path.isdir(path):
+                raise
+            # another process finished the same key first
+        if verbose:
+            print(f"💾 Built feature matrices {key} in {time.perf_counter() - start:.1f} s -> {path}")
+    elif verbose:
+        print(f"⚡ Feature matrices {key} loaded from cache ({path})")
+    return FeatureMatrices(path)
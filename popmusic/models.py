@@ -0,0 +1,142 @@
+"""
+Model definitions (notebook cells 7-9 and 19) and loading saved models
+
+build_model(name, input_dim) returns the compiled Keras FFN for one of
+ARCHITECTURES (build_ffn takes any layer list); train_model fits it with the notebook's class weights and
+callbacks. TensorFlow is imported inside these functions only.
+
+load_predictor(path) returns a callable mapping a float32 feature matrix
+(FeaturePipeline.transform output) to a 1-D array of pop probabilities:
+
+    .keras / .h5      Keras model saved from the notebook
+    .npz              Keras FFN exported with popmusic.numpy_ffn (no TensorFlow import)
+    .joblib / .pkl    scikit-learn style estimator with predict_proba
+"""
+
+import os
+
+import numpy as np
+
+PREDICT_BATCH_SIZE = 8192
+TRAIN_BATCH_SIZE = 256
+
+# name -> (Keras model name, hidden layers as (units, batchnorm, dropout, l2), learning rate)
+ARCHITECTURES = {
+    'shallow': ('Shallow_FFN', [(64, False, 0.3, None), (32, False, 0.2, None)], 1e-3),
+    'medium': ('Medium_FFN', [(128, True, 0.4, 1e-4), (64, True, 0.3, 1e-4), (32, False, 0.2, None)], 1e-3),
+    'deep': ('Deep_FFN_Optimized', [(128, True, 0.3, 5e-5), (96, True, 0.25, 5e-5), (64, True, 0.2, 5e-5),
+                                    (32, False, 0.15, None)], 1e-3),
+    'improved': ('Improved_FFN', [(64, True, 0.5, 1e-3), (32, True, 0.5, 1e-3), (16, False, 0.0, 1e-3)], 1e-3),
+}
+# Training schedule per architecture: epochs, EarlyStopping patience/min_delta, ReduceLROnPlateau patience/min_lr
+TRAINING = {
+    'shallow': {'epochs': 150, 'patience': 20, 'min_delta': 0.0, 'lr_patience': 8, 'min_lr': 1e-7},
+    'medium': {'epochs': 150, 'patience': 20, 'min_delta': 0.0, 'lr_patience': 8, 'min_lr': 1e-7},
+    'deep': {'epochs': 150, 'patience': 25, 'min_delta': 1e-5, 'lr_patience': 10, 'min_lr': 1e-7},
+    'improved': {'epochs': 100, 'patience': 5, 'min_delta': 0.0, 'lr_patience': 5, 'min_lr': 1e-5},
+}
+
+
+def build_model(name, input_dim):
+    """Compiled Keras FFN for one of ARCHITECTURES"""
+    model_name, hidden, learning_rate = ARCHITECTURES[name]
+    return build_ffn(input_dim, hidden, learning_rate, model_name)
+
+
+def build_ffn(input_dim, hidden, learning_rate=1e-3, name='FFN'):
+    """
+    Compiled Keras FFN: Dense(relu) -> [BatchNorm] -> [Dropout] per hidden layer, sigmoid output.
+    hidden is a list of (units, batchnorm, dropout, l2) as in ARCHITECTURES.
+    """
+    from tensorflow import keras as tfk
+    from tensorflow.keras import layers as tfl
+
+    layers = [tfl.Input(shape=(input_dim,), name='input')]
+    for i, (units, batchnorm, dropout, l2) in enumerate(hidden, start=1):
+        regularizer = tfk.regularizers.l2(l2) if l2 else None
+        layers.append(tfl.Dense(units, activation='relu', kernel_regularizer=regularizer, name=f'dense_{i}'))
+        if batchnorm:
+            layers.append(tfl.BatchNormalization(name=f'bn_{i}'))
+        if dropout:
+            layers.append(tfl.Dropout(dropout, name=f'dropout_{i}'))
+    layers.append(tfl.Dense(1, activation='sigmoid', name='output'))
+
+    model = tfk.Sequential(layers, name=name)
+    model.compile(
+        optimizer=tfk.optimizers.Adam(learning_rate=learning_rate, beta_1=0.9, beta_2=0.999),
+        loss=tfk.losses.BinaryCrossentropy(),
+        metrics=[
+            tfk.metrics.BinaryAccuracy(name='accuracy'),
+            tfk.metrics.Precision(name='precision'),
+            tfk.metrics.Recall(name='recall'),
+        ],
+    )
+    return model
+
+
+def class_weights(y):
+    """Balanced class weights {class: weight}, as passed to model.fit"""
+    from sklearn.utils import class_weight
+
+    classes = np.unique(y)
+    weights = class_weight.compute_class_weight(class_weight='balanced', classes=classes, y=y)
+    return {int(c): float(w) for c, w in zip(classes, weights)}
+
+
+def training_callbacks(name):
+    from tensorflow.keras import callbacks as tfkc
+
+    schedule = TRAINING[name]
+    return [
+        tfkc.EarlyStopping(monitor='val_loss', patience=schedule['patience'], min_delta=schedule['min_delta'],
+                           restore_best_weights=True, verbose=1),
+        tfkc.ReduceLROnPlateau(monitor='val_loss', factor=0.5, patience=schedule['lr_patience'],
+                               min_lr=schedule['min_lr'], verbose=1),
+    ]
+
+
+def train_model(name, X_train, y_train, X_val, y_val, epochs=None, verbose=1):
+    """Build and fit architecture `name`; returns (model, history)"""
+    model = build_model(name, X_train.shape[1])
+    history = model.fit(
+        X_train, y_train,
+        validation_data=(X_val, y_val),
+        epochs=epochs or TRAINING[name]['epochs'],
+        batch_size=TRAIN_BATCH_SIZE,
+        class_weight=class_weights(y_train),
+        verbose=verbose,
+        callbacks=training_callbacks(name),
+    )
+    return model, history
+
+
+def load_predictor(path):
+    """predict(X) -> 1-D pop probabilities for a saved model (see module docstring for formats)"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext in ('.keras', '.h5'):
+        from tensorflow import keras as tfk
+
+        model = tfk.models.load_model(path, compile=False)
+
+        def predict(X):
+            if len(X) <= PREDICT_BATCH_SIZE:
+                # A direct call skips predict()'s per-call setup, which dominates small online batches
+                return np.asarray(model(X, training=False)).ravel()
+            return model.predict(X, batch_size=PREDICT_BATCH_SIZE, verbose=0).ravel()
+        return predict
+
+    if ext == '.npz':
+        from popmusic.numpy_ffn import NumpyFFN
+
+        return NumpyFFN.load(path).predict
+
+    if ext in ('.joblib', '.pkl'):
+        import joblib
+
+        model = joblib.load(path)
+
+        def predict(X):
+            return np.asarray(model.predict_proba(X))[:, 1]
+        return predict
+
+    raise ValueError(f"Don't know how to load a model from {path} (expected .keras, .h5, .npz, .joblib or .pkl)")
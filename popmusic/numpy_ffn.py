@@ -0,0 +1,167 @@
+"""
+TensorFlow-free inference for the notebook's Keras FFNs
+
+export_numpy(model, path) flattens a Sequential model of Dense,
+BatchNormalization and Dropout layers into a stack of (W, b, activation)
+triples saved as one float32 .npz:
+
+    Dropout              dropped (identity at inference)
+    BatchNormalization   at inference an affine map x * s + t with
+                         s = gamma / sqrt(moving_var + eps), t = beta - mean * s,
+                         folded into the next Dense: W' = s[:, None] * W, b' = b + t @ W
+
+In these models BN sits after the ReLU (Dense -> relu -> BN), so it is folded
+forward into the following Dense rather than back into the preceding one; the
+fold is exact either way. A BN with no Dense after it is folded back into the
+preceding Dense when that layer is linear.
+
+NumpyFFN.load(path).predict(X) is then one matmul + bias + activation per
+layer. Loading reads a few KB and needs only NumPy, so a scorer starts in
+milliseconds instead of seconds.
+
+    python -m popmusic.numpy_ffn models/pop_ffn.keras models/pop_ffn.npz
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+ACTIVATIONS = ('linear', 'relu', 'sigmoid', 'tanh')
+
+
+def _activation_name(layer):
+    name = getattr(layer.activation, '__name__', str(layer.activation))
+    if name not in ACTIVATIONS:
+        raise ValueError(f"Layer {layer.name}: unsupported activation {name!r}")
+    return name
+
+
+def _batchnorm_affine(layer):
+    """(s, t) with BN(x) == x * s + t at inference"""
+    mean = np.asarray(layer.moving_mean, dtype=np.float64)
+    var = np.asarray(layer.moving_variance, dtype=np.float64)
+    gamma = np.asarray(layer.gamma, dtype=np.float64) if layer.scale else np.ones_like(mean)
+    beta = np.asarray(layer.beta, dtype=np.float64) if layer.center else np.zeros_like(mean)
+    s = gamma / np.sqrt(var + layer.epsilon)
+    return s, beta - mean * s
+
+
+def fold_layers(model):
+    """[(W, b, activation)] for a Sequential Dense/BatchNormalization/Dropout model, BN folded in"""
+    layers = []
+    pending = None  # BN affine waiting for the next Dense
+    for layer in model.layers:
+        kind = type(layer).__name__
+        if kind in ('Dropout', 'InputLayer'):
+            continue
+        if kind == 'Dense':
+            kernel, *bias = [np.asarray(w, dtype=np.float64) for w in layer.get_weights()]
+            b = bias[0] if bias else np.zeros(kernel.shape[1])
+            if pending is not None:
+                s, t = pending
+                b = b + t @ kernel
+                kernel = s[:, None] * kernel
+                pending = None
+            layers.append([kernel, b, _activation_name(layer)])
+        elif kind == 'BatchNormalization':
+            if pending is not None:
+                s0, t0 = pending
+                s, t = _batchnorm_affine(layer)
+                pending = (s0 * s, t0 * s + t)
+            else:
+                pending = _batchnorm_affine(layer)
+        else:
+            raise ValueError(f"Layer {layer.name}: {kind} layers can't be exported")
+
+    if pending is not None:
+        if not layers or layers[-1][2] != 'linear':
+            raise ValueError("A trailing BatchNormalization can only follow a linear Dense layer")
+        s, t = pending
+        layers[-1][0] = layers[-1][0] * s
+        layers[-1][1] = layers[-1][1] * s + t
+    return [(W.astype(np.float32), b.astype(np.float32), act) for W, b, act in layers]
+
+
+def export_numpy(model, path):
+    """Save model as a folded .npz for NumpyFFN; returns the NumpyFFN"""
+    layers = fold_layers(model)
+    arrays = {}
+    for i, (W, b, _) in enumerate(layers):
+        arrays[f'W{i}'] = W
+        arrays[f'b{i}'] = b
+    np.savez(path, activations=np.array([act for _, _, act in layers]), name=np.array(model.name), **arrays)
+    return NumpyFFN(layers, model.name)
+
+
+class NumpyFFN:
+    """Pure-NumPy forward pass over folded (W, b, activation) layers"""
+
+    def __init__(self, layers, name='ffn'):
+        self.layers = layers
+        self.name = name
+
+    @property
+    def n_features(self):
+        return self.layers[0][0].shape[0]
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            activations = [str(act) for act in data['activations']]
+            layers = [(data[f'W{i}'], data[f'b{i}'], act) for i, act in enumerate(activations)]
+            return cls(layers, str(data['name']))
+
+    def forward(self, X):
+        """Last-layer outputs, (n, units) float32"""
+        h = np.asarray(X, dtype=np.float32)
+        for W, b, act in self.layers:
+            h = h @ W
+            h += b
+            if act == 'relu':
+                np.maximum(h, 0, out=h)
+            elif act == 'sigmoid':
+                with np.errstate(over='ignore'):
+                    np.negative(h, out=h)
+                    np.exp(h, out=h)
+                h += 1
+                np.reciprocal(h, out=h)
+            elif act == 'tanh':
+                np.tanh(h, out=h)
+        return h
+
+    def predict(self, X):
+        """1-D pop probabilities (single sigmoid output)"""
+        return self.forward(X).ravel()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export a saved Keras FFN to a TensorFlow-free .npz")
+    parser.add_argument('model', help="saved Keras model (.keras, .h5)")
+    parser.add_argument('output', help="folded weights (.npz)")
+    parser.add_argument('--check-rows', type=int, default=4096,
+                        help="random rows to compare against model.predict (0 to skip)")
+    parser.add_argument('--atol', type=float, default=1e-5)
+    args = parser.parse_args(argv)
+
+    from tensorflow import keras as tfk
+
+    model = tfk.models.load_model(args.model, compile=False)
+    export_numpy(model, args.output)
+
+    start = time.perf_counter()
+    ffn = NumpyFFN.load(args.output)
+    load_ms = (time.perf_counter() - start) * 1000.0
+    print(f"✅ Exported {model.name}: {len(ffn.layers)} Dense layers, {ffn.n_features} inputs -> {args.output} "
+          f"(loads in {load_ms:.1f} ms)")
+
+    if args.check_rows:
+        X = np.random.default_rng(0).standard_normal((args.check_rows, ffn.n_features)).astype(np.float32)
+        diff = np.abs(model.predict(X, batch_size=8192, verbose=0).ravel() - ffn.predict(X)).max()
+        if diff > args.atol:
+            raise SystemExit(f"❌ NumPy forward pass differs from model.predict by {diff:.2e} (atol {args.atol:g})")
+        print(f"   max |keras - numpy| on {args.check_rows:,} rows: {diff:.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""
+Train several FFN architectures at once, one process each
+
+Cells 7-9 and 19 fit the four architectures one after another, each waiting
+out its own early-stopping patience. train_parallel runs them concurrently:
+
+  - The train / validation / test matrices are copied once into
+    multiprocessing.shared_memory blocks. Workers map them as read-only NumPy
+    views instead of receiving pickled copies.
+  - Workers are spawned (not forked: TensorFlow is not fork-safe) with
+    OMP/MKL/OpenBLAS/TF thread counts capped at threads_per_job, so N jobs
+    share the cores instead of each grabbing all of them.
+  - Each worker trains, saves <name>_ffn.keras + .npz, evaluates on the test
+    split and returns its history and metrics; the parent gathers them into
+    one report (printed, and saved as training_report.json).
+
+With enough cores, wall-clock approaches the slowest single model.
+
+    python -m popmusic train shallow medium deep improved --jobs 4
+"""
+
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+from multiprocessing import get_context, shared_memory
+
+import numpy as np
+
+THREAD_ENV_VARS = ['OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS',
+                   'TF_NUM_INTRAOP_THREADS', 'TF_NUM_INTEROP_THREADS']
+REPORT_NAME = 'training_report.json'
+
+
+class SharedArrays:
+    """Named arrays copied into shared memory; .spec() is what a worker needs to map them"""
+
+    def __init__(self, arrays):
+        self._blocks = {}
+        self._spec = {}
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+            self._blocks[name] = block
+            self._spec[name] = (block.name, array.shape, array.dtype.str)
+
+    def spec(self):
+        return dict(self._spec)
+
+    def close(self):
+        for block in self._blocks.values():
+            block.close()
+            block.unlink()
+        self._blocks.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def attach(spec):
+    """({name: read-only array}, blocks to keep open) for a SharedArrays spec"""
+    arrays, blocks = {}, []
+    for name, (block_name, shape, dtype) in spec.items():
+        block = shared_memory.SharedMemory(name=block_name)
+        array = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+        array.flags.writeable = False
+        arrays[name] = array
+        blocks.append(block)
+    return arrays, blocks
+
+
+def detach(blocks):
+    """Close a worker's shared-memory mappings (left mapped if something still holds a view)"""
+    for block in blocks:
+        try:
+            block.close()
+        except BufferError:
+            pass
+
+
+@contextmanager
+def thread_cap_env(threads):
+    """Set the thread-count variables while worker processes are spawned (children inherit them)"""
+    saved = {var: os.environ.get(var) for var in THREAD_ENV_VARS}
+    os.environ.update({var: str(threads) for var in THREAD_ENV_VARS if var != 'TF_NUM_INTEROP_THREADS'})
+    os.environ['TF_NUM_INTEROP_THREADS'] = '1'
+    try:
+        yield
+    finally:
+        for var, value in saved.items():
+            if value is None:
+                os.environ.pop(var, None)
+            else:
+                os.environ[var] = value
+
+
+def _summary(metrics):
+    return {key: float(metrics[key]) for key in ('accuracy', 'precision', 'recall', 'f1', 'auc')}
+
+
+def train_worker(name, spec, output_dir, threads, epochs):
+    """Runs in a worker process: train `name` on the shared matrices, save it, return its report entry"""
+    import tensorflow as tf
+
+    tf.config.threading.set_intra_op_parallelism_threads(threads)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+
+    from popmusic.evaluate import evaluate_probs
+    from popmusic.models import train_model
+    from popmusic.numpy_ffn import export_numpy
+
+    arrays, blocks = attach(spec)
+    try:
+        start = time.perf_counter()
+        model, history = train_model(name, arrays['X_train'], arrays['y_train'], arrays['X_val'], arrays['y_val'],
+                                     epochs=epochs, verbose=0)
+        seconds = time.perf_counter() - start
+        path = os.path.join(output_dir, f'{name}_ffn.keras')
+        model.save(path)
+        export_numpy(model, os.path.splitext(path)[0] + '.npz')
+        val = evaluate_probs(arrays['y_val'], model.predict(arrays['X_val'], verbose=0))
+        test = evaluate_probs(arrays['y_test'], model.predict(arrays['X_test'], verbose=0))
+    finally:
+        del arrays
+        detach(blocks)
+
+    val_loss = history.history['val_loss']
+    return {
+        'name': name,
+        'model_name': model.name,
+        'path': path,
+        'seconds': seconds,
+        'pid': os.getpid(),
+        'epochs_run': len(val_loss),
+        'best_epoch': int(np.argmin(val_loss)) + 1,
+        'best_val_loss': float(min(val_loss)),
+        'history': {key: [float(v) for v in values] for key, values in history.history.items()},
+        'val': _summary(val),
+        'test': _summary(test),
+    }
+
+
+def train_parallel(X, y, splits, architectures, output_dir, jobs=None, threads_per_job=None, epochs=None):
+    """Train architectures in parallel worker processes; returns the combined report dict"""
+    idx_train, idx_val, idx_test = splits
+    jobs = min(jobs or len(architectures), len(architectures))
+    threads = threads_per_job or max(1, (os.cpu_count() or 1) // jobs)
+    os.makedirs(output_dir, exist_ok=True)
+
+    arrays = {
+        'X_train': X[idx_train], 'y_train': y[idx_train],
+        'X_val': X[idx_val], 'y_val': y[idx_val],
+        'X_test': X[idx_test], 'y_test': y[idx_test],
+    }
+    results = {}
+    start = time.perf_counter()
+    with SharedArrays(arrays) as shared:
+        del arrays
+        spec = shared.spec()
+        with thread_cap_env(threads):
+            pool = ProcessPoolExecutor(max_workers=jobs, mp_context=get_context('spawn'))
+            futures = {pool.submit(train_worker, name, spec, output_dir, threads, epochs): name
+                       for name in architectures}
+        with pool:
+            for future in as_completed(futures):
+                entry = future.result()
+                results[entry['name']] = entry
+                print(f"✅ {entry['name']}: {entry['seconds']:.1f} s, {entry['epochs_run']} epochs, "
+                      f"val_loss {entry['best_val_loss']:.4f}, test F1 {entry['test']['f1']:.4f}")
+    wall = time.perf_counter() - start
+
+    report = {
+        'jobs': jobs,
+        'threads_per_job': threads,
+        'cpu_count': os.cpu_count(),
+        'wall_seconds': wall,
+        'sum_model_seconds': sum(entry['seconds'] for entry in results.values()),
+        'slowest_model_seconds': max(entry['seconds'] for entry in results.values()),
+        'models': {name: results[name] for name in architectures},
+    }
+    with open(os.path.join(output_dir, REPORT_NAME), 'w') as f:
+        json.dump(report, f, indent=2)
+    return report
+
+
+def print_report(report):
+    print("\n" + "=" * 80)
+    print(f"PARALLEL TRAINING: {report['jobs']} jobs x {report['threads_per_job']} threads "
+          f"({report['cpu_count']} CPUs)")
+    print("=" * 80)
+    print(f"{'Model':<12}{'Seconds':>9}{'Epochs':>8}{'Best':>6}{'Val loss':>10}{'Val F1':>8}{'Test F1':>9}{'Test AUC':>10}")
+    for name, entry in report['models'].items():
+        print(f"{name:<12}{entry['seconds']:>9.1f}{entry['epochs_run']:>8}{entry['best_epoch']:>6}"
+              f"{entry['best_val_loss']:>10.4f}{entry['val']['f1']:>8.4f}{entry['test']['f1']:>9.4f}"
+              f"{entry['test']['auc']:>10.4f}")
+    print(f"\nWall clock {report['wall_seconds']:.1f} s vs {report['sum_model_seconds']:.1f} s sequential "
+          f"(slowest model {report['slowest_model_seconds']:.1f} s)")
@@ -0,0 +1,196 @@
+"""
+Fitted, serializable feature pipeline
+
+FeaturePipeline reproduces the notebook's feature engineering (cell 3) and its
+data-quality rescaling (cell 6) as one object that is fitted on the training
+split only and saved once:
+
+    numeric   engineered columns -> StandardScaler -> NaN/Inf to 0 -> RobustScaler
+    one-hot   time_of_day_synth (categories seen in training) -> RobustScaler
+    genre     safe genre text -> TF-IDF (vocabulary from training) -> RobustScaler
+
+Both scalers are folded into one per-column affine map, out = x * scale + offset,
+with non-finite numeric inputs mapped straight to their fill value. transform()
+therefore writes a batch into a single float32 buffer (optionally preallocated)
+and never refits anything. The robust scaling of the one-hot and TF-IDF columns
+is fitted on their CSR block (popmusic.features.sparse_robust_stats), so fitting
+never densifies the genre vocabulary.
+
+transform(df, sparse=True) is the input for models that take sparse matrices:
+the dense numeric block hstacked with the scaled one-hot and TF-IDF CSR. Those
+columns are divided by their IQR but not centered, so zeros stay implicit; that
+per-column shift (sparse_offset) is absorbed by trees and by linear models with
+an intercept.
+
+    pipeline = FeaturePipeline().fit(train_df)
+    pipeline.save('models/feature_pipeline.joblib')
+    X = FeaturePipeline.load('models/feature_pipeline.joblib').transform(batch_df)
+    X_csr = pipeline.transform(batch_df, sparse=True)
+"""
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from popmusic.features import (
+    CAT_FEATURE, ENGINEERED_FEATURES, GENRE_COLUMN, TFIDF_PARAMS,
+    add_engineered_columns, genre_block, hstack_blocks, numeric_block, numeric_feature_columns,
+    one_hot_block, one_hot_names, sparse_robust_stats,
+)
+from popmusic.labels import clean_genre_text
+
+# Raw columns the engineered features are computed from
+ENGINEERED_INPUTS = ['is_explicit', 'album_release_date', 'album_release_year', 'spotify_popularity', 'tempo_bpm_synth']
+
+
+class FeaturePipeline:
+    """Train-once feature transform: DataFrame batch -> float32 model input"""
+
+    def __init__(self, tfidf_params=None):
+        self.tfidf_params = dict(tfidf_params or TFIDF_PARAMS)
+
+    @property
+    def n_features(self):
+        return len(self.feature_names_)
+
+    @property
+    def input_columns(self):
+        """Raw dataset columns transform() reads"""
+        raw = [col for col in self.numeric_columns_ if col not in ENGINEERED_FEATURES]
+        if any(col in ENGINEERED_FEATURES for col in self.numeric_columns_):
+            raw += [col for col in ENGINEERED_INPUTS if col not in raw]
+        raw.append(CAT_FEATURE)
+        if self.vectorizer_ is not None:
+            raw.append(GENRE_COLUMN)
+        return raw
+
+    def _numeric_frame(self, df):
+        """Numeric feature columns for df, computing the engineered ones on a small copy"""
+        missing = [col for col in self.numeric_columns_ if col not in df.columns]
+        if missing:
+            inputs = df[[col for col in ENGINEERED_INPUTS if col in df.columns]].copy()
+            df = pd.concat([df[[col for col in self.numeric_columns_ if col in df.columns]],
+                            add_engineered_columns(inputs)[ENGINEERED_FEATURES]], axis=1)
+        return df[self.numeric_columns_]
+
+    def _genre_text(self, df):
+        if GENRE_COLUMN in df.columns:
+            return clean_genre_text(df[GENRE_COLUMN])
+        return pd.Series('', index=df.index)
+
+    def fit(self, df):
+        """Fit scalers, categories and TF-IDF vocabulary on the training rows df"""
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.preprocessing import RobustScaler, StandardScaler
+
+        self.numeric_columns_ = numeric_feature_columns(set(df.columns) | set(ENGINEERED_FEATURES))
+        numeric = self._numeric_frame(df).to_numpy(dtype=np.float64)
+        self.standard_ = StandardScaler().fit(numeric)
+        self.categories_ = sorted(df[CAT_FEATURE].dropna().unique())
+
+        self.vectorizer_ = None
+        genre_names = []
+        if GENRE_COLUMN in df.columns:
+            try:
+                self.vectorizer_ = TfidfVectorizer(**self.tfidf_params).fit(self._genre_text(df))
+                genre_names = [f'genre_{name}' for name in self.vectorizer_.get_feature_names_out()]
+            except ValueError as e:
+                print(f'⚠️  Could not create genre features: {e}')
+        self.feature_names_ = self.numeric_columns_ + one_hot_names(self.categories_) + genre_names
+
+        # Robust scaling is fitted on the cleaned, standardised training matrix (notebook cell 6):
+        # dense for the numeric block, on the CSR for the one-hot and TF-IDF columns
+        numeric = numeric_block(self._numeric_frame(df), self.numeric_columns_, self.standard_)
+        np.nan_to_num(numeric, copy=False, nan=0.0, posinf=0.0, neginf=0.0)
+        robust = RobustScaler().fit(numeric)
+        sparse_center, sparse_iqr = sparse_robust_stats(self._sparse_block(df))
+        center = np.concatenate([robust.center_, sparse_center])
+        iqr = np.concatenate([robust.scale_, sparse_iqr])
+
+        # Fold: numeric   out = ((x - mean) / std - center) / iqr
+        #       others    out = (v - center) / iqr
+        k = len(self.numeric_columns_)
+        inv_iqr = 1.0 / iqr
+        scale = inv_iqr.copy()
+        offset = -center * inv_iqr
+        scale[:k] = inv_iqr[:k] / self.standard_.scale_
+        offset[:k] = -(self.standard_.mean_ / self.standard_.scale_ + center[:k]) * inv_iqr[:k]
+        self.scale_ = scale.astype(np.float32)
+        self.offset_ = offset.astype(np.float32)
+        # Non-finite numeric inputs become 0 after standardising, i.e. -center / iqr
+        self.nan_fill_ = (-center[:k] * inv_iqr[:k]).astype(np.float32)
+        return self
+
+    @property
+    def sparse_offset(self):
+        """transform(df) - transform(df, sparse=True) per column: the centering the sparse output skips"""
+        offset = self.offset_.copy()
+        offset[:len(self.numeric_columns_)] = 0.0
+        return offset
+
+    def _sparse_block(self, df):
+        """Unscaled one-hot + TF-IDF columns as float32 CSR"""
+        return hstack_blocks([
+            one_hot_block(df[CAT_FEATURE], self.categories_),
+            genre_block(self._genre_text(df), self.vectorizer_),
+        ])
+
+    def _scale_numeric(self, df, out):
+        """Write the scaled numeric block of df into out (len(df), k)"""
+        k = len(self.numeric_columns_)
+        numeric = self._numeric_frame(df).to_numpy(dtype=np.float32)
+        np.multiply(numeric, self.scale_[:k], out=out)
+        out += self.offset_[:k]
+        np.copyto(out, np.broadcast_to(self.nan_fill_, out.shape), where=~np.isfinite(numeric))
+        return out
+
+    def transform(self, df, out=None, sparse=False):
+        """
+        Model input for df as a float32 (len(df), n_features) array.
+        Pass out= (a preallocated float32 array of at least len(df) rows) to reuse a buffer.
+        With sparse=True, a float32 CSR instead: the scaled numeric block hstacked with the
+        one-hot and TF-IDF columns scaled by their IQR, uncentered (out= is ignored).
+        """
+        n = len(df)
+        k = len(self.numeric_columns_)
+        n_cat = len(self.categories_)
+        if sparse:
+            numeric = self._scale_numeric(df, np.empty((n, k), dtype=np.float32))
+            rest = self._sparse_block(df)
+            rest.data *= self.scale_[k + rest.indices]
+            return hstack_blocks([sp.csr_matrix(numeric), rest])
+
+        if out is None:
+            out = np.empty((n, self.n_features), dtype=np.float32)
+        else:
+            out = out[:n]
+
+        # All columns start at the value of a zero input; numeric columns are overwritten below
+        out[:] = self.offset_
+        self._scale_numeric(df, out[:, :k])
+
+        codes = pd.Categorical(df[CAT_FEATURE], categories=self.categories_).codes
+        rows = np.flatnonzero(codes >= 0)
+        cols = k + codes[rows]
+        out[rows, cols] += self.scale_[cols]
+
+        if self.vectorizer_ is not None:
+            tfidf = sp.coo_matrix(self.vectorizer_.transform(self._genre_text(df)))
+            cols = k + n_cat + tfidf.col
+            # (row, col) pairs of a CSR are unique, so a fancy-indexed add is exact
+            out[tfidf.row, cols] += (tfidf.data * self.scale_[cols]).astype(np.float32)
+        return out
+
+    def save(self, path):
+        import joblib
+
+        joblib.dump(self, path)
+
+    @classmethod
+    def load(cls, path):
+        import joblib
+
+        pipeline = joblib.load(path)
+        if not isinstance(pipeline, cls):
+            raise TypeError(f"{path} does not hold a {cls.__name__}")
+        return pipeline
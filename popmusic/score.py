@@ -0,0 +1,188 @@
+"""
+Streaming batch scoring: catalogue CSV/Parquet -> song_spotify_id, p_pop
+
+The input is read in fixed-size chunks on a background thread (at most
+--prefetch chunks are buffered), so parsing the next chunk overlaps with
+feature transform and prediction of the current one. Each chunk goes through
+the saved FeaturePipeline into one reused float32 buffer, then through the
+model, and its scores are appended to the output straight away. Memory is
+bounded by the chunk size whatever the size of the catalogue.
+
+Usage:
+    python -m popmusic.score --pipeline models/feature_pipeline.joblib \\
+        --model models/pop_ffn.keras --input catalogue.parquet --output scores.csv
+"""
+
+import argparse
+import os
+import queue
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from popmusic.models import load_predictor
+from popmusic.pipeline import FeaturePipeline
+
+ID_COLUMN = 'song_spotify_id'
+CHUNK_ROWS = 100_000
+PREFETCH_CHUNKS = 2
+_DONE = object()
+
+
+def iter_chunks(path, columns, chunk_rows):
+    """DataFrames of at most chunk_rows rows holding `columns`, from a CSV or Parquet file"""
+    if path.endswith('.parquet') or path.endswith('.pq'):
+        import pyarrow.parquet as pq
+
+        parquet = pq.ParquetFile(path)
+        available = set(parquet.schema_arrow.names)
+        for batch in parquet.iter_batches(batch_size=chunk_rows, columns=[c for c in columns if c in available]):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, usecols=lambda col: col in columns, dtype={ID_COLUMN: str},
+                               chunksize=chunk_rows)
+
+
+def prefetch(iterable, depth):
+    """
+    Run iterable on a background thread, keeping at most `depth` items ready.
+    Closing the generator (or an exception in the consumer) stops the producer.
+    """
+    buffer = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put(item):
+                    return
+        except BaseException as e:  # re-raised in the consumer
+            put(e)
+        put(_DONE)
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is _DONE:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        producer.join(timeout=1.0)
+
+
+class ScoreWriter:
+    """
+    Appends (song_spotify_id, p_pop) chunks to a temporary file. commit() renames it over
+    the output; abort() deletes it and leaves any previous output untouched.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.tmp_path = f'{path}.tmp'
+        self.parquet = path.endswith('.parquet') or path.endswith('.pq')
+        self._writer = None
+        self._fh = None
+
+    def write(self, ids, probs):
+        frame = pd.DataFrame({ID_COLUMN: ids, 'p_pop': probs})
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.tmp_path, table.schema)
+            self._writer.write_table(table)
+        else:
+            header = self._fh is None
+            if header:
+                self._fh = open(self.tmp_path, 'w', newline='')
+            frame.to_csv(self._fh, header=header, index=False, float_format='%.6f')
+
+    def _close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+    def commit(self):
+        opened = self._writer is not None or self._fh is not None
+        self._close()
+        if not opened and self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            schema = pa.schema([(ID_COLUMN, pa.string()), ('p_pop', pa.float32())])
+            pq.write_table(schema.empty_table(), self.tmp_path)
+        elif not opened:
+            pd.DataFrame(columns=[ID_COLUMN, 'p_pop']).to_csv(self.tmp_path, index=False)
+        os.replace(self.tmp_path, self.path)
+
+    def abort(self):
+        self._close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+
+def score_file(pipeline, predict, input_path, output_path, chunk_rows=CHUNK_ROWS, prefetch_chunks=PREFETCH_CHUNKS,
+               report_every=10):
+    """Score input_path into output_path; returns (rows, seconds)"""
+    columns = set(pipeline.input_columns) | {ID_COLUMN}
+    buffer = np.empty((chunk_rows, pipeline.n_features), dtype=np.float32)
+    writer = ScoreWriter(output_path)
+    rows = 0
+    start = time.perf_counter()
+    chunks = prefetch(iter_chunks(input_path, columns, chunk_rows), prefetch_chunks)
+    try:
+        for idx, chunk in enumerate(chunks, start=1):
+            X = pipeline.transform(chunk, out=buffer)
+            writer.write(chunk[ID_COLUMN].to_numpy(), predict(X))
+            rows += len(chunk)
+            if idx % report_every == 0:
+                elapsed = time.perf_counter() - start
+                print(f"  scored {rows:,} rows ({rows / elapsed:,.0f} rows/s)", file=sys.stderr)
+    except BaseException:
+        chunks.close()
+        writer.abort()
+        raise
+    writer.commit()
+    return rows, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stream a catalogue through the saved pipeline and model")
+    parser.add_argument('--pipeline', required=True, help="FeaturePipeline saved by the notebook (.joblib)")
+    parser.add_argument('--model', required=True, help="saved model (.keras, .h5, .joblib)")
+    parser.add_argument('--input', required=True, help="catalogue CSV or Parquet")
+    parser.add_argument('--output', required=True, help="scores CSV or Parquet (song_spotify_id, p_pop)")
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS)
+    parser.add_argument('--prefetch', type=int, default=PREFETCH_CHUNKS, help="chunks read ahead")
+    args = parser.parse_args(argv)
+
+    pipeline = FeaturePipeline.load(args.pipeline)
+    predict = load_predictor(args.model)
+    rows, seconds = score_file(pipeline, predict, args.input, args.output, args.chunk_rows, args.prefetch)
+    print(f"✅ Scored {rows:,} rows in {seconds:.1f} s ({rows / max(seconds, 1e-9):,.0f} rows/s) -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
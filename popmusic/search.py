@@ -0,0 +1,268 @@
+"""
+Asynchronous successive halving (ASHA) search over the FFN family
+
+Model 2/3 were tuned by hand, one full 100+-epoch run per idea. search() samples
+configurations instead:
+
+    depth          2-4 hidden layers, widths halving from 32-256 (min 16)
+    batchnorm      after every hidden layer but the last (as Medium/Deep), or none
+    dropout        0.0-0.5
+    l2             1e-6-1e-2 (log-uniform)
+    learning rate  1e-4-3e-3 (log-uniform)
+    batch size     128, 256, 512, 1024
+
+It trains them with ASHA. Rung k trains a configuration to
+min_epochs * eta**k epochs (capped at max_epochs). Whenever a worker is
+free, the scheduler promotes the best not-yet-promoted configuration in the
+top 1/eta of some rung, searching from the top rung down. If there is none,
+it starts a new configuration at rung 0. A promoted trial resumes from its
+checkpoint, optimizer state included, so no epoch is trained twice. Poor
+performers by validation AUC are never promoted. Most configurations
+therefore cost min_epochs, and only about 1/eta**k of them reach rung k.
+With eta=3 and 1 -> 81 epochs, the epochs of ten full runs explore well over
+a hundred configurations.
+
+Trials run in spawned worker processes that share the train and validation
+matrices through shared memory and are thread-capped, like
+popmusic.parallel_train. search_report.json records every trial, its rung
+scores and the best configuration. Trials rank on the furthest rung where
+they scored a finite val AUC (a failed or NaN rung keeps the previous rung's
+checkpoint). The best model is kept as search_best.keras, and all other
+checkpoints are deleted; when no trial scored at all there is no best model.
+
+    python -m popmusic search --trials 200 --jobs 8 --max-epochs 81
+"""
+
+import json
+import math
+import os
+import shutil
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import get_context
+
+import numpy as np
+
+from popmusic.parallel_train import SharedArrays, attach, detach, thread_cap_env
+
+WIDTHS = [32, 64, 96, 128, 192, 256]
+DEPTHS = [2, 3, 4]
+BATCH_SIZES = [128, 256, 512, 1024]
+REPORT_NAME = 'search_report.json'
+BEST_NAME = 'search_best.keras'
+
+
+def sample_config(rng):
+    depth = int(rng.choice(DEPTHS))
+    first = int(rng.choice(WIDTHS))
+    return {
+        'widths': [max(16, first >> i) for i in range(depth)],
+        'batchnorm': bool(rng.random() < 0.5),
+        'dropout': round(float(rng.uniform(0.0, 0.5)), 3),
+        'l2': float(10 ** rng.uniform(-6, -2)),
+        'learning_rate': float(10 ** rng.uniform(-4, math.log10(3e-3))),
+        'batch_size': int(rng.choice(BATCH_SIZES)),
+    }
+
+
+def hidden_layers(config):
+    """ARCHITECTURES-style (units, batchnorm, dropout, l2) list for a sampled config"""
+    last = len(config['widths']) - 1
+    return [(units, config['batchnorm'] and i < last, config['dropout'], config['l2'])
+            for i, units in enumerate(config['widths'])]
+
+
+class ASHA:
+    """Rung bookkeeping for asynchronous successive halving"""
+
+    def __init__(self, min_epochs=1, max_epochs=81, eta=3):
+        self.eta = eta
+        self.rung_epochs = []
+        epochs = min_epochs
+        while epochs < max_epochs:
+            self.rung_epochs.append(epochs)
+            epochs *= eta
+        self.rung_epochs.append(max_epochs)
+        self.scores = [{} for _ in self.rung_epochs]      # rung -> {trial: val AUC}
+        self.promoted = [set() for _ in self.rung_epochs]
+
+    def record(self, trial, rung, score):
+        self.scores[rung][trial] = score
+
+    def promotion(self):
+        """(trial, next rung) for the best unpromoted trial in the top 1/eta of a rung, or None"""
+        for rung in reversed(range(len(self.rung_epochs) - 1)):
+            scores = self.scores[rung]
+            n_top = len(scores) // self.eta
+            for trial in sorted(scores, key=scores.get, reverse=True)[:n_top]:
+                if trial not in self.promoted[rung]:
+                    self.promoted[rung].add(trial)
+                    return trial, rung + 1
+        return None
+
+
+def _furthest(scores):
+    """(epochs, val AUC) at the furthest rung with a finite score, (0, -inf) if none; trials rank on this"""
+    finite = [epochs for epochs, score in scores.items() if math.isfinite(score)]
+    if not finite:
+        return 0, -math.inf
+    epochs = max(finite)
+    return epochs, scores[epochs]
+
+
+def _init_worker(threads):
+    import tensorflow as tf
+
+    tf.config.threading.set_intra_op_parallelism_threads(threads)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+
+
+def run_trial(trial, config, rung, epochs_from, epochs_to, spec, trial_dir):
+    """Worker: train trial from epochs_from to epochs_to (resuming its checkpoint), return val AUC"""
+    from sklearn.metrics import roc_auc_score
+    from tensorflow import keras as tfk
+
+    from popmusic.models import build_ffn, class_weights
+
+    arrays, blocks = attach(spec)
+    path = os.path.join(trial_dir, f'trial_{trial:04d}.keras')
+    try:
+        start = time.perf_counter()
+        if epochs_from:
+            model = tfk.models.load_model(path)
+        else:
+            model = build_ffn(arrays['X_train'].shape[1], hidden_layers(config), config['learning_rate'],
+                              name=f'trial_{trial:04d}')
+        model.fit(arrays['X_train'], arrays['y_train'], batch_size=config['batch_size'],
+                  epochs=epochs_to, initial_epoch=epochs_from,
+                  class_weight=class_weights(arrays['y_train']), verbose=0)
+        probs = model.predict(arrays['X_val'], batch_size=8192, verbose=0).ravel()
+        auc = float(roc_auc_score(arrays['y_val'], probs)) if np.isfinite(probs).all() else float('nan')
+        # A diverged model keeps the last good checkpoint, which is what the trial ranks on
+        if np.isfinite(auc):
+            model.save(path)
+        seconds = time.perf_counter() - start
+    finally:
+        del arrays
+        detach(blocks)
+    return {'trial': trial, 'rung': rung, 'epochs': epochs_to, 'val_auc': auc, 'seconds': seconds}
+
+
+def search(X_train, y_train, X_val, y_val, output_dir, trials=100, jobs=None, threads_per_job=None,
+           min_epochs=1, max_epochs=81, eta=3, seed=42):
+    """Run the ASHA search; returns the report dict (also saved as search_report.json)"""
+    rng = np.random.default_rng(seed)
+    scheduler = ASHA(min_epochs, max_epochs, eta)
+    jobs = jobs or max(1, (os.cpu_count() or 1) // 2)
+    threads = threads_per_job or max(1, (os.cpu_count() or 1) // jobs)
+    trial_dir = os.path.join(output_dir, 'search_trials')
+    os.makedirs(trial_dir, exist_ok=True)
+
+    configs, history = {}, {}
+    epochs_trained = 0
+    start = time.perf_counter()
+    with SharedArrays({'X_train': X_train, 'y_train': y_train, 'X_val': X_val, 'y_val': y_val}) as shared:
+        spec = shared.spec()
+        with ProcessPoolExecutor(max_workers=jobs, mp_context=get_context('spawn'),
+                                 initializer=_init_worker, initargs=(threads,)) as pool:
+            running = {}
+
+            def next_job():
+                promotion = scheduler.promotion()
+                if promotion is not None:
+                    trial, rung = promotion
+                elif len(configs) < trials:
+                    trial, rung = len(configs), 0
+                    configs[trial] = sample_config(rng)
+                    history[trial] = {}
+                else:
+                    return False
+                epochs_from = scheduler.rung_epochs[rung - 1] if rung else 0
+                future = pool.submit(run_trial, trial, configs[trial], rung, epochs_from,
+                                     scheduler.rung_epochs[rung], spec, trial_dir)
+                running[future] = (trial, rung, scheduler.rung_epochs[rung] - epochs_from)
+                return True
+
+            while True:
+                # Spawning happens on submit, so keep the thread caps in the environment meanwhile
+                with thread_cap_env(threads):
+                    while len(running) < jobs and next_job():
+                        pass
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    trial, rung, epochs = running.pop(future)
+                    epochs_trained += epochs
+                    try:
+                        result = future.result()
+                        score = result['val_auc'] if np.isfinite(result['val_auc']) else -math.inf
+                    except Exception as e:
+                        print(f"⚠️  trial {trial} failed at rung {rung}: {e}")
+                        score = -math.inf
+                    scheduler.record(trial, rung, score)
+                    history[trial][scheduler.rung_epochs[rung]] = score
+                    if rung:
+                        print(f"  trial {trial:4d} rung {rung} ({scheduler.rung_epochs[rung]:3d} epochs) "
+                              f"val AUC {score:.4f}")
+    wall = time.perf_counter() - start
+
+    ranked = [trial for trial in history if math.isfinite(_furthest(history[trial])[1])]
+    best_report = None
+    if ranked:
+        best = max(ranked, key=lambda trial: _furthest(history[trial]))
+        best_epochs, best_auc = _furthest(history[best])
+        best_path = os.path.join(output_dir, BEST_NAME)
+        shutil.copyfile(os.path.join(trial_dir, f'trial_{best:04d}.keras'), best_path)
+        best_report = {'trial': best, 'config': configs[best], 'hidden': hidden_layers(configs[best]),
+                       'rung': scheduler.rung_epochs.index(best_epochs), 'epochs': best_epochs,
+                       'val_auc': best_auc, 'path': best_path}
+    else:
+        print("⚠️  No trial produced a finite val AUC; no best model saved")
+    shutil.rmtree(trial_dir, ignore_errors=True)
+
+    report = {
+        'trials': len(configs),
+        'jobs': jobs,
+        'threads_per_job': threads,
+        'rung_epochs': scheduler.rung_epochs,
+        'trials_per_rung': [len(scores) for scores in scheduler.scores],
+        'epochs_trained': epochs_trained,
+        'full_run_equivalents': epochs_trained / max_epochs,
+        'wall_seconds': wall,
+        'best': best_report,
+        'results': [{'trial': trial, 'config': configs[trial],
+                     'val_auc_by_epochs': {str(k): v for k, v in history[trial].items()}}
+                    for trial in sorted(configs)],
+    }
+    with open(os.path.join(output_dir, REPORT_NAME), 'w') as f:
+        json.dump(report, f, indent=2, default=float)
+    return report
+
+
+def print_report(report, top=10):
+    print("\n" + "=" * 80)
+    print(f"ASHA SEARCH: {report['trials']} configurations, {report['epochs_trained']:,} epochs "
+          f"(= {report['full_run_equivalents']:.1f} full {report['rung_epochs'][-1]}-epoch runs), "
+          f"{report['wall_seconds'] / 60:.1f} min")
+    print("=" * 80)
+    print("Rungs (epochs: trials): " + ", ".join(
+        f"{epochs}: {n}" for epochs, n in zip(report['rung_epochs'], report['trials_per_rung'])))
+
+    def furthest(result):
+        return _furthest({int(k): v for k, v in result['val_auc_by_epochs'].items()})
+
+    ranked = sorted(report['results'], key=furthest, reverse=True)
+    print(f"\n{'Trial':>6}{'Epochs':>8}{'Val AUC':>9}  widths / bn / dropout / l2 / lr / batch")
+    for r in ranked[:top]:
+        epochs, auc = furthest(r)
+        c = r['config']
+        print(f"{r['trial']:>6}{epochs:>8}{auc:>9.4f}  "
+              f"{c['widths']} / {'bn' if c['batchnorm'] else '-'} / {c['dropout']:.2f} / {c['l2']:.1e} / "
+              f"{c['learning_rate']:.1e} / {c['batch_size']}")
+    best = report['best']
+    if best is None:
+        print("\n⚠️  No trial produced a finite val AUC")
+        return
+    print(f"\n🏆 Best: trial {best['trial']}, val AUC {best['val_auc']:.4f} "
+          f"({best['epochs']} epochs, rung {best['rung']}) -> {best['path']}")
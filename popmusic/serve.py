@@ -0,0 +1,360 @@
+"""
+Online pop scoring service with dynamic micro-batching
+
+Loads the saved FeaturePipeline and one or more models once at startup and
+answers HTTP requests on a ThreadingHTTPServer:
+
+    POST /predict[?model=NAME]   one track (JSON object) or a list of tracks
+    GET  /metrics                latency percentiles and throughput counters
+    GET  /health                 models, input columns and batching settings
+
+Concurrent requests are not scored one by one. Each handler thread queues its
+tracks with the model's MicroBatcher and waits; the batcher's worker takes the
+first queued request, keeps collecting until it has --max-batch rows or
+--max-wait-ms has passed, then runs one pipeline.transform + predict for the
+whole batch and hands every request its slice of the scores. Under load this
+turns many tiny model calls into a few larger ones; an idle server still
+answers a lone request after at most max-wait-ms.
+
+Tracks are JSON objects holding the pipeline's input columns (see /health);
+song_spotify_id, if present, is echoed back. Missing values may be null.
+Tracks are type-checked before they are queued (numbers, a true/false/0/1
+explicit flag, strings, or null), so a bad track gets a 400 on its own
+request. If a coalesced batch still fails, its requests are rescored one by
+one and only the request that breaks scoring sees the error.
+
+Usage:
+    python -m popmusic.serve --pipeline models/feature_pipeline.joblib \\
+        --model models/pop_ffn.keras --port 8080 --max-batch 256 --max-wait-ms 2
+    curl -s localhost:8080/predict -d '{"spotify_popularity": 71, ...}'
+"""
+
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from popmusic.features import CAT_FEATURE, GENRE_COLUMN
+from popmusic.models import load_predictor
+from popmusic.pipeline import FeaturePipeline
+
+ID_COLUMN = 'song_spotify_id'
+MAX_BATCH = 256
+MAX_WAIT_MS = 2.0
+LATENCY_WINDOW = 10_000  # requests kept for the percentiles
+TEXT_COLUMNS = {ID_COLUMN, 'album_release_date', CAT_FEATURE, GENRE_COLUMN}
+FLAG_COLUMNS = {'is_explicit'}
+_STOP = object()
+
+
+class ServeStats:
+    """Thread-safe request/batch counters and a sliding window of request latencies"""
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self.started = time.perf_counter()
+        self.latencies_ms = deque(maxlen=window)
+        self.requests = 0
+        self.errors = 0
+        self.rows = 0
+        self.batches = 0
+        self.batch_rows = 0
+        self._lock = threading.Lock()
+
+    def record_request(self, rows, latency_ms):
+        with self._lock:
+            self.requests += 1
+            self.rows += rows
+            self.latencies_ms.append(latency_ms)
+
+    def record_error(self):
+        with self._lock:
+            self.errors += 1
+
+    def record_batch(self, rows):
+        with self._lock:
+            self.batches += 1
+            self.batch_rows += rows
+
+    def snapshot(self):
+        with self._lock:
+            latencies = np.asarray(self.latencies_ms, dtype=np.float64)
+            elapsed = time.perf_counter() - self.started
+            snap = {
+                'uptime_s': round(elapsed, 3),
+                'requests': self.requests,
+                'errors': self.errors,
+                'rows': self.rows,
+                'batches': self.batches,
+                'mean_batch_rows': round(self.batch_rows / self.batches, 2) if self.batches else 0.0,
+                'requests_per_s': round(self.requests / elapsed, 1),
+                'rows_per_s': round(self.rows / elapsed, 1),
+            }
+        if len(latencies):
+            p50, p99 = np.percentile(latencies, [50, 99])
+            snap['latency_ms'] = {'p50': round(p50, 3), 'p99': round(p99, 3),
+                                  'max': round(latencies.max(), 3), 'window': len(latencies)}
+        else:
+            snap['latency_ms'] = {'p50': None, 'p99': None, 'max': None, 'window': 0}
+        return snap
+
+
+class MicroBatcher:
+    """
+    Coalesces queued requests into batches for one model on a single worker thread.
+    submit(records) returns a Future resolving to a float array of len(records).
+    """
+
+    def __init__(self, pipeline, predict, max_batch=MAX_BATCH, max_wait_ms=MAX_WAIT_MS, stats=None):
+        self.pipeline = pipeline
+        self.predict = predict
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait_ms / 1000.0
+        self.stats = stats
+        self._buffer = np.empty((self.max_batch, pipeline.n_features), dtype=np.float32)
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, records):
+        future = Future()
+        self._queue.put((records, future))
+        return future
+
+    def close(self):
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def _collect(self, first):
+        """first plus whatever else arrives before the batch is full or the wait is over"""
+        batch = [first]
+        rows = len(first[0])
+        deadline = time.perf_counter() + self.max_wait
+        while rows < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                self._queue.put(_STOP)
+                break
+            batch.append(item)
+            rows += len(item[0])
+        return batch
+
+    def _score(self, records):
+        frame = pd.DataFrame.from_records(records, columns=self.pipeline.input_columns)
+        out = self._buffer if len(frame) <= len(self._buffer) else None
+        X = self.pipeline.transform(frame, out=out)
+        return np.asarray(self.predict(X), dtype=np.float64)
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is _STOP:
+                return
+            batch = self._collect(first)
+            records = [record for item, _ in batch for record in item]
+            try:
+                probs = self._score(records)
+            except Exception as e:
+                if len(batch) == 1:
+                    batch[0][1].set_exception(e)
+                else:
+                    self._score_each(batch)
+                continue
+            if self.stats is not None:
+                self.stats.record_batch(len(records))
+            start = 0
+            for item, future in batch:
+                future.set_result(probs[start:start + len(item)])
+                start += len(item)
+
+    def _score_each(self, batch):
+        """Rescore a failed batch request by request, so one bad request doesn't fail the others"""
+        for item, future in batch:
+            try:
+                probs = self._score(item)
+            except Exception as e:
+                future.set_exception(e)
+                continue
+            if self.stats is not None:
+                self.stats.record_batch(len(item))
+            future.set_result(probs)
+
+
+class ScoringHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, so clients reuse connections
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status, message):
+        self.server.stats.record_error()
+        self._send(status, {'error': {'status': status, 'message': message}})
+
+    def do_GET(self):
+        path = urlsplit(self.path).path.rstrip('/')
+        if path == '/metrics':
+            self._send(200, self.server.stats.snapshot())
+        elif path == '/health':
+            self._send(200, self.server.describe())
+        else:
+            self._error(404, 'Not found')
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length)
+        start = time.perf_counter()
+        parts = urlsplit(self.path)
+        if parts.path.rstrip('/') != '/predict':
+            return self._error(404, 'Not found')
+
+        query = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+        name = query.get('model', self.server.default_model)
+        batcher = self.server.batchers.get(name)
+        if batcher is None:
+            return self._error(404, f"Unknown model {name!r}")
+
+        try:
+            payload = json.loads(body or b'null')
+        except ValueError:
+            return self._error(400, 'Body is not valid JSON')
+        single = isinstance(payload, dict)
+        records = [payload] if single else payload
+        if not isinstance(records, list) or not records or not all(isinstance(r, dict) for r in records):
+            return self._error(400, 'Expected a track object or a non-empty list of track objects')
+        missing = self.server.missing_columns(records)
+        if missing:
+            return self._error(400, f"Missing fields: {', '.join(missing)}")
+        invalid = self.server.invalid_fields(records)
+        if invalid:
+            return self._error(400, f"Invalid fields: {'; '.join(invalid[:10])}")
+
+        try:
+            probs = batcher.submit(records).result()
+        except Exception as e:
+            return self._error(500, f'{type(e).__name__}: {e}')
+        predictions = [{ID_COLUMN: record.get(ID_COLUMN), 'p_pop': round(float(p), 6)}
+                       for record, p in zip(records, probs)]
+        self.server.stats.record_request(len(records), (time.perf_counter() - start) * 1000.0)
+        self._send(200, predictions[0] if single else {'model': name, 'predictions': predictions})
+
+
+class ScoringServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, pipeline, predictors, max_batch=MAX_BATCH, max_wait_ms=MAX_WAIT_MS):
+        super().__init__(address, ScoringHandler)
+        self.pipeline = pipeline
+        self.max_batch = max_batch
+        self.max_wait_ms = max_wait_ms
+        self.stats = ServeStats()
+        self.default_model = next(iter(predictors))
+        self.batchers = {name: MicroBatcher(pipeline, predict, max_batch, max_wait_ms, self.stats)
+                         for name, predict in predictors.items()}
+        # The genre column is optional: tracks without it get empty genre text
+        self.required_columns = [col for col in pipeline.input_columns if col != GENRE_COLUMN]
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def missing_columns(self, records):
+        return [col for col in self.required_columns if any(col not in record for record in records)]
+
+    def invalid_fields(self, records):
+        """'track N: column ...' for every input value of the wrong JSON type (null is always allowed)"""
+        problems = []
+        for i, record in enumerate(records):
+            for col in self.pipeline.input_columns:
+                value = record.get(col)
+                if value is None:
+                    continue
+                if col in TEXT_COLUMNS:
+                    ok, expected = isinstance(value, str), 'a string'
+                elif col in FLAG_COLUMNS:
+                    ok, expected = isinstance(value, bool) or value in (0, 1), 'true, false, 0 or 1'
+                else:
+                    ok = isinstance(value, (int, float)) and not isinstance(value, bool) and np.isfinite(value)
+                    expected = 'a finite number'
+                if not ok:
+                    problems.append(f"track {i}: {col} must be {expected} or null, got {value!r}")
+        return problems
+
+    def describe(self):
+        return {'status': 'ok', 'models': list(self.batchers), 'default_model': self.default_model,
+                'input_columns': self.pipeline.input_columns, 'n_features': self.pipeline.n_features,
+                'max_batch': self.max_batch, 'max_wait_ms': self.max_wait_ms}
+
+    def server_close(self):
+        super().server_close()
+        for batcher in self.batchers.values():
+            batcher.close()
+
+
+def parse_model_arg(value):
+    """'name=path' or 'path' (named after the file) -> (name, path)"""
+    name, sep, path = value.partition('=')
+    if not sep:
+        path = value
+        name = os.path.splitext(os.path.basename(value))[0]
+    return name, path
+
+
+def start_server(pipeline, predictors, host='127.0.0.1', port=0, max_batch=MAX_BATCH, max_wait_ms=MAX_WAIT_MS):
+    """Start a scoring server on a background thread; returns the server (call .shutdown())"""
+    server = ScoringServer((host, port), pipeline, predictors, max_batch, max_wait_ms)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve pop predictions over HTTP with micro-batching")
+    parser.add_argument('--pipeline', required=True, help="FeaturePipeline saved by the notebook (.joblib)")
+    parser.add_argument('--model', action='append', required=True,
+                        help="saved model, as PATH or NAME=PATH; repeat to serve several (the first is the default)")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--max-batch', type=int, default=MAX_BATCH, help="rows per model call (1 disables batching)")
+    parser.add_argument('--max-wait-ms', type=float, default=MAX_WAIT_MS,
+                        help="how long a batch waits for more requests once the first has arrived")
+    args = parser.parse_args(argv)
+
+    pipeline = FeaturePipeline.load(args.pipeline)
+    predictors = {}
+    for value in args.model:
+        name, path = parse_model_arg(value)
+        predictors[name] = load_predictor(path)
+
+    server = ScoringServer((args.host, args.port), pipeline, predictors, args.max_batch, args.max_wait_ms)
+    print(f"✅ Scoring {', '.join(predictors)} on {server.base_url} "
+          f"(max batch {args.max_batch}, max wait {args.max_wait_ms:g} ms, {pipeline.n_features} features)", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,486 @@
+"""
+Out-of-fold stacking: the README's Smart Ensemble as reusable code
+
+The base learners (XGBoost, LightGBM, GradientBoosting, CatBoost if
+installed, logistic regression and a balanced FFN) each produce one column of K-fold
+out-of-fold pop probabilities over the training rows. They also produce a
+column for the holdout rows, averaged over the K fold models. An XGBoost
+meta-learner, or logistic regression when XGBoost is missing, is then fit on
+those columns.
+
+    oof_predictions(X, y, X_holdout)   columns for every learner, computing only the missing ones
+    fit_meta(oof, y)                   meta-learner on the cached columns
+    stack(X, y, X_holdout, y_holdout)  both, plus holdout metrics for every column and the stack
+    StackedEnsemble                    fold models + meta-learner with predict_proba, for scoring new tracks
+
+Given X_sparse (FeaturePipeline.transform(..., sparse=True), e.g. the matrix
+cache's CSR), XGBoost, LightGBM and logistic regression train on it; the other
+learners, the FFN among them, take the dense X.
+
+Every (learner, fold) pair is one job. Jobs run in spawned, thread-capped
+worker processes that map X, y, the holdout matrix, their CSR parts and the
+fold assignment from shared memory (popmusic.parallel_train). A finished
+column is saved as
+
+    <cache_dir>/<learner>-<key>.npz      oof, holdout, meta
+    <cache_dir>/<learner>-<key>.joblib   the K fold models (their mean is the column for new rows)
+
+The key hashes the data (content of X, y and the holdout matrix), the fold
+count and seed, and that learner's estimator, parameters and input format, nothing else.
+Adding a learner or retuning one therefore computes only that learner's
+column; the others are loaded from disk. Boosters and the FFN are trained with
+balanced sample weights. stack() saves a StackedEnsemble
+(models/stacking_ensemble.joblib), which popmusic.models.load_predictor, and
+so score and serve, load like any other .joblib model.
+
+    python -m popmusic stack --learners xgboost lightgbm gradient_boosting ffn --jobs 8
+    python -m popmusic stack --param xgboost.max_depth=8    # recomputes the xgboost column only
+"""
+
+import hashlib
+import importlib
+import importlib.util
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import get_context
+
+import numpy as np
+
+from popmusic.data import DATA_DIR, SPLIT_SEED
+from popmusic.parallel_train import SharedArrays, attach, detach, thread_cap_env
+
+CACHE_DIR = os.path.join(DATA_DIR, 'stacking_cache')
+CACHE_VERSION = 3  # bump when fold handling or the column format changes
+N_FOLDS = 5
+_HASH_ROWS = 1 << 16
+
+# name -> estimator ('module:Class'), constructor parameters, whether it may be missing,
+# and whether it trains on the CSR input when there is one
+LEARNERS = {
+    'xgboost': {'estimator': 'xgboost:XGBClassifier', 'optional': False, 'sparse': True, 'params': {
+        'n_estimators': 400, 'max_depth': 6, 'learning_rate': 0.05, 'subsample': 0.8,
+        'colsample_bytree': 0.8, 'eval_metric': 'logloss', 'tree_method': 'hist'}},
+    'lightgbm': {'estimator': 'lightgbm:LGBMClassifier', 'optional': False, 'sparse': True, 'params': {
+        'n_estimators': 400, 'num_leaves': 31, 'learning_rate': 0.05, 'subsample': 0.8, 'subsample_freq': 1,
+        'colsample_bytree': 0.8, 'verbose': -1}},
+    'gradient_boosting': {'estimator': 'sklearn.ensemble:GradientBoostingClassifier', 'optional': False,
+                          'sparse': False,
+                          'params': {'n_estimators': 200, 'max_depth': 3, 'learning_rate': 0.1, 'subsample': 0.8}},
+    'catboost': {'estimator': 'catboost:CatBoostClassifier', 'optional': True, 'sparse': False,
+                 'params': {'iterations': 400, 'depth': 6, 'learning_rate': 0.05, 'verbose': 0}},
+    'logistic': {'estimator': 'sklearn.linear_model:LogisticRegression', 'optional': False, 'sparse': True,
+                 'params': {'max_iter': 1000}},
+    'ffn': {'estimator': 'popmusic.stacking:FFNClassifier', 'optional': False, 'sparse': False, 'params': {
+        'architecture': 'improved', 'epochs': 30}},
+}
+META_LEARNERS = {
+    'xgboost': ('xgboost:XGBClassifier', {'n_estimators': 200, 'max_depth': 3, 'learning_rate': 0.05,
+                                          'eval_metric': 'logloss'}),
+    'logistic': ('sklearn.linear_model:LogisticRegression', {'max_iter': 1000}),
+}
+THREAD_PARAMS = ('n_jobs', 'thread_count')  # estimator parameters capped at the job's thread count
+
+
+class FFNClassifier:
+    """Balanced FFN (one of popmusic.models.ARCHITECTURES) with a scikit-learn style fit / predict_proba"""
+
+    def __init__(self, architecture='improved', epochs=30, batch_size=None, seed=SPLIT_SEED):
+        self.architecture = architecture
+        self.epochs = epochs
+        self.batch_size = batch_size
+        self.seed = seed
+
+    def fit(self, X, y, sample_weight=None):
+        import tensorflow as tf
+
+        from popmusic.models import TRAIN_BATCH_SIZE, build_model
+
+        tf.keras.utils.set_random_seed(self.seed)
+        self.model_ = build_model(self.architecture, X.shape[1])
+        self.model_.fit(X, y, sample_weight=sample_weight, epochs=self.epochs,
+                        batch_size=self.batch_size or TRAIN_BATCH_SIZE, verbose=0)
+        return self
+
+    def predict_proba(self, X):
+        from popmusic.models import PREDICT_BATCH_SIZE
+
+        p = self.model_.predict(X, batch_size=PREDICT_BATCH_SIZE, verbose=0).ravel()
+        return np.column_stack([1 - p, p])
+
+    def __getstate__(self):
+        # Keras models are pickled as the bytes of a .keras file
+        state = dict(self.__dict__)
+        if 'model_' in state:
+            import tempfile
+
+            with tempfile.TemporaryDirectory() as tmp:
+                path = os.path.join(tmp, 'model.keras')
+                state['model_'].save(path)
+                with open(path, 'rb') as f:
+                    state['model_'] = f.read()
+        return state
+
+    def __setstate__(self, state):
+        if 'model_' in state:
+            import tempfile
+
+            from tensorflow import keras as tfk
+
+            with tempfile.TemporaryDirectory() as tmp:
+                path = os.path.join(tmp, 'model.keras')
+                with open(path, 'wb') as f:
+                    f.write(state['model_'])
+                state['model_'] = tfk.models.load_model(path)
+        self.__dict__.update(state)
+
+
+class StackedEnsemble:
+    """
+    Base learners' fold models plus the meta-learner, as one scikit-learn style predictor.
+    A learner's column for new rows is the mean of its fold models, as for the holdout rows.
+
+    Input is FeaturePipeline.transform() output. Learners in sparse_learners were trained
+    on transform(..., sparse=True), which is X - sparse_offset as CSR.
+    """
+
+    def __init__(self, fold_models, meta, sparse_learners=(), sparse_offset=None):
+        self.fold_models = fold_models  # {learner: [model for fold 0, 1, ...]}
+        self.meta = meta
+        self.sparse_learners = set(sparse_learners)
+        self.sparse_offset = sparse_offset
+
+    @property
+    def learners(self):
+        return list(self.fold_models)
+
+    def columns(self, X):
+        """(len(X), n_learners) base-learner probabilities, the meta-learner's input"""
+        X_sparse = None
+        if self.sparse_learners:
+            import scipy.sparse as sp
+
+            X_sparse = sp.csr_matrix(np.asarray(X, dtype=np.float32) - self.sparse_offset)
+        return np.column_stack([
+            np.mean([np.asarray(model.predict_proba(X_sparse if name in self.sparse_learners else X))[:, 1]
+                     for model in models], axis=0)
+            for name, models in self.fold_models.items()
+        ]).astype(np.float32)
+
+    def predict_proba(self, X):
+        return self.meta.predict_proba(self.columns(X))
+
+
+def _resolve(path):
+    module, name = path.split(':')
+    return getattr(importlib.import_module(module), name)
+
+
+def available(spec):
+    """Whether a learner's estimator module is installed"""
+    module = spec['estimator'].split(':')[0]
+    return importlib.util.find_spec(module.split('.')[0]) is not None
+
+
+def learner_specs(names=None, params=None):
+    """
+    {name: spec} for the requested learners (default: all installed), with
+    params = {name: {parameter: value}} merged over the defaults.
+    A learner named explicitly must be installed; the default set skips missing ones.
+    """
+    params = params or {}
+    specs = {}
+    for name in names or LEARNERS:
+        spec = LEARNERS[name]
+        if not available(spec):
+            if names is None:
+                print(f"⚠️  {name} is not installed; leaving it out of the stack")
+                continue
+            raise ImportError(f"Learner {name!r} needs {spec['estimator'].split(':')[0]}, which is not installed")
+        specs[name] = {'estimator': spec['estimator'], 'sparse': spec['sparse'],
+                       'params': {**spec['params'], **params.get(name, {})}}
+    if not specs:
+        raise ImportError("None of the stacking learners is installed")
+    unknown = set(params) - set(specs)
+    if unknown:
+        raise ValueError(f"Parameters given for learners not in the stack: {sorted(unknown)}")
+    return specs
+
+
+def data_fingerprint(*arrays):
+    """Content hash of the arrays (dtype, shape and bytes), read in row blocks so memmaps stay cheap"""
+    digest = hashlib.sha256()
+    for array in arrays:
+        if array is None:
+            digest.update(b'none')
+            continue
+        array = np.asarray(array)
+        digest.update(f'{array.dtype.str}{array.shape}'.encode())
+        for start in range(0, len(array), _HASH_ROWS):
+            digest.update(np.ascontiguousarray(array[start:start + _HASH_ROWS]).tobytes())
+    return digest.hexdigest()
+
+
+def column_key(data_key, spec, folds, seed):
+    payload = json.dumps({'version': CACHE_VERSION, 'data': data_key, 'folds': folds, 'seed': seed,
+                          'estimator': spec['estimator'], 'params': spec['params'], 'sparse': spec['sparse']},
+                         sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def _column_path(cache_dir, name, key):
+    return os.path.join(cache_dir, f'{name}-{key}.npz')
+
+
+def _models_path(cache_dir, name, key):
+    return os.path.join(cache_dir, f'{name}-{key}.joblib')
+
+
+def fold_assignment(y, folds=N_FOLDS, seed=SPLIT_SEED):
+    """Stratified fold number (0..folds-1) for every row"""
+    from sklearn.model_selection import StratifiedKFold
+
+    fold_id = np.empty(len(y), dtype=np.int8)
+    splitter = StratifiedKFold(n_splits=folds, shuffle=True, random_state=seed)
+    for fold, (_, held_out) in enumerate(splitter.split(np.zeros(len(y)), y)):
+        fold_id[held_out] = fold
+    return fold_id
+
+
+def make_estimator(spec, threads=None, seed=SPLIT_SEED):
+    """Estimator for a learner spec, seeded and capped at `threads` unless its parameters say otherwise"""
+    estimator = _resolve(spec['estimator'])(**spec['params'])
+    if hasattr(estimator, 'get_params'):
+        names = estimator.get_params()
+        extra = {'random_state': seed} if 'random_state' in names else {}
+        if threads:
+            extra.update({param: threads for param in THREAD_PARAMS if param in names})
+        extra = {param: value for param, value in extra.items() if param not in spec['params']}
+        if extra:
+            estimator.set_params(**extra)
+    return estimator
+
+
+def _share_csr(arrays, name, matrix):
+    """Add a CSR matrix to a SharedArrays dict as <name>_data / _indices / _indptr"""
+    for part in ('data', 'indices', 'indptr'):
+        arrays[f'{name}_{part}'] = getattr(matrix, part)
+
+
+def _input(arrays, name, sparse):
+    """arrays[name], or the CSR shared as <name>_sparse_* when the learner takes sparse input"""
+    if not sparse:
+        return arrays[name]
+    import scipy.sparse as sp
+
+    parts = tuple(arrays[f'{name}_sparse_{part}'] for part in ('data', 'indices', 'indptr'))
+    return sp.csr_matrix(parts, shape=(len(parts[2]) - 1, arrays[name].shape[1]), copy=False)
+
+
+def fit_fold(name, spec, fold, shared, threads, seed=SPLIT_SEED):
+    """Worker: fit one learner on every fold but `fold`; returns the model and its held-out and holdout probabilities"""
+    from sklearn.utils.class_weight import compute_sample_weight
+
+    arrays, blocks = attach(shared)
+    X = X_holdout = None
+    try:
+        start = time.perf_counter()
+        X = _input(arrays, 'X', spec['sparse'])
+        train = np.flatnonzero(arrays['fold_id'] != fold)
+        held = np.flatnonzero(arrays['fold_id'] == fold)
+        X_fit, y_fit = X[train], arrays['y'][train]
+        estimator = make_estimator(spec, threads, seed)
+        estimator.fit(X_fit, y_fit, sample_weight=compute_sample_weight('balanced', y_fit))
+        held_out = np.asarray(estimator.predict_proba(X[held]))[:, 1].astype(np.float32)
+        holdout = None
+        if 'X_holdout' in arrays:
+            X_holdout = _input(arrays, 'X_holdout', spec['sparse'])
+            holdout = np.asarray(estimator.predict_proba(X_holdout))[:, 1].astype(np.float32)
+        seconds = time.perf_counter() - start
+    finally:
+        del arrays, X, X_holdout
+        detach(blocks)
+    return {'name': name, 'fold': fold, 'model': estimator, 'held_out': held_out, 'holdout': holdout,
+            'seconds': seconds}
+
+
+def _save_models(path, models):
+    import joblib
+
+    tmp_path = f'{path}.tmp-{os.getpid()}'
+    joblib.dump(models, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def _save_column(path, oof, holdout, meta):
+    tmp_path = f'{path}.tmp-{os.getpid()}.npz'
+    np.savez(tmp_path, oof=oof, holdout=holdout if holdout is not None else np.empty(0, np.float32),
+             meta=np.array(json.dumps(meta, default=str)))
+    os.replace(tmp_path, path)
+
+
+def _load_column(path):
+    with np.load(path) as entry:
+        holdout = entry['holdout']
+        return entry['oof'], holdout if holdout.size else None, json.loads(str(entry['meta']))
+
+
+def oof_predictions(X, y, X_holdout=None, learners=None, params=None, folds=N_FOLDS, seed=SPLIT_SEED,
+                    jobs=None, threads_per_job=None, cache_dir=CACHE_DIR, data_key=None, keep_models=False,
+                    X_sparse=None, X_holdout_sparse=None, verbose=True):
+    """
+    Out-of-fold columns for every learner, loading cached ones and computing the rest.
+    X_sparse / X_holdout_sparse (CSR, same rows as X / X_holdout) feed the sparse-capable learners.
+    Returns {'names', 'oof' (n, L), 'holdout' (m, L) or None, 'keys', 'computed', 'seconds',
+    'sparse' (learners that took the CSR)}, plus 'models' ({name: fold models}) with keep_models=True.
+    """
+    specs = learner_specs(learners, params)
+    if X_sparse is None or (X_holdout is not None and X_holdout_sparse is None):
+        for spec in specs.values():
+            spec['sparse'] = False
+    data_key = data_key or data_fingerprint(X, y, X_holdout)
+    keys = {name: column_key(data_key, spec, folds, seed) for name, spec in specs.items()}
+    columns = {}
+    for name, key in keys.items():
+        path = _column_path(cache_dir, name, key)
+        # The fold models are written first, so a column file implies its models exist
+        if os.path.exists(path) and os.path.exists(_models_path(cache_dir, name, key)):
+            columns[name] = _load_column(path)
+            if verbose:
+                print(f"⚡ {name}: out-of-fold column {key} loaded from cache")
+    missing = [name for name in specs if name not in columns]
+
+    seconds = {}
+    models = {name: [None] * folds for name in missing}
+    if missing:
+        fold_id = fold_assignment(y, folds, seed)
+        arrays = {'X': X, 'y': y, 'fold_id': fold_id}
+        if X_holdout is not None:
+            arrays['X_holdout'] = X_holdout
+        if any(specs[name]['sparse'] for name in missing):
+            _share_csr(arrays, 'X_sparse', X_sparse)
+            if X_holdout is not None:
+                _share_csr(arrays, 'X_holdout_sparse', X_holdout_sparse)
+        n_jobs = len(missing) * folds
+        jobs = min(jobs or (os.cpu_count() or 1), n_jobs)
+        threads = threads_per_job or max(1, (os.cpu_count() or 1) // jobs)
+        oof = {name: np.empty(len(y), dtype=np.float32) for name in missing}
+        holdout = {name: [] for name in missing}
+        with SharedArrays(arrays) as shared:
+            del arrays
+            spec = shared.spec()
+            with thread_cap_env(threads):
+                pool = ProcessPoolExecutor(max_workers=jobs, mp_context=get_context('spawn'))
+                futures = [pool.submit(fit_fold, name, specs[name], fold, spec, threads, seed)
+                           for name in missing for fold in range(folds)]
+            with pool:
+                for future in as_completed(futures):
+                    result = future.result()
+                    name = result['name']
+                    oof[name][fold_id == result['fold']] = result['held_out']
+                    models[name][result['fold']] = result['model']
+                    if result['holdout'] is not None:
+                        holdout[name].append(result['holdout'])
+                    seconds[name] = seconds.get(name, 0.0) + result['seconds']
+                    if verbose:
+                        print(f"  {name} fold {result['fold'] + 1}/{folds}: {result['seconds']:.1f} s")
+
+        os.makedirs(cache_dir, exist_ok=True)
+        for name in missing:
+            column_holdout = np.mean(holdout[name], axis=0, dtype=np.float32) if holdout[name] else None
+            meta = {'learner': name, 'key': keys[name], 'data_key': data_key, 'folds': folds, 'seed': seed,
+                    **specs[name], 'fit_seconds': seconds[name], 'built_at': time.strftime('%Y-%m-%dT%H:%M:%S')}
+            _save_models(_models_path(cache_dir, name, keys[name]), models[name])
+            _save_column(_column_path(cache_dir, name, keys[name]), oof[name], column_holdout, meta)
+            columns[name] = (oof[name], column_holdout, meta)
+            if verbose:
+                print(f"💾 {name}: out-of-fold column {keys[name]} cached ({seconds[name]:.1f} s of fitting)")
+
+    names = list(specs)
+    have_holdout = X_holdout is not None
+    result = {
+        'names': names,
+        'oof': np.column_stack([columns[name][0] for name in names]),
+        'holdout': np.column_stack([columns[name][1] for name in names]) if have_holdout else None,
+        'keys': keys,
+        'computed': missing,
+        'seconds': seconds,
+        'sparse': [name for name in names if specs[name]['sparse']],
+    }
+    if keep_models:
+        import joblib
+
+        result['models'] = {name: models[name] if name in missing
+                            else joblib.load(_models_path(cache_dir, name, keys[name])) for name in names}
+    return result
+
+
+def fit_meta(oof, y, meta='xgboost', seed=SPLIT_SEED):
+    """Meta-learner on the out-of-fold columns (logistic regression if XGBoost is not installed)"""
+    from sklearn.utils.class_weight import compute_sample_weight
+
+    if meta == 'xgboost' and importlib.util.find_spec('xgboost') is None:
+        print("⚠️  xgboost is not installed; using logistic regression as the meta-learner")
+        meta = 'logistic'
+    estimator_path, params = META_LEARNERS[meta]
+    estimator = _resolve(estimator_path)(**params, random_state=seed)
+    return estimator.fit(oof, y, sample_weight=compute_sample_weight('balanced', y))
+
+
+def stack(X, y, X_holdout, y_holdout, learners=None, params=None, meta='xgboost', folds=N_FOLDS,
+          seed=SPLIT_SEED, jobs=None, threads_per_job=None, cache_dir=CACHE_DIR, data_key=None, output_path=None,
+          X_sparse=None, X_holdout_sparse=None, sparse_offset=None):
+    """
+    Columns, meta-learner and holdout metrics for each column and the stack; returns the report dict.
+    X_sparse / X_holdout_sparse feed the sparse-capable learners (see oof_predictions).
+    With output_path, the StackedEnsemble (fold models + meta-learner) is saved there with joblib;
+    with sparse inputs it also needs sparse_offset (FeaturePipeline.sparse_offset).
+    """
+    from popmusic.evaluate import evaluate_probs
+
+    if output_path and X_sparse is not None and sparse_offset is None:
+        raise ValueError("Saving a stack trained on sparse input needs sparse_offset (FeaturePipeline.sparse_offset)")
+    start = time.perf_counter()
+    columns = oof_predictions(X, y, X_holdout, learners, params, folds, seed, jobs, threads_per_job,
+                              cache_dir, data_key, keep_models=bool(output_path),
+                              X_sparse=X_sparse, X_holdout_sparse=X_holdout_sparse)
+    meta_model = fit_meta(columns['oof'], y, meta, seed)
+    stacked = meta_model.predict_proba(columns['holdout'])[:, 1]
+
+    results = {name: evaluate_probs(y_holdout, columns['holdout'][:, i]) for i, name in enumerate(columns['names'])}
+    results['stack'] = evaluate_probs(y_holdout, stacked)
+    if output_path:
+        import joblib
+
+        os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+        tmp_path = f'{output_path}.tmp-{os.getpid()}'
+        joblib.dump(StackedEnsemble(columns['models'], meta_model, columns['sparse'], sparse_offset), tmp_path)
+        os.replace(tmp_path, output_path)
+    return {
+        'learners': columns['names'],
+        'keys': columns['keys'],
+        'computed': columns['computed'],
+        'sparse': columns['sparse'],
+        'fit_seconds': columns['seconds'],
+        'wall_seconds': time.perf_counter() - start,
+        'results': results,
+        'ensemble_path': output_path,
+    }
+
+
+def print_report(report):
+    print("\n" + "=" * 80)
+    print(f"STACKING: {len(report['learners'])} base learners, {len(report['computed'])} column(s) computed, "
+          f"{report['wall_seconds']:.1f} s")
+    print("=" * 80)
+    print(f"{'Model':<20}{'Column':>18}{'Fit s':>8}{'AUC':>8}{'F1':>8}{'Prec':>8}{'Recall':>8}")
+    for name, metrics in report['results'].items():
+        key = report['keys'].get(name, '')
+        fit = report['fit_seconds'].get(name)
+        fit = f"{fit:.1f}" if fit is not None else ('cached' if key else '')
+        label = f"{name} (csr)" if name in report['sparse'] else name
+        print(f"{label:<20}{key:>18}{fit:>8}{metrics['auc']:>8.4f}{metrics['f1']:>8.4f}"
+              f"{metrics['precision']:>8.4f}{metrics['recall']:>8.4f}")
+    if report['ensemble_path']:
+        print(f"\n💾 Stacked ensemble saved to {report['ensemble_path']}")
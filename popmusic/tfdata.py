@@ -0,0 +1,144 @@
+"""
+tf.data input pipeline for FFN training
+
+model.fit(X_train_np, y_train, class_weight=...) hands Keras the whole NumPy
+matrix, which it slices into tensors on the training thread. make_dataset
+builds a tf.data pipeline instead:
+
+    batch ids -> shuffle (each epoch) -> load contiguous batch slices (parallel)
+              -> [cache] -> prefetch
+
+  - Batches are contiguous row slices, so a memory-mapped feature file is read
+    sequentially and training data can be larger than RAM. Rows are expected
+    in random order (split_indices output already is); the batch order is
+    reshuffled every epoch.
+  - class_weight becomes per-row sample weights (sample_weights), the third
+    element of each batch, which Keras applies exactly like class_weight.
+  - cache=True keeps loaded batches in memory after the first epoch;
+    cache='path' caches them to a file instead.
+  - prefetch overlaps loading the next batches with the current step.
+
+save_memmap / open_memmap store a split as X.npy, y.npy and w.npy in a
+directory, opened with mmap_mode='r'. save_memmap copies in row blocks, so a
+memory-mapped source is streamed to disk rather than loaded first.
+
+    python -m popmusic train medium --input-mode tfdata
+"""
+
+import os
+
+import numpy as np
+
+BATCH_SIZE = 256
+CACHE_SHUFFLE_BATCHES = 256  # shuffle buffer (in batches) once batches come from the cache
+MEMMAP_BLOCK_ROWS = 65_536  # rows copied at a time by save_memmap
+
+
+def sample_weights(y, class_weight):
+    """Per-row float32 weights equivalent to Keras' class_weight={class: weight}"""
+    y = np.asarray(y).astype(np.int64).ravel()
+    lookup = np.zeros(max(class_weight) + 1, dtype=np.float32)
+    for cls, weight in class_weight.items():
+        lookup[cls] = weight
+    return lookup[y]
+
+
+def save_memmap(directory, X, y, weights=None):
+    """Write X (float32), y and optional weights as .npy files for open_memmap"""
+    os.makedirs(directory, exist_ok=True)
+    arrays = {'X': (X, np.float32), 'y': (y, np.float32)}
+    if weights is not None:
+        arrays['w'] = (weights, np.float32)
+    for name, (array, dtype) in arrays.items():
+        out = np.lib.format.open_memmap(os.path.join(directory, f'{name}.npy'), mode='w+', dtype=dtype,
+                                        shape=np.shape(array))
+        for start in range(0, len(out), MEMMAP_BLOCK_ROWS):
+            out[start:start + MEMMAP_BLOCK_ROWS] = array[start:start + MEMMAP_BLOCK_ROWS]
+        out.flush()
+        del out
+    return directory
+
+
+def open_memmap(directory):
+    """(X, y, weights or None) memory-mapped read-only from a save_memmap directory"""
+    def load(name):
+        path = os.path.join(directory, f'{name}.npy')
+        return np.load(path, mmap_mode='r') if os.path.exists(path) else None
+
+    return load('X'), load('y'), load('w')
+
+
+def make_dataset(X, y, weights=None, batch_size=BATCH_SIZE, shuffle=True, cache=False, seed=42):
+    """tf.data.Dataset of (x, y[, w]) float32 batches over arrays or memmaps"""
+    import tensorflow as tf
+
+    n = len(X)
+    n_features = X.shape[1]
+    n_batches = -(-n // batch_size)
+    with_weights = weights is not None
+
+    def load(i):
+        start = int(i) * batch_size
+        stop = min(start + batch_size, n)
+        batch = [np.asarray(X[start:stop], dtype=np.float32), np.asarray(y[start:stop], dtype=np.float32)]
+        if with_weights:
+            batch.append(np.asarray(weights[start:stop], dtype=np.float32))
+        return tuple(batch)
+
+    def load_batch(i):
+        dtypes = [tf.float32] * (3 if with_weights else 2)
+        parts = tf.numpy_function(load, [i], dtypes)
+        parts[0].set_shape([None, n_features])
+        for part in parts[1:]:
+            part.set_shape([None])
+        return tuple(parts)
+
+    ds = tf.data.Dataset.range(n_batches)
+    if cache:
+        # Load in order once, then shuffle cached batches
+        ds = ds.map(load_batch, num_parallel_calls=tf.data.AUTOTUNE)
+        ds = ds.cache('' if cache is True else cache)
+        if shuffle:
+            ds = ds.shuffle(min(n_batches, CACHE_SHUFFLE_BATCHES), seed=seed, reshuffle_each_iteration=True)
+    else:
+        if shuffle:
+            ds = ds.shuffle(n_batches, seed=seed, reshuffle_each_iteration=True)
+        ds = ds.map(load_batch, num_parallel_calls=tf.data.AUTOTUNE, deterministic=not shuffle)
+    return ds.prefetch(tf.data.AUTOTUNE)
+
+
+def epoch_timer():
+    """Keras callback collecting wall-clock seconds per epoch in .times"""
+    import time
+
+    from tensorflow.keras import callbacks as tfkc
+
+    class EpochTimer(tfkc.Callback):
+        def on_train_begin(self, logs=None):
+            self.times = []
+
+        def on_epoch_begin(self, epoch, logs=None):
+            self._start = time.perf_counter()
+
+        def on_epoch_end(self, epoch, logs=None):
+            self.times.append(time.perf_counter() - self._start)
+
+    return EpochTimer()
+
+
+def train_model_tfdata(name, X_train, y_train, X_val, y_val, epochs=None, cache=False, verbose=1, callbacks=()):
+    """popmusic.models.train_model on tf.data inputs with sample weights; returns (model, history)"""
+    from popmusic.models import TRAINING, build_model, class_weights, training_callbacks
+
+    weights = sample_weights(y_train, class_weights(np.asarray(y_train)))
+    train_ds = make_dataset(X_train, y_train, weights, shuffle=True, cache=cache)
+    val_ds = make_dataset(X_val, y_val, shuffle=False, cache=bool(cache))
+    model = build_model(name, X_train.shape[1])
+    history = model.fit(
+        train_ds,
+        validation_data=val_ds,
+        epochs=epochs or TRAINING[name]['epochs'],
+        verbose=verbose,
+        callbacks=training_callbacks(name) + list(callbacks),
+    )
+    return model, history
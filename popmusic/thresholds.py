@@ -0,0 +1,221 @@
+"""
+Decision-threshold optimization over every distinct cut point
+
+Notebook cell 20 used to try 17 thresholds from np.linspace(0.1, 0.9, 17),
+with one full precision_recall_fscore_support pass each. Here the scores are
+sorted once (descending) and cumulative sums of positives and negatives give
+the confusion counts at every distinct score, so precision, recall, F1 or
+any cost-weighted objective is known exactly at all n cut points in
+O(n log n). A cut at threshold t predicts pop for score >= t; the extra cut
+t = inf predicts nothing.
+
+    threshold_curve(y, scores)               counts and metrics at every cut
+    optimize_threshold(y, scores, n_boot=1000)
+        best cut plus bootstrap confidence intervals
+    tune_by_segment(y, scores, segments)     best cut per segment (decade, time of day, ...)
+
+Bootstrap replicates are Poisson-weighted: each row's resampling count is
+Poisson(1), so a cut bucket holding c positives gets Poisson(c) positives in
+a replicate. Replicates are drawn per bucket as one (B, K) array and scored
+with a cumulative sum. No per-replicate loop over rows is needed. Above
+max_cuts buckets, replicates use max_cuts equal-count cuts, always including
+the chosen one.
+
+Objectives are 'f1', 'youden' (TPR - FPR), 'accuracy', or a callable
+objective(tp, fp, fn, tn) -> array to maximise; cost_objective(fp_cost,
+fn_cost) builds the cost-weighted one.
+"""
+
+import numpy as np
+
+BOOT_SEED = 42
+MAX_BOOT_CUTS = 4096
+BOOT_CELLS_PER_CHUNK = 20_000_000  # replicates x cuts scored at once
+
+
+def _safe_div(num, den):
+    return np.divide(num, den, out=np.zeros(np.broadcast(num, den).shape), where=den > 0)
+
+
+def cost_objective(fp_cost=1.0, fn_cost=1.0):
+    """Objective maximising -(fp_cost * FP + fn_cost * FN)"""
+    def objective(tp, fp, fn, tn):
+        return -(fp_cost * fp + fn_cost * fn)
+    return objective
+
+
+def _f1(tp, fp, fn, tn):
+    return _safe_div(2 * tp, 2 * tp + fp + fn)
+
+
+def _youden(tp, fp, fn, tn):
+    return _safe_div(tp, tp + fn) - _safe_div(fp, fp + tn)
+
+
+def _accuracy(tp, fp, fn, tn):
+    return _safe_div(tp + tn, tp + fp + fn + tn)
+
+
+OBJECTIVES = {'f1': _f1, 'youden': _youden, 'accuracy': _accuracy}
+
+
+def _objective(objective):
+    return OBJECTIVES[objective] if isinstance(objective, str) else objective
+
+
+def _cuts(y, scores, sample_weight=None, groups=None):
+    """
+    Sorted cut points: (thresholds, tp, fp, group of each cut, positives and negatives per cut's group).
+    With groups, rows are sorted by (group, -score) and counts restart in every group.
+    Each group starts with the predict-nothing cut (threshold inf).
+    """
+    scores = np.asarray(scores, dtype=np.float64).ravel()
+    y = np.asarray(y).ravel().astype(bool)
+    w = np.ones(len(scores)) if sample_weight is None else np.asarray(sample_weight, dtype=np.float64).ravel()
+    g = np.zeros(len(scores), dtype=np.int64) if groups is None else np.asarray(groups).ravel()
+
+    order = np.lexsort((-scores, g))
+    s, g, w, pos_mask = scores[order], g[order], w[order], y[order]
+    pos = np.where(pos_mask, w, 0.0)
+    tp = np.cumsum(pos)
+    fp = np.cumsum(w - pos)
+
+    new_group = np.empty(len(s), dtype=bool)
+    new_group[:1] = True
+    new_group[1:] = g[1:] != g[:-1]
+    last = np.empty(len(s), dtype=bool)
+    last[-1:] = True
+    last[:-1] = (s[1:] != s[:-1]) | new_group[1:]
+
+    # Restart the counts at each group
+    starts = np.flatnonzero(new_group)
+    group_id = np.cumsum(new_group) - 1
+    tp -= (tp[starts] - pos[starts])[group_id]
+    fp -= (fp[starts] - (w - pos)[starts])[group_id]
+
+    idx = np.flatnonzero(last)
+    thresholds, tp, fp, cut_group = s[idx], tp[idx], fp[idx], group_id[idx]
+
+    # Predict-nothing cut in front of every group
+    first = np.flatnonzero(np.r_[True, cut_group[1:] != cut_group[:-1]])
+    thresholds = np.insert(thresholds, first, np.inf)
+    tp = np.insert(tp, first, 0.0)
+    fp = np.insert(fp, first, 0.0)
+    cut_group = np.insert(cut_group, first, cut_group[first])
+
+    ends = np.r_[first[1:] + np.arange(1, len(first)), len(tp)] - 1  # last cut of each group, after insertion
+    positives, negatives = tp[ends][cut_group], fp[ends][cut_group]
+    return thresholds, tp, fp, cut_group, positives, negatives, g[starts]
+
+
+def _metrics(tp, fp, positives, negatives):
+    fn = positives - tp
+    tn = negatives - fp
+    return {
+        'tp': tp, 'fp': fp, 'fn': fn, 'tn': tn,
+        'precision': _safe_div(tp, tp + fp),
+        'recall': _safe_div(tp, positives),
+        'f1': _safe_div(2 * tp, tp + fp + positives),
+    }
+
+
+def threshold_curve(y, scores, sample_weight=None):
+    """Dict of arrays over every distinct cut: threshold, tp, fp, fn, tn, precision, recall, f1"""
+    thresholds, tp, fp, _, positives, negatives, _ = _cuts(y, scores, sample_weight)
+    curve = _metrics(tp, fp, positives, negatives)
+    curve['threshold'] = thresholds
+    return curve
+
+
+def _bootstrap(tp, fp, best, objective, n_boot, confidence, max_cuts, seed):
+    """Percentile intervals for the metrics at cut `best` and for the re-optimised threshold"""
+    rng = np.random.default_rng(seed)
+    n_cuts = len(tp)
+    keep = np.arange(n_cuts)
+    if n_cuts > max_cuts:
+        keep = np.unique(np.r_[np.linspace(0, n_cuts - 1, max_cuts).round().astype(np.int64), best])
+    best_k = int(np.searchsorted(keep, best))
+
+    # Rows (weights) landing in each kept bucket; bucket k covers cuts (keep[k-1], keep[k]]
+    pos_bucket = np.diff(tp[keep], prepend=0.0)
+    neg_bucket = np.diff(fp[keep], prepend=0.0)
+
+    samples = {name: [] for name in ('precision', 'recall', 'f1', 'objective', 'threshold_index')}
+    chunk = max(1, BOOT_CELLS_PER_CHUNK // len(keep))
+    for start in range(0, n_boot, chunk):
+        b = min(chunk, n_boot - start)
+        tp_b = np.cumsum(rng.poisson(pos_bucket, size=(b, len(keep))), axis=1, dtype=np.float64)
+        fp_b = np.cumsum(rng.poisson(neg_bucket, size=(b, len(keep))), axis=1, dtype=np.float64)
+        positives, negatives = tp_b[:, -1:], fp_b[:, -1:]
+        at_best = _metrics(tp_b[:, best_k], fp_b[:, best_k], positives[:, 0], negatives[:, 0])
+        for name in ('precision', 'recall', 'f1'):
+            samples[name].append(at_best[name])
+        scores = objective(tp_b, fp_b, positives - tp_b, negatives - fp_b)
+        samples['objective'].append(scores.max(axis=1))
+        samples['threshold_index'].append(keep[scores.argmax(axis=1)])
+
+    alpha = (1 - confidence) / 2 * 100
+    intervals = {}
+    for name, parts in samples.items():
+        values = np.concatenate(parts)
+        intervals[name] = tuple(np.percentile(values, [alpha, 100 - alpha]))
+    return intervals
+
+
+def optimize_threshold(y, scores, objective='f1', sample_weight=None, n_boot=0, confidence=0.95,
+                       max_cuts=MAX_BOOT_CUTS, seed=BOOT_SEED):
+    """
+    Best cut for `objective` with its confusion counts and metrics. With n_boot > 0,
+    'ci' holds percentile intervals for precision / recall / f1 at that cut, the
+    best objective value, and the re-optimised threshold.
+    """
+    objective_fn = _objective(objective)
+    thresholds, tp, fp, _, positives, negatives, _ = _cuts(y, scores, sample_weight)
+    metrics = _metrics(tp, fp, positives, negatives)
+    values = objective_fn(tp, fp, metrics['fn'], metrics['tn'])
+    best = int(np.argmax(values))
+
+    result = {name: float(array[best]) for name, array in metrics.items()}
+    result.update(threshold=float(thresholds[best]), objective=float(values[best]), n_cuts=len(thresholds))
+    if n_boot:
+        ci = _bootstrap(tp, fp, best, objective_fn, n_boot, confidence, max_cuts, seed)
+        lo, hi = ci.pop('threshold_index')
+        # Higher cut index = lower threshold
+        ci['threshold'] = (float(thresholds[int(hi)]), float(thresholds[int(lo)]))
+        result['ci'] = {name: (float(a), float(b)) for name, (a, b) in ci.items()}
+    return result
+
+
+def tune_by_segment(y, scores, segments, objective='f1', sample_weight=None, min_rows=200):
+    """
+    Best cut per segment value, from one sort over (segment, -score).
+    Segments with fewer than min_rows rows keep the global threshold. Returns a DataFrame.
+    """
+    import pandas as pd
+
+    codes, uniques = pd.factorize(pd.Series(segments, copy=False), use_na_sentinel=False)
+    objective_fn = _objective(objective)
+    thresholds, tp, fp, cut_group, positives, negatives, group_codes = _cuts(y, scores, sample_weight, codes)
+    metrics = _metrics(tp, fp, positives, negatives)
+    values = objective_fn(tp, fp, metrics['fn'], metrics['tn'])
+
+    # Per-group argmax: sort cuts by (group, -value) and take each group's first
+    order = np.lexsort((-values, cut_group))
+    first = order[np.r_[True, cut_group[order][1:] != cut_group[order][:-1]]]
+
+    rows = np.bincount(codes, minlength=len(uniques))[group_codes]
+    global_best = optimize_threshold(y, scores, objective, sample_weight)
+    frame = pd.DataFrame({
+        'segment': np.asarray(uniques, dtype=object)[group_codes],
+        'rows': rows,
+        'positives': positives[first],
+        'threshold': thresholds[first],
+        'objective': values[first],
+        'precision': metrics['precision'][first],
+        'recall': metrics['recall'][first],
+        'f1': metrics['f1'][first],
+    })
+    small = frame['rows'] < min_rows
+    frame.loc[small, 'threshold'] = global_best['threshold']
+    frame['uses_global'] = small
+    return frame